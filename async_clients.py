@@ -0,0 +1,1054 @@
+"""
+Модуль асинхронных клиентов ВКонтакте, Яндекс.Диска и Google Drive.
+
+Этот модуль предоставляет асинхронные (asyncio) варианты классов передачи фотографий
+с теми же методами, что и у `DownloaderVK`, `UploaderYD` и `UploaderGD`. Вместо потока
+на каждую передачу одновременно выполняемые запросы ожидают ответа в одном цикле
+событий, поэтому один процесс может держать тысячи передач одновременно.
+
+Классы модуля:
+- `AsyncRequestScheduler`: Асинхронный аналог `RequestScheduler` на общем пуле
+  соединений httpx: те же повторы при ответах 429/5xx и ошибках соединения, учет
+  `Retry-After`, ограничение частоты VK API и измерения через `instrumentation`.
+- `AsyncDownloaderVK`: Получение ID пользователя, списка фотографий и их скачивание.
+  Параметры запросов, разбор ответов VK, имена файлов и кэш общие с `DownloaderVK`.
+- `AsyncUploaderYD`: Создание папки и загрузка файлов на Яндекс.Диск, в том числе по URL
+  и потоком с другого сервера. Параметры запросов и разбор ответов общие с `uploader_yd`.
+- `AsyncUploaderGD`: Загрузка файлов в Google Drive по HTTP-протоколу загрузки Drive API.
+  Аутентификация, поиск и создание папок выполняются через PyDrive (`UploaderGD`)
+  в отдельном потоке, так как у PyDrive нет асинхронного интерфейса.
+
+Решения о повторах, параметры запросов и разбор ответов не дублируются: клиенты
+используют чистые функции `request_scheduler`, `uploader_yd` и статические методы
+`DownloaderVK`. Блокирующие операции - запись файлов, манифест и хранилище SQLite,
+дисковый кэш - выполняются в отдельных потоках (`asyncio.to_thread`), чтобы не
+останавливать цикл событий.
+
+Модулю нужна библиотека httpx, которая требуется только при создании
+`AsyncRequestScheduler`: `pip install httpx`.
+
+Основные функции:
+- `get_default_async_scheduler`: Возвращает общий планировщик для текущего цикла событий.
+- `iter_file`: Асинхронно читает файл частями для передачи в теле запроса.
+"""
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+import time
+import uuid
+import json_dumper
+from cache import LookupCache
+from downloader_vk import CHUNK_SIZE, PAGE_CACHE_TTL, PAGE_SIZE, DownloaderVK
+from instrumentation import body_size, get_instrumentation
+from manifest import Manifest, STATUS_DONE, STATUS_FAILED
+from photo_policy import SizePolicy
+from photo_store import PhotoStore
+from request_scheduler import (RETRY_STATUSES, VK_API_URL, VK_REQUESTS_PER_SECOND, RateLimiter, body_position,
+                               is_one_shot, response_json, retry_delay, vk_api_params, vk_error)
+from uploader_gd import CHUNK_SIZE as GD_CHUNK_SIZE, RESUMABLE_THRESHOLD, UploaderGD, file_md5
+from uploader_yd import (ALREADY_EXISTS, YD_API_URL, folder_message, operation_state, resource_params,
+                         same_resource, upload_params, url_upload_href, url_upload_params)
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import httpx
+except ImportError:  # httpx нужен только при создании AsyncRequestScheduler
+    httpx = None
+
+ASYNC_POOL_SIZE = 100  # Максимальное количество соединений в пуле асинхронного клиента
+GD_UPLOAD_URL = 'https://www.googleapis.com/upload/drive/v2'
+
+
+async def iter_file(file: BinaryIO, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Читает файл частями в отдельном потоке, не блокируя цикл событий.
+
+    Args:
+        file (BinaryIO): Файл, открытый на чтение в двоичном режиме.
+        chunk_size (int): Размер части в байтах.
+
+    Yields:
+        bytes: Очередная часть файла.
+    """
+    while True:
+        chunk = await asyncio.to_thread(file.read, chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+class AsyncRequestScheduler:
+    """Класс для выполнения асинхронных HTTP-запросов с повторами и ограничением частоты."""
+    def __init__(self, max_retries: int = 5, backoff: float = 0.5, max_backoff: float = 30.0,
+                 vk_rate: float = VK_REQUESTS_PER_SECOND, pool_size: int = ASYNC_POOL_SIZE,
+                 timeout: float = 60.0) -> None:
+        """
+        Инициализирует асинхронный планировщик запросов.
+
+        Args:
+            max_retries (int): Максимальное количество повторов одного запроса.
+            backoff (float): Базовая задержка перед повтором в секундах.
+            max_backoff (float): Максимальная задержка перед повтором в секундах.
+            vk_rate (float): Максимальное количество вызовов VK API в секунду.
+            pool_size (int): Максимальное количество соединений в пуле.
+            timeout (float): Таймаут соединения и чтения в секундах.
+
+        Raises:
+            RuntimeError: Если не установлена библиотека httpx.
+        """
+        if httpx is None:
+            raise RuntimeError('Для асинхронных клиентов установите библиотеку httpx: pip install httpx')
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.vk_limiter = RateLimiter(vk_rate)
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.client = httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True)
+
+    def retry_delay(self, attempt: int, response: Optional['httpx.Response'] = None) -> float:
+        """
+        Вычисляет задержку перед повтором запроса (см. `request_scheduler.retry_delay`).
+
+        Args:
+            attempt (int): Номер попытки, начиная с нуля.
+            response (Optional[httpx.Response]): Ответ сервера, если он был получен.
+
+        Returns:
+            float: Задержка в секундах.
+        """
+        return retry_delay(attempt, self.backoff, self.max_backoff, response.headers if response is not None else None)
+
+    async def request(self, method: str, url: str, kind: Optional[str] = None, stream: bool = False,
+                      **kwargs: Any) -> 'httpx.Response':
+        """
+        Выполняет HTTP-запрос, повторяя его при временных ошибках.
+
+        Если тело запроса (`content`) - файловый объект, он передается частями
+        и перед повтором перематывается на начало. Тело-итератор можно передать
+        только один раз, поэтому такой запрос не повторяется. Ответ с stream=True
+        нужно закрыть вызовом `finish`.
+
+        Args:
+            method (str): HTTP-метод.
+            url (str): URL запроса.
+            kind (Optional[str]): Вид запроса для измерений, например 'vk_cdn'.
+            stream (bool): Не читать тело ответа.
+            **kwargs: Параметры `httpx.AsyncClient.build_request`.
+
+        Returns:
+            httpx.Response: Ответ сервера. После исчерпания повторов возвращается
+            последний полученный ответ.
+
+        Raises:
+            httpx.TransportError: Если после всех повторов не удалось выполнить запрос.
+        """
+        content = kwargs.get('content')
+        position = body_position(content)
+        if position is not None and body_size(content):
+            kwargs['headers'] = {'Content-Length': str(body_size(content)), **(kwargs.get('headers') or {})}
+        max_retries = 0 if is_one_shot(content) else self.max_retries
+        instrumentation = get_instrumentation()
+        record = instrumentation.begin_request(method, url, kind, body_size(content))
+        for attempt in range(max_retries + 1):
+            if position is not None:
+                content.seek(position)
+                kwargs['content'] = iter_file(content)
+            attempt_start = time.perf_counter()
+            if record is not None:
+                record['attempts'] += 1
+            try:
+                response = await self.client.send(self.client.build_request(method, url, **kwargs), stream=True)
+                headers_received = time.perf_counter()
+                if not stream:
+                    try:
+                        await response.aread()
+                    except httpx.TransportError:
+                        await response.aclose()
+                        raise
+            except httpx.TransportError:
+                if attempt == max_retries:
+                    instrumentation.end_request(record)
+                    raise
+                delay = self.retry_delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                    break
+                delay = self.retry_delay(attempt, response)
+                await response.aclose()
+            if record is not None:
+                record['wait'] += delay
+            await asyncio.sleep(delay)
+
+        if record is not None:
+            record['ttfb'] = headers_received - attempt_start
+        response.timing = (record, headers_received)
+        if not stream:
+            await self.finish(response, len(response.content))
+        return response
+
+    async def finish(self, response: 'httpx.Response', nbytes: int) -> None:
+        """
+        Закрывает ответ и завершает измерение запроса после чтения тела.
+
+        Args:
+            response (httpx.Response): Ответ, полученный из `request`.
+            nbytes (int): Количество прочитанных байт тела ответа.
+        """
+        await response.aclose()
+        record, headers_received = getattr(response, 'timing', None) or (None, None)
+        if record is not None:
+            record['transfer'] = time.perf_counter() - headers_received
+            get_instrumentation().end_request(record, response.status_code, nbytes)
+        response.timing = None
+
+    async def get(self, url: str, **kwargs: Any) -> 'httpx.Response':
+        """Выполняет GET-запрос с повторами."""
+        return await self.request('GET', url, **kwargs)
+
+    async def put(self, url: str, **kwargs: Any) -> 'httpx.Response':
+        """Выполняет PUT-запрос с повторами."""
+        return await self.request('PUT', url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> 'httpx.Response':
+        """Выполняет POST-запрос с повторами."""
+        return await self.request('POST', url, **kwargs)
+
+    async def vk_api(self, method: str, params: Dict[str, Any], post: bool = False) -> Any:
+        """
+        Вызывает метод VK API.
+
+        Args:
+            method (str): Имя метода VK API, например 'photos.get'.
+            params (Dict[str, Any]): Параметры метода, включая access_token.
+            post (bool): Передать параметры в теле POST-запроса.
+
+        Returns:
+            Any: Содержимое поля `response` ответа VK API.
+
+        Raises:
+            VKAPIError: Если VK API вернул ошибку, которую нельзя повторить.
+            httpx.HTTPError: Если запрос не удался после всех повторов или ответ не в формате JSON.
+        """
+        params = vk_api_params(params)
+        for attempt in range(self.max_retries + 1):
+            delay = self.vk_limiter.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if post:
+                response = await self.post(f'{VK_API_URL}/{method}', kind='vk_api', data=params)
+            else:
+                response = await self.get(f'{VK_API_URL}/{method}', kind='vk_api', params=params)
+            response.raise_for_status()  # Повторы 429/5xx исчерпаны, тело такого ответа - не ответ VK API
+            result = response_json(response)
+            if result is None:
+                raise httpx.DecodingError(f'Ответ VK API на {method} не в формате JSON', request=response.request)
+            error = vk_error(result)
+            if error is None:
+                return result['response']
+            if not error.retryable or attempt == self.max_retries:
+                raise error
+            await asyncio.sleep(self.retry_delay(attempt))
+
+    async def aclose(self) -> None:
+        """Закрывает все соединения пула."""
+        await self.client.aclose()
+
+    async def __aenter__(self) -> 'AsyncRequestScheduler':
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+_default_async_scheduler: Optional[Tuple[asyncio.AbstractEventLoop, AsyncRequestScheduler]] = None
+
+
+def get_default_async_scheduler() -> AsyncRequestScheduler:
+    """
+    Возвращает общий асинхронный планировщик для текущего цикла событий.
+
+    Клиент httpx привязан к циклу событий, поэтому для нового цикла
+    (например, при следующем вызове asyncio.run) создается новый планировщик.
+
+    Returns:
+        AsyncRequestScheduler: Планировщик с общим пулом соединений.
+    """
+    global _default_async_scheduler
+    loop = asyncio.get_running_loop()
+    if _default_async_scheduler is None or _default_async_scheduler[0] is not loop:
+        _default_async_scheduler = (loop, AsyncRequestScheduler())
+    return _default_async_scheduler[1]
+
+
+class AsyncDownloaderVK:
+    """Класс для асинхронной работы с фотографиями из ВКонтакте."""
+    def __init__(self, vk_token: str, vk_id: str, folder_name=None, json_file: str = 'photos.json',
+                 scheduler: Optional[AsyncRequestScheduler] = None, cache: Optional[LookupCache] = None,
+                 size_policy: Optional[SizePolicy] = None) -> None:
+        """
+        Инициализирует экземпляр AsyncDownloaderVK.
+
+        Args:
+            vk_token (str): Токен доступа к VK API.
+            vk_id (str): ID пользователя или сообщества VK.
+            folder_name (str): Имя папки для скачивания фотографий.
+            json_file (str): Путь к JSON-файлу со сведениями о фотографиях.
+            scheduler (Optional[AsyncRequestScheduler]): Планировщик запросов, по умолчанию общий.
+            cache (Optional[LookupCache]): Кэш страниц списка фотографий, по умолчанию `DownloaderVK.lookup_cache`.
+            size_policy (Optional[SizePolicy]): Правило выбора размера, по умолчанию - наибольший вариант.
+        """
+        self.vk_token = vk_token
+        self.vk_id = vk_id
+        self.folder_name = folder_name
+        self.json_file = json_file
+        self.scheduler = scheduler or get_default_async_scheduler()
+        self.cache = cache or DownloaderVK.lookup_cache
+        self.size_policy = size_policy
+
+    @staticmethod
+    async def get_id(screen_name: str, vk_token: str, scheduler: Optional[AsyncRequestScheduler] = None,
+                     cache: Optional[LookupCache] = None) -> str:
+        """
+        Получает ID пользователя VK по его имени, запоминая результат в кэше.
+
+        Args:
+            screen_name (str): Имя пользователя или идентификатор.
+            vk_token (str): Токен доступа к VK API.
+            scheduler (Optional[AsyncRequestScheduler]): Планировщик запросов, по умолчанию общий.
+            cache (Optional[LookupCache]): Кэш, по умолчанию `DownloaderVK.lookup_cache`.
+
+        Returns:
+            str: ID пользователя VK.
+
+        Raises:
+            VKAPIError: Если VK API вернул ошибку.
+        """
+        cache = cache or DownloaderVK.lookup_cache
+        if screen_name.isdigit():
+            return screen_name
+        cache_key = DownloaderVK.id_cache_key(screen_name, vk_token)
+        vk_id = await asyncio.to_thread(cache.get, cache_key)
+        if vk_id is None:
+            params = DownloaderVK.resolve_params(screen_name, vk_token)
+            response = await (scheduler or get_default_async_scheduler()).vk_api('utils.resolveScreenName', params)
+            vk_id = response['object_id']
+            await asyncio.to_thread(cache.set, cache_key, vk_id)
+        return vk_id
+
+    async def iter_photos(self, count: Optional[int] = None, offset: int = 0,
+                          page_size: int = PAGE_SIZE, album_id: str = 'profile') -> AsyncIterator[Dict[str, Any]]:
+        """
+        Постранично перебирает фотографии пользователя из VK.
+
+        Args:
+            count (Optional[int]): Максимальное количество фотографий, None - все фотографии альбома.
+            offset (int): Смещение первой фотографии.
+            page_size (int): Размер страницы (не более 1000 - ограничение VK API).
+            album_id (str): Альбом: 'profile', 'wall', 'saved' или ID альбома.
+
+        Yields:
+            Dict[str, Any]: Запись о фотографии: id, url, likes, date и size.
+
+        Raises:
+            VKAPIError: Если VK API вернул ошибку, например альбом закрыт настройками приватности.
+        """
+        page_size = min(page_size, PAGE_SIZE)
+        received = 0
+        while count is None or received < count:
+            params = DownloaderVK.page_params(self.vk_id, self.vk_token, album_id, offset + received,
+                                              page_size if count is None else min(page_size, count - received))
+            cache_key = DownloaderVK.page_cache_key(self.vk_id, self.vk_token, album_id,
+                                                    params['offset'], params['count'])
+            response = await asyncio.to_thread(self.cache.get, cache_key)
+            if response is None:
+                response = await self.scheduler.vk_api('photos.get', params)
+                await asyncio.to_thread(self.cache.set, cache_key, response, PAGE_CACHE_TTL)
+
+            items = response['items']
+            for item in items:
+                yield DownloaderVK.parse_photo(item, self.size_policy)
+            received += len(items)
+
+            if not items or offset + received >= response['count']:
+                break
+
+    async def get_photo_records(self, count: int = 5, offset: int = 0,
+                                album_id: str = 'profile') -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Получает фотографии пользователя из VK вместе с полными записями о них.
+
+        Сведения о фотографиях сохраняются в JSON-файл.
+
+        Args:
+            count (int): Количество фотографий для получения.
+            offset (int): Смещение для постраничного получения.
+            album_id (str): Альбом: 'profile', 'wall', 'saved' или ID альбома.
+
+        Returns:
+            List[Tuple[str, Dict[str, Any]]]: Пары из имени файла и записи о фотографии.
+        """
+        photos = [photo async for photo in self.iter_photos(count, offset, album_id=album_id)]
+        records = list(DownloaderVK.name_photos(photos))
+
+        def save() -> None:
+            with json_dumper.StreamJSON(self.json_file) as json_dump:
+                for _, photo in records:
+                    json_dump.add(DownloaderVK.json_record(photo))
+
+        await asyncio.to_thread(save)
+        return records
+
+    async def get_photos(self, count: int = 5, offset: int = 0) -> Dict[str, str]:
+        """
+        Получает фотографии пользователя из VK.
+
+        Args:
+            count (int): Количество фотографий для получения.
+            offset (int): Смещение для постраничного получения.
+
+        Returns:
+            Dict[str, str]: Словарь с именами файлов и URL фотографий.
+        """
+        return {file_name: photo['url'] for file_name, photo in await self.get_photo_records(count, offset)}
+
+    async def download_file(self, photo_url: str, file_path: str) -> Tuple[int, str]:
+        """
+        Скачивает одну фотографию, записывая ответ на диск частями через файл `.part`,
+        который при ошибке удаляется.
+
+        Args:
+            photo_url (str): URL фотографии.
+            file_path (str): Путь к файлу для сохранения.
+
+        Returns:
+            Tuple[int, str]: Количество записанных байт и SHA-256 содержимого.
+
+        Raises:
+            httpx.HTTPError: Если фотографию не удалось скачать.
+        """
+        written = 0
+        digest = hashlib.sha256()
+        part_path = f'{file_path}.part'
+        image = await self.scheduler.get(photo_url, kind='vk_cdn', stream=True)
+        try:
+            try:
+                image.raise_for_status()
+                file = await asyncio.to_thread(open, part_path, 'wb')
+                try:
+                    async for chunk in image.aiter_bytes(CHUNK_SIZE):
+                        await asyncio.to_thread(file.write, chunk)
+                        digest.update(chunk)
+                        written += len(chunk)
+                finally:
+                    await asyncio.to_thread(file.close)
+            finally:
+                await self.scheduler.finish(image, written)
+            await asyncio.to_thread(os.replace, part_path, file_path)
+        finally:
+            if await asyncio.to_thread(os.path.exists, part_path):  # Недокачанный файл не оставляем
+                await asyncio.to_thread(os.remove, part_path)
+        return written, digest.hexdigest()
+
+    async def download_photo(self, photo: Dict[str, Any], file_path: str,
+                             store: Optional[PhotoStore] = None) -> Tuple[int, str]:
+        """
+        Скачивает фотографию в файл, при наличии хранилища - через него.
+
+        Args:
+            photo (Dict[str, Any]): Запись о фотографии.
+            file_path (str): Путь к файлу для сохранения.
+            store (Optional[PhotoStore]): Хранилище с адресацией по содержимому.
+
+        Returns:
+            Tuple[int, str]: Количество скачанных байт (0, если фотография уже была в хранилище)
+            и SHA-256 содержимого.
+        """
+        if store is None:
+            return await self.download_file(photo['url'], file_path)
+
+        sha256 = await asyncio.to_thread(store.lookup, photo)
+        written = 0
+        if sha256 is None:
+            temp_path = await asyncio.to_thread(store.temp_path)
+            written, sha256 = await self.download_file(photo['url'], temp_path)
+            await asyncio.to_thread(store.ingest, temp_path, sha256)
+            await asyncio.to_thread(store.add, photo, sha256)
+        await asyncio.to_thread(store.link, sha256, file_path)
+        return written, sha256
+
+    async def download_to_pc(self, count: int, concurrency: int = 64, manifest: Optional[Manifest] = None,
+                             store: Optional[PhotoStore] = None, album_id: str = 'profile',
+                             semaphore: Optional[asyncio.Semaphore] = None, keep_files: bool = True) -> Dict[str, bool]:
+        """
+        Скачивает фотографии на локальный компьютер.
+
+        Args:
+            count (int): Количество фотографий для скачивания.
+            concurrency (int): Количество одновременных загрузок, если не передан semaphore.
+            manifest (Optional[Manifest]): Манифест для пропуска уже скачанных фотографий.
+            store (Optional[PhotoStore]): Хранилище для пропуска уже сохраненных фотографий.
+            album_id (str): Альбом: 'profile', 'wall', 'saved' или ID альбома.
+            semaphore (Optional[asyncio.Semaphore]): Общее ограничение одновременных передач.
+            keep_files (bool): False - папка загрузчика временная: в манифест записывается
+                только SHA-256 файла, а уже скачанные файлы не ищутся.
+
+        Returns:
+            Dict[str, bool]: Успешность скачивания для каждого файла.
+        """
+        await asyncio.to_thread(os.makedirs, self.folder_name, exist_ok=True)
+        semaphore = semaphore or asyncio.Semaphore(max(1, concurrency))
+        results = {}
+
+        def is_downloaded(key: str, file_name: str, file_path: str, photo: Dict[str, Any]) -> bool:
+            manifest.add_photo(photo, file_name)
+            if not keep_files:
+                return False
+            local_path, _ = manifest.get_local(key)
+            return local_path == file_path and os.path.exists(file_path)
+
+        def record(key: str, file_path: Optional[str], sha256: Optional[str]) -> None:
+            if not keep_files:
+                if sha256 is not None:
+                    manifest.set_sha256(key, sha256)
+                return
+            if file_path is None:
+                manifest.set_status(key, 'local', STATUS_FAILED)
+                return
+            manifest.set_local(key, file_path, sha256)
+            manifest.set_status(key, 'local', STATUS_DONE)
+
+        async def download(file_name: str, photo: Dict[str, Any]) -> None:
+            file_path = f'{self.folder_name}/{file_name}'
+            key = manifest.photo_key(photo) if manifest is not None else None
+            if key is not None and await asyncio.to_thread(is_downloaded, key, file_name, file_path, photo):
+                print(f'Файл {file_name} уже скачан, пропускаем')
+                results[file_name] = True
+                return
+            try:
+                async with semaphore:
+                    _, sha256 = await self.download_photo(photo, file_path, store)
+            except (httpx.HTTPError, OSError) as error:  # Ошибка одного файла не должна прерывать задание
+                print(f'Ошибка при скачивании файла {file_name}: {error}')
+                results[file_name] = False
+                if key is not None:
+                    await asyncio.to_thread(record, key, None, None)
+                return
+            results[file_name] = True
+            if key is not None:
+                await asyncio.to_thread(record, key, file_path, sha256)
+            print(f'Скачано {sum(results.values())} фото из VK, файл: {file_name}')
+
+        records = await self.get_photo_records(count, album_id=album_id)
+        await asyncio.gather(*(download(file_name, photo) for file_name, photo in records))
+        return results
+
+
+class AsyncUploaderYD:
+    """Класс для асинхронной загрузки файлов на Яндекс.Диск."""
+    def __init__(self, token_ya: str, folder_name: str, scheduler: Optional[AsyncRequestScheduler] = None) -> None:
+        """
+        Инициализирует класс AsyncUploaderYD с токеном и именем папки.
+
+        Args:
+            token_ya (str): Токен доступа к Яндекс.Диску.
+            folder_name (str): Имя папки для загрузки файлов.
+            scheduler (Optional[AsyncRequestScheduler]): Планировщик запросов, по умолчанию общий.
+        """
+        self.token_ya = token_ya
+        self.folder_name = folder_name
+        self.headers = {
+            'Content-Type': 'application/json',
+            'Authorization': f'OAuth {self.token_ya}'
+        }
+        self.scheduler = scheduler or get_default_async_scheduler()
+
+    async def folder_creation(self) -> None:
+        """Создает новую папку на Яндекс.Диске, если она не существует."""
+        params = {
+            'path': self.folder_name,
+            'overwrite': 'false'
+        }
+        response = await self.scheduler.put(f'{YD_API_URL}/resources/', kind='yandex_api',
+                                             headers=self.headers, params=params)
+        print(folder_message(self.folder_name, response.status_code, response.text))
+
+    async def upload_link(self, filename: str) -> Optional[str]:
+        """
+        Получает ссылку для загрузки файла на Яндекс.Диск.
+
+        Args:
+            filename (str): Имя файла в папке.
+
+        Returns:
+            Optional[str]: Ссылка для PUT-запроса или None при ошибке.
+
+        Raises:
+            httpx.HTTPError: Если не удалось выполнить запрос.
+        """
+        response = await self.scheduler.get(f'{YD_API_URL}/resources/upload', kind='yandex_api',
+                                            headers=self.headers, params=upload_params(self.folder_name, filename))
+        if response.status_code != 200:
+            print(f"Ошибка получения ссылки для загрузки: {response.text}")
+            return None
+        return (response_json(response) or {}).get('href')
+
+    async def upload(self, filename: str, curl: Union[bytes, str, BinaryIO, AsyncIterator[bytes]]) -> bool:
+        """
+        Загружает файл на Яндекс.Диск.
+
+        Args:
+            filename (str): Имя файла, который нужно загрузить.
+            curl (Union[bytes, str, BinaryIO, AsyncIterator[bytes]]): Данные файла, файл,
+                открытый на чтение, или асинхронный итератор частей файла.
+
+        Returns:
+            bool: Успешность загрузки файла.
+        """
+        try:
+            href = await self.upload_link(filename)
+            if href is None:
+                return False
+            uploader = await self.scheduler.put(href, kind='yandex_upload', content=curl)
+        except httpx.HTTPError as error:
+            print(f"Ошибка соединения при загрузке файла '{filename}': {error}")
+            return False
+
+        if uploader.status_code == 201:
+            print(f"Файл '{filename}' успешно загружен.")
+            return True
+        print(f"Ошибка при загрузке файла: {uploader.text}")
+        return False
+
+    async def upload_file(self, filename: str, file_path: str) -> bool:
+        """
+        Загружает локальный файл на Яндекс.Диск, читая его частями.
+
+        Args:
+            filename (str): Имя файла на Яндекс.Диске.
+            file_path (str): Путь к локальному файлу.
+
+        Returns:
+            bool: Успешность загрузки файла.
+        """
+        file = await asyncio.to_thread(open, file_path, 'rb')
+        try:
+            return await self.upload(filename, file)
+        finally:
+            await asyncio.to_thread(file.close)
+
+    async def relay(self, filename: str, source_url: str, attempts: int = 3) -> bool:
+        """
+        Передает файл с source_url на Яндекс.Диск потоком через этот процесс.
+
+        Args:
+            filename (str): Имя файла на Яндекс.Диске.
+            source_url (str): URL файла, например фотографии на CDN ВКонтакте.
+            attempts (int): Количество попыток передачи.
+
+        Returns:
+            bool: Успешность передачи файла.
+        """
+        for _ in range(attempts):
+            sent = 0
+            try:
+                source = await self.scheduler.get(source_url, kind='vk_cdn', stream=True)
+            except httpx.HTTPError as error:
+                print(f"Ошибка при получении файла '{filename}' с {source_url}: {error}")
+                continue
+            try:
+                if source.status_code != 200:
+                    print(f"Ошибка при получении файла '{filename}' с {source_url}: {source.status_code}")
+                    continue
+
+                async def chunks() -> AsyncIterator[bytes]:
+                    nonlocal sent
+                    async for chunk in source.aiter_bytes(CHUNK_SIZE):
+                        sent += len(chunk)
+                        yield chunk
+
+                if await self.upload(filename, chunks()):
+                    return True
+            finally:
+                await self.scheduler.finish(source, sent)
+        return False
+
+    async def upload_from_url(self, filename: str, file_url: str) -> Optional[str]:
+        """
+        Запускает загрузку файла на Яндекс.Диск по URL силами самого Диска.
+
+        Args:
+            filename (str): Имя файла на Яндекс.Диске.
+            file_url (str): URL, с которого Яндекс.Диск скачает файл.
+
+        Если файл с таким именем уже есть на Диске, его содержимое сравнивается
+        с источником, а отличающийся файл перезаписывается через `relay`.
+
+        Args:
+            filename (str): Имя файла на Яндекс.Диске.
+            file_url (str): URL, с которого Яндекс.Диск скачает файл.
+
+        Returns:
+            Optional[str]: Ссылка на асинхронную операцию, `ALREADY_EXISTS`, если на Диске
+            уже лежит тот же файл (или он перезаписан), или None при ошибке.
+        """
+        params = url_upload_params(self.folder_name, filename, file_url)
+        try:
+            response = await self.scheduler.post(f'{YD_API_URL}/resources/upload', kind='yandex_api',
+                                                 headers=self.headers, params=params)
+        except httpx.HTTPError as error:
+            print(f"Ошибка соединения при загрузке файла '{filename}' по ссылке: {error}")
+            return None
+        data = response_json(response) if response.status_code in (202, 409) else None
+        operation_href = url_upload_href(filename, response.status_code, response.text, data)
+        if operation_href == ALREADY_EXISTS and not await self.replace_existing(filename, file_url):
+            return None
+        return operation_href
+
+    async def resource(self, filename: str) -> Optional[Dict[str, Any]]:
+        """
+        Получает размер и MD5 файла на Яндекс.Диске.
+
+        Args:
+            filename (str): Имя файла в папке.
+
+        Returns:
+            Optional[Dict[str, Any]]: Поля size и md5 или None, если файла нет или запрос не удался.
+        """
+        try:
+            response = await self.scheduler.get(f'{YD_API_URL}/resources', kind='yandex_api', headers=self.headers,
+                                                params=resource_params(self.folder_name, filename))
+        except httpx.HTTPError:
+            return None
+        if response.status_code != 200:
+            return None
+        return response_json(response)
+
+    async def matches_url(self, filename: str, file_url: str) -> bool:
+        """
+        Проверяет, совпадает ли файл на Яндекс.Диске с файлом по URL.
+
+        Args:
+            filename (str): Имя файла на Яндекс.Диске.
+            file_url (str): URL источника.
+
+        Returns:
+            bool: True, если совпадают размер и MD5.
+        """
+        resource = await self.resource(filename)
+        if resource is None:
+            return False
+        try:
+            source = await self.scheduler.get(file_url, kind='vk_cdn', stream=True)
+        except httpx.HTTPError as error:
+            print(f"Ошибка при получении файла '{filename}' с {file_url}: {error}")
+            return False
+        digest = hashlib.md5()
+        size = 0
+        try:
+            if source.status_code != 200:
+                return False
+            length = source.headers.get('Content-Length')
+            if length is not None and int(length) != resource.get('size'):
+                return False
+            async for chunk in source.aiter_bytes(CHUNK_SIZE):
+                digest.update(chunk)
+                size += len(chunk)
+        except httpx.HTTPError as error:
+            print(f"Ошибка при получении файла '{filename}' с {file_url}: {error}")
+            return False
+        finally:
+            await self.scheduler.finish(source, size)
+        return same_resource(resource, size, digest.hexdigest())
+
+    async def replace_existing(self, filename: str, file_url: str) -> bool:
+        """
+        Оставляет файл на Яндекс.Диске, если он совпадает с источником, иначе перезаписывает его.
+
+        Args:
+            filename (str): Имя файла на Яндекс.Диске.
+            file_url (str): URL источника.
+
+        Returns:
+            bool: True, если на Диске в итоге лежит файл из источника.
+        """
+        if await self.matches_url(filename, file_url):
+            print(f"Файл '{filename}' с тем же содержимым уже есть на Яндекс.Диске.")
+            return True
+        print(f"Файл '{filename}' на Яндекс.Диске отличается от источника, перезаписываем.")
+        return await self.relay(filename, file_url)
+
+    async def operation_status(self, operation_href: str) -> str:
+        """
+        Получает статус асинхронной операции Яндекс.Диска.
+
+        Args:
+            operation_href (str): Ссылка на операцию.
+
+        Returns:
+            str: Статус операции: 'success', 'failed' или 'in-progress'.
+        """
+        try:
+            response = await self.scheduler.get(operation_href, kind='yandex_api', headers=self.headers)
+        except httpx.HTTPError:
+            return 'in-progress'
+        return operation_state(response.status_code, response_json(response) if response.status_code == 200 else None)
+
+    async def wait_operation(self, filename: str, operation_href: str, poll_interval: float = 1.0,
+                             timeout: float = 300.0) -> bool:
+        """
+        Дожидается завершения асинхронной операции загрузки файла.
+
+        Args:
+            filename (str): Имя загружаемого файла.
+            operation_href (str): Ссылка на операцию.
+            poll_interval (float): Интервал опроса статуса в секундах.
+            timeout (float): Максимальное время ожидания в секундах.
+
+        Returns:
+            bool: Успешность загрузки файла.
+        """
+        if operation_href == ALREADY_EXISTS:
+            return True
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+            status = await self.operation_status(operation_href)
+            if status == 'success':
+                return True
+            if status == 'failed':
+                print(f"Ошибка при загрузке файла '{filename}' по ссылке.")
+                return False
+        print(f"Истекло время ожидания загрузки файла '{filename}'.")
+        return False
+
+    async def upload_from_urls(self, files: Iterable[Tuple[str, str]], concurrency: int = 20,
+                               poll_interval: float = 1.0, timeout: float = 300.0) -> Dict[str, bool]:
+        """
+        Загружает файлы на Яндекс.Диск по URL, опрашивая статусы операций.
+
+        В отличие от пакетов `UploaderYD.upload_from_urls`, новая операция запускается
+        сразу после завершения любой из выполняемых.
+
+        Args:
+            files (Iterable[Tuple[str, str]]): Пары (имя файла, URL).
+            concurrency (int): Количество одновременно выполняемых операций.
+            poll_interval (float): Интервал опроса статусов в секундах.
+            timeout (float): Максимальное время ожидания одной операции в секундах.
+
+        Returns:
+            Dict[str, bool]: Успешность загрузки для каждого файла.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def transfer(filename: str, file_url: str) -> bool:
+            async with semaphore:
+                operation_href = await self.upload_from_url(filename, file_url)
+                if operation_href is None:
+                    return False
+                return await self.wait_operation(filename, operation_href, poll_interval, timeout)
+
+        files = list(files)
+        statuses = await asyncio.gather(*(transfer(filename, file_url) for filename, file_url in files))
+        return {filename: status for (filename, _), status in zip(files, statuses)}
+
+    async def upload_many(self, files: Iterable[Tuple[str, Union[bytes, str, BinaryIO]]],
+                          concurrency: int = 64) -> Dict[str, bool]:
+        """
+        Загружает набор файлов на Яндекс.Диск одновременно через общий пул соединений.
+
+        Args:
+            files (Iterable[Tuple[str, Union[bytes, str, BinaryIO]]]): Пары (имя файла, данные файла).
+            concurrency (int): Количество одновременных загрузок.
+
+        Returns:
+            Dict[str, bool]: Успешность загрузки для каждого файла.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def transfer(filename: str, curl: Union[bytes, str, BinaryIO]) -> bool:
+            async with semaphore:
+                return await self.upload(filename, curl)
+
+        files = list(files)
+        statuses = await asyncio.gather(*(transfer(filename, curl) for filename, curl in files))
+        return {filename: status for (filename, _), status in zip(files, statuses)}
+
+
+class AsyncUploaderGD:
+    """Класс для асинхронной загрузки файлов в Google Drive."""
+    def __init__(self, scheduler: Optional[AsyncRequestScheduler] = None,
+                 uploader: Optional[UploaderGD] = None) -> None:
+        """
+        Инициализирует класс AsyncUploaderGD.
+
+        Args:
+            scheduler (Optional[AsyncRequestScheduler]): Планировщик запросов, по умолчанию общий.
+            uploader (Optional[UploaderGD]): Клиент PyDrive для аутентификации и работы с папками.
+        """
+        self.scheduler = scheduler or get_default_async_scheduler()
+        self.uploader = uploader or UploaderGD()
+
+    async def folder_creation(self, folder_name: str) -> str:
+        """
+        Возвращает папку в корне Google Drive с заданным именем, создавая ее, если такой нет.
+
+        Поиск и создание выполняет `UploaderGD.folder_creation` в отдельном потоке.
+
+        Args:
+            folder_name (str): Имя папки.
+
+        Returns:
+            str: Идентификатор существующей или созданной папки.
+        """
+        return await asyncio.to_thread(self.uploader.folder_creation, folder_name)
+
+    async def list_files(self, folderid: str) -> Dict[str, str]:
+        """
+        Получает файлы папки Google Drive.
+
+        Args:
+            folderid (str): Идентификатор папки в Google Drive.
+
+        Returns:
+            Dict[str, str]: Словарь имя файла -> md5Checksum.
+        """
+        return await asyncio.to_thread(self.uploader.list_files, folderid)
+
+    def auth_headers(self) -> Dict[str, str]:
+        """
+        Возвращает заголовок авторизации, при необходимости обновляя токен PyDrive.
+
+        Returns:
+            Dict[str, str]: Заголовок Authorization с токеном доступа.
+        """
+        auth = self.uploader.drive.auth
+        if auth.credentials is None:
+            auth.LocalWebserverAuth()
+        elif auth.access_token_expired:
+            auth.Refresh()
+        return {'Authorization': f'Bearer {auth.credentials.access_token}'}
+
+    async def upload_file(self, folderid: str, file_path: str, file_name: Optional[str] = None) -> str:
+        """
+        Загружает один локальный файл в папку Google Drive.
+
+        Файлы меньше RESUMABLE_THRESHOLD загружаются одним multipart-запросом,
+        остальные - возобновляемой загрузкой частями по CHUNK_SIZE `uploader_gd`.
+
+        Args:
+            folderid (str): Идентификатор папки в Google Drive.
+            file_path (str): Путь к локальному файлу.
+            file_name (Optional[str]): Имя файла в Google Drive, по умолчанию имя локального файла.
+
+        Returns:
+            str: Идентификатор загруженного файла.
+
+        Raises:
+            httpx.HTTPError: Если Google Drive не принял файл.
+        """
+        title = file_name or os.path.basename(file_path)
+        metadata = json.dumps({'title': title, 'parents': [{'id': folderid}]})
+        mime_type = mimetypes.guess_type(title)[0] or 'application/octet-stream'
+        size = await asyncio.to_thread(os.path.getsize, file_path)
+        headers = await asyncio.to_thread(self.auth_headers)
+        url = f'{GD_UPLOAD_URL}/files'
+
+        file = await asyncio.to_thread(open, file_path, 'rb')
+        try:
+            if size < RESUMABLE_THRESHOLD:
+                boundary = uuid.uuid4().hex
+                body = b''.join([
+                    f'--{boundary}\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n{metadata}\r\n'.encode(),
+                    f'--{boundary}\r\nContent-Type: {mime_type}\r\n\r\n'.encode(),
+                    await asyncio.to_thread(file.read),
+                    f'\r\n--{boundary}--'.encode(),
+                ])
+                response = await self.scheduler.post(
+                    url, kind='gdrive', params={'uploadType': 'multipart'}, content=body,
+                    headers={**headers, 'Content-Type': f'multipart/related; boundary={boundary}'})
+                response.raise_for_status()
+                return response.json()['id']
+
+            response = await self.scheduler.post(
+                url, kind='gdrive', params={'uploadType': 'resumable'}, content=metadata,
+                headers={**headers, 'Content-Type': 'application/json; charset=UTF-8',
+                         'X-Upload-Content-Type': mime_type, 'X-Upload-Content-Length': str(size)})
+            response.raise_for_status()
+            session_url = response.headers['Location']
+            for start in range(0, size, GD_CHUNK_SIZE):
+                chunk = await asyncio.to_thread(file.read, GD_CHUNK_SIZE)
+                content_range = f'bytes {start}-{start + len(chunk) - 1}/{size}'
+                response = await self.scheduler.put(session_url, kind='gdrive', content=chunk,
+                                                    headers={**headers, 'Content-Range': content_range})
+                if response.status_code != 308:  # 308 - часть принята, загрузка продолжается
+                    response.raise_for_status()
+            return response.json()['id']
+        finally:
+            await asyncio.to_thread(file.close)
+
+    async def upload(self, folderid: str, folder_name: str, manifest: Optional[Manifest] = None,
+                     concurrency: int = 16, semaphore: Optional[asyncio.Semaphore] = None,
+                     file_keys: Optional[Dict[str, str]] = None) -> Dict[str, bool]:
+        """
+        Загружает файлы из локальной папки в указанную папку Google Drive.
+
+        Файлы, которые уже есть в папке Google Drive с тем же именем и MD5,
+        пропускаются, как и недокачанные файлы `.part`. Остальные загружаются одновременно.
+
+        Args:
+            folderid (str): Идентификатор папки в Google Drive.
+            folder_name (str): Имя папки, откуда загружать фото.
+            manifest (Optional[Manifest]): Манифест для пропуска уже загруженных фотографий.
+            concurrency (int): Количество одновременных загрузок, если не передан semaphore.
+            semaphore (Optional[asyncio.Semaphore]): Общее ограничение одновременных передач.
+            file_keys (Optional[Dict[str, str]]): Имена файлов для загрузки и ключи их фотографий
+                в манифесте. По умолчанию загружаются все файлы папки, а ключи ищутся по пути.
+
+        Returns:
+            Dict[str, bool]: Успешность загрузки для каждого файла.
+
+        Raises:
+            FileNotFoundError: Если локальная папка не найдена.
+        """
+        if not await asyncio.to_thread(os.path.exists, folder_name):
+            raise FileNotFoundError(f"Папка '{folder_name}' не найдена. Убедитесь, что она существует.")
+        semaphore = semaphore or asyncio.Semaphore(max(1, concurrency))
+        existing_files = await self.list_files(folderid)
+        results = {}
+
+        def find(file_name: str, file_path: str) -> Tuple[Optional[str], bool]:
+            if manifest is None:
+                return None, False
+            key = file_keys[file_name] if file_keys is not None else manifest.find_by_path(file_path)
+            return key, key is not None and manifest.is_done(key, 'gdrive')
+
+        async def transfer(file_name: str) -> None:
+            file_path = os.path.join(folder_name, file_name)
+            key, done = await asyncio.to_thread(find, file_name, file_path)
+            if done:
+                print(f'Файл {file_name} уже загружен, пропускаем')
+                results[file_name] = True
+                return
+            try:
+                if existing_files.get(file_name) == await asyncio.to_thread(file_md5, file_path):
+                    print(f'Файл {file_name} уже есть в Google Drive, пропускаем')
+                else:
+                    async with semaphore:
+                        await self.upload_file(folderid, file_path, file_name)
+                    print(f'Файл {file_name} загружен')
+            except (httpx.HTTPError, OSError) as error:  # Ошибка одного файла не должна прерывать загрузку
+                print(f'Ошибка при загрузке файла {file_name} в Google Drive: {error}')
+                results[file_name] = False
+                if key is not None:
+                    await asyncio.to_thread(manifest.set_status, key, 'gdrive', STATUS_FAILED)
+                return
+            results[file_name] = True
+            if key is not None:
+                await asyncio.to_thread(manifest.set_status, key, 'gdrive', STATUS_DONE)
+
+        file_names = list(file_keys) if file_keys is not None else await asyncio.to_thread(os.listdir, folder_name)
+        await asyncio.gather(*(transfer(file_name) for file_name in file_names if not file_name.endswith('.part')))
+        print(f"Файлы успешно загружены в папку {folder_name} с ID: {folderid}.")
+        return results
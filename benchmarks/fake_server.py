@@ -0,0 +1,295 @@
+"""
+Локальная имитация VK API, CDN ВКонтакте, Яндекс.Диска и Google Drive для бенчмарков.
+
+Сервер отвечает на те же запросы, что и настоящие сервисы, в объеме, необходимом
+модулям проекта:
+- VK API: `utils.resolveScreenName`, `photos.get`, `photos.getById`, `execute` (по адресу `/method/<метод>`).
+- CDN ВКонтакте: `/photos/<owner_id>_<id>.jpg` - фотографии заданного размера.
+- Яндекс.Диск: создание папки (`PUT /v1/disk/resources`), получение ссылки для загрузки
+  (`GET /v1/disk/resources/upload`), загрузка по ссылке (`PUT /upload/...`), загрузка по URL
+  (`POST /v1/disk/resources/upload`) и статус операции (`GET /v1/disk/operations/<id>`).
+- Google Drive: загрузка файла (`POST /upload/drive/v2/files`), в том числе возобновляемая:
+  открытие сессии (`uploadType=resumable`) и передача частей (`PUT` с `Content-Range`).
+
+Параметры запуска задают задержку ответа, долю ответов с ошибкой 503, размер
+фотографий и количество фотографий у каждого пользователя. После запуска сервер
+печатает строку `PORT <номер порта>`.
+
+Запуск:
+    python benchmarks/fake_server.py --latency 0.02 --error-rate 0.01 --photo-size 500000
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+CHUNK_SIZE = 64 * 1024
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов локальной имитации сервисов."""
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    error_rate = 0.0
+    photo_size = 100 * 1024
+    photos_per_owner = 100
+    operations_lock = threading.Lock()
+    operations_count = 0
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    def send_json(self, data: Any, status: int = 200) -> None:
+        """
+        Отправляет JSON-ответ.
+
+        Args:
+            data (Any): Тело ответа.
+            status (int): HTTP-статус.
+        """
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self) -> bytes:
+        """
+        Читает тело запроса, в том числе переданное с Transfer-Encoding: chunked.
+
+        Returns:
+            bytes: Тело запроса. Для загрузок файлов содержимое не сохраняется,
+            возвращается пустая строка.
+        """
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            while True:
+                size = int(self.rfile.readline().strip() or b'0', 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return b''
+                self.rfile.read(size + 2)
+        length = int(self.headers.get('Content-Length') or 0)
+        if self.path.startswith('/upload'):
+            while length:
+                length -= len(self.rfile.read(min(length, CHUNK_SIZE)))
+            return b''
+        return self.rfile.read(length)
+
+    def before_request(self) -> bool:
+        """
+        Имитирует задержку и случайные ошибки сервиса.
+
+        Returns:
+            bool: True, если запрос нужно обработать, False - если уже отправлена ошибка 503.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        if random.random() < self.error_rate:
+            self.send_response(503)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return False
+        return True
+
+    def do_GET(self) -> None:
+        self.handle_request('GET')
+
+    def do_POST(self) -> None:
+        self.handle_request('POST')
+
+    def do_PUT(self) -> None:
+        self.handle_request('PUT')
+
+    def handle_request(self, method: str) -> None:
+        """
+        Обрабатывает запрос к любому из имитируемых сервисов.
+
+        Args:
+            method (str): HTTP-метод.
+        """
+        body = self.read_body()
+        if not self.before_request():
+            return
+        parsed = urllib.parse.urlsplit(self.path)
+        params = {key: values[0] for key, values in urllib.parse.parse_qs(parsed.query).items()}
+        if method == 'POST' and parsed.path.startswith('/method/'):
+            params.update({key: values[0] for key, values in urllib.parse.parse_qs(body.decode()).items()})
+        path = parsed.path
+
+        if path.startswith('/method/'):
+            self.send_json({'response': self.vk_method(path[len('/method/'):], params)})
+        elif path.startswith('/photos/'):
+            self.send_photo()
+        elif path.rstrip('/') == '/v1/disk/resources' and method == 'PUT':
+            self.send_json({'href': ''}, 201)
+        elif path == '/v1/disk/resources/upload' and method == 'GET':
+            host = self.headers['Host']
+            self.send_json({'href': f"http://{host}/upload/yandex/{urllib.parse.quote(params['path'])}",
+                            'method': 'PUT'})
+        elif path == '/v1/disk/resources/upload' and method == 'POST':
+            with self.operations_lock:
+                FakeHandler.operations_count += 1
+                operation_id = FakeHandler.operations_count
+            host = self.headers['Host']
+            self.send_json({'href': f'http://{host}/v1/disk/operations/{operation_id}', 'method': 'GET'}, 202)
+        elif path.startswith('/v1/disk/operations/'):
+            self.send_json({'status': 'success'})
+        elif path.startswith('/upload/yandex/'):
+            self.send_json({}, 201)
+        elif path.startswith('/upload/drive/') and method == 'POST' and params.get('uploadType') == 'resumable':
+            self.start_drive_session(path)
+        elif path.startswith('/upload/drive/') and method == 'PUT':
+            self.send_drive_chunk_result()
+        elif path.startswith('/upload/drive/'):
+            self.send_json({'id': f'file{random.randrange(10 ** 9)}'})
+        else:
+            self.send_json({'error': 'not found'}, 404)
+
+    def start_drive_session(self, path: str) -> None:
+        """
+        Открывает сессию возобновляемой загрузки Google Drive.
+
+        Args:
+            path (str): Путь запроса, к которому добавляется идентификатор сессии.
+        """
+        with self.operations_lock:
+            FakeHandler.operations_count += 1
+            upload_id = FakeHandler.operations_count
+        self.send_response(200)
+        self.send_header('Location', f"http://{self.headers['Host']}{path}?uploadType=resumable&upload_id={upload_id}")
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def send_drive_chunk_result(self) -> None:
+        """Отвечает на часть возобновляемой загрузки: 308 до последней части, затем данные файла."""
+        match = re.fullmatch(r'bytes (\d+)-(\d+)/(\d+)', self.headers.get('Content-Range', ''))
+        if match and int(match.group(2)) + 1 < int(match.group(3)):
+            self.send_response(308)
+            self.send_header('Range', f'bytes=0-{match.group(2)}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_json({'id': f'file{random.randrange(10 ** 9)}'})
+
+    def vk_method(self, method: str, params: Dict[str, Any]) -> Any:
+        """
+        Формирует поле `response` ответа метода VK API.
+
+        Args:
+            method (str): Имя метода.
+            params (Dict[str, Any]): Параметры метода.
+
+        Returns:
+            Any: Содержимое поля `response`.
+        """
+        if method == 'utils.resolveScreenName':
+            return {'object_id': abs(hash(params['screen_name'])) % 10 ** 8, 'type': 'user'}
+        if method == 'photos.get':
+            return self.photos_page(params)
+        if method == 'photos.getById':
+            owner_id, photo_id = str(params['photos']).split('_')
+            return [self.photo_item(int(owner_id), int(photo_id))] if int(photo_id) < self.photos_per_owner else []
+        if method == 'execute':
+            results = []
+            for api_method, api_params in re.findall(r'API\.([\w.]+)\((\{.*?\})\)', params['code']):
+                results.append(self.vk_method(api_method, json.loads(api_params)))
+            return results
+        return {}
+
+    def photos_page(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Формирует страницу ответа photos.get.
+
+        Args:
+            params (Dict[str, Any]): Параметры owner_id, offset и count.
+
+        Returns:
+            Dict[str, Any]: Общее количество фотографий и элементы страницы.
+        """
+        owner_id = int(params['owner_id'])
+        offset = int(params.get('offset', 0))
+        count = int(params.get('count', 50))
+        items = [self.photo_item(owner_id, photo_id)
+                 for photo_id in range(offset, min(offset + count, self.photos_per_owner))]
+        return {'count': self.photos_per_owner, 'items': items}
+
+    def photo_item(self, owner_id: int, photo_id: int) -> Dict[str, Any]:
+        """
+        Формирует элемент списка фотографий в ответах photos.get и photos.getById.
+
+        Args:
+            owner_id (int): ID владельца.
+            photo_id (int): ID фотографии.
+
+        Returns:
+            Dict[str, Any]: Элемент с датой, лайками и тремя вариантами размера.
+        """
+        url = f"http://{self.headers['Host']}/photos/{owner_id}_{photo_id}.jpg"
+        return {
+            'id': photo_id,
+            'owner_id': owner_id,
+            'date': 1600000000 + photo_id * 86400,
+            'likes': {'count': photo_id},
+            'sizes': [
+                {'type': 's', 'height': 75, 'width': 100, 'url': f'{url}?size=s'},
+                {'type': 'x', 'height': 453, 'width': 604, 'url': f'{url}?size=x'},
+                {'type': 'z', 'height': 960, 'width': 1280, 'url': url},
+            ]
+        }
+
+    def send_photo(self) -> None:
+        """Отправляет фотографию размера photo_size частями."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(self.photo_size))
+        self.end_headers()
+        chunk = b'\xff' * CHUNK_SIZE
+        remaining = self.photo_size
+        while remaining:
+            part = chunk[:min(remaining, CHUNK_SIZE)]
+            self.wfile.write(part)
+            remaining -= len(part)
+
+
+def serve(port: int = 0, latency: float = 0.0, error_rate: float = 0.0, photo_size: int = 100 * 1024,
+          photos_per_owner: int = 100) -> ThreadingHTTPServer:
+    """
+    Создает сервер имитации с заданными параметрами.
+
+    Args:
+        port (int): Порт, 0 - любой свободный.
+        latency (float): Задержка каждого ответа в секундах.
+        error_rate (float): Доля ответов с ошибкой 503.
+        photo_size (int): Размер фотографии в байтах.
+        photos_per_owner (int): Количество фотографий у каждого пользователя.
+
+    Returns:
+        ThreadingHTTPServer: Сервер, готовый к вызову serve_forever.
+    """
+    FakeHandler.latency = latency
+    FakeHandler.error_rate = error_rate
+    FakeHandler.photo_size = photo_size
+    FakeHandler.photos_per_owner = photos_per_owner
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeHandler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Локальная имитация VK, Яндекс.Диска и Google Drive')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help='задержка ответа в секундах')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='доля ответов 503')
+    parser.add_argument('--photo-size', type=int, default=100 * 1024, help='размер фотографии в байтах')
+    parser.add_argument('--photos', type=int, default=100, help='количество фотографий у пользователя')
+    args = parser.parse_args()
+    httpd = serve(args.port, args.latency, args.error_rate, args.photo_size, args.photos)
+    print(f'PORT {httpd.server_address[1]}', flush=True)
+    httpd.serve_forever()
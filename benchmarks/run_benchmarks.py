@@ -0,0 +1,296 @@
+"""
+Бенчмарки передачи фотографий на локальной имитации сервисов.
+
+Скрипт запускает `fake_server.py` в отдельном процессе и выполняет сценарии,
+каждый - в отдельном процессе, чтобы пиковое потребление памяти (RSS)
+измерялось независимо:
+- `download`: получение списка фотографий и скачивание через `DownloaderVK`.
+- `upload`: загрузка файлов на Яндекс.Диск через `UploaderYD.upload_many`.
+- `drive`: загрузка файлов в Google Drive через `UploaderGD.upload_file` (PyDrive и
+  google-api-python-client); OAuth-авторизация заменена токеном, а HTTP-объект
+  направляет запросы на имитацию.
+- `e2e`: конвейер `TransferPipeline` - скачивание, загрузка на Яндекс.Диск и локальная папка.
+
+Для каждого сценария выводятся пропускная способность (файлов и МБ в секунду),
+задержка обработки одного файла (p50/p99) и пиковый RSS.
+
+Запуск:
+    python benchmarks/run_benchmarks.py --photos 500 --photo-size 500000 --latency 0.02 --error-rate 0.01
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import request_scheduler  # noqa: E402
+import uploader_yd  # noqa: E402
+from downloader_vk import DownloaderVK  # noqa: E402
+
+SCENARIOS = ['download', 'upload', 'drive', 'e2e']
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Вычисляет перцентиль по ближайшему рангу.
+
+    Args:
+        values (List[float]): Значения.
+        fraction (float): Доля от 0 до 1, например 0.99.
+
+    Returns:
+        float: Значение перцентиля или 0, если значений нет.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def timed(latencies: List[float], function: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Оборачивает функцию, добавляя время каждого вызова в latencies.
+
+    Args:
+        latencies (List[float]): Список для времен вызовов.
+        function (Callable[..., Any]): Оборачиваемая функция.
+
+    Returns:
+        Callable[..., Any]: Обертка с тем же поведением.
+    """
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    return wrapper
+
+
+def make_payload(directory: str, size: int) -> str:
+    """
+    Создает файл-образец фотографии.
+
+    Args:
+        directory (str): Папка для файла.
+        size (int): Размер файла в байтах.
+
+    Returns:
+        str: Путь к файлу.
+    """
+    path = os.path.join(directory, 'payload.jpg')
+    with open(path, 'wb') as file:
+        file.write(b'\xff' * size)
+    return path
+
+
+def scenario_download(args: argparse.Namespace, workdir: str, latencies: List[float]) -> int:
+    downloader = DownloaderVK('token', '1', workdir, json_file=os.path.join(workdir, 'photos.json'))
+    records = list(downloader.name_photos(downloader.iter_photos(args.photos)))
+    download = timed(latencies, downloader.download_file)
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(lambda record: download(record[1]['url'], os.path.join(workdir, record[0])),
+                                    records))
+    return sum(written for written, _ in results)
+
+
+def scenario_upload(args: argparse.Namespace, workdir: str, latencies: List[float]) -> int:
+    payload = make_payload(workdir, args.photo_size)
+    uploader = uploader_yd.UploaderYD('token', 'bench')
+    uploader.folder_creation()
+    uploader.upload = timed(latencies, uploader.upload)
+    files = []
+    for number in range(args.photos):
+        files.append((f'{number}.jpg', open(payload, 'rb')))
+    try:
+        results = uploader.upload_many(files, workers=args.workers)
+    finally:
+        for _, file in files:
+            file.close()
+    return sum(results.values()) * args.photo_size
+
+
+def fake_drive(base_url: str) -> Any:
+    """
+    Создает объект GoogleDrive, который обращается к имитации вместо Google API.
+
+    Авторизация заменяется токеном без OAuth, а HTTP-объект перенаправляет
+    запросы PyDrive и google-api-python-client на адрес имитации.
+
+    Args:
+        base_url (str): Адрес имитации.
+
+    Returns:
+        GoogleDrive: Объект для `UploaderGD`.
+    """
+    import httplib2
+    from googleapiclient.discovery import build
+    from oauth2client.client import AccessTokenCredentials
+    from pydrive.auth import GoogleAuth
+    from pydrive.drive import GoogleDrive
+
+    class FakeServerHttp(httplib2.Http):
+        def __init__(self) -> None:
+            super().__init__(timeout=60)
+            self.redirect_codes = self.redirect_codes - {308}  # 308 - часть принята, а не перенаправление
+
+        def request(self, uri: str, *rest: Any, **kwargs: Any) -> Any:
+            parts = urllib.parse.urlsplit(uri)
+            uri = f"{base_url}{parts.path}{'?' + parts.query if parts.query else ''}"
+            return super().request(uri, *rest, **kwargs)
+
+    class FakeServerAuth(GoogleAuth):
+        def Get_Http_Object(self) -> Any:
+            return self.credentials.authorize(FakeServerHttp())
+
+    gauth = FakeServerAuth()
+    gauth.credentials = AccessTokenCredentials('token', 'benchmark')
+    gauth.http = gauth.Get_Http_Object()
+    gauth.service = build('drive', 'v2', http=gauth.http, cache_discovery=False)
+    return GoogleDrive(gauth)
+
+
+def scenario_drive(args: argparse.Namespace, workdir: str, latencies: List[float]) -> int:
+    import uploader_gd
+    from googleapiclient.errors import HttpError
+    from pydrive.files import ApiRequestError
+
+    payload = make_payload(workdir, args.photo_size)
+    uploader = uploader_gd.UploaderGD(fake_drive(args.base_url))
+    upload_file = timed(latencies, uploader.upload_file)
+
+    def upload(number: int) -> bool:
+        try:
+            upload_file('bench', payload, f'{number}.jpg')
+        except (ApiRequestError, HttpError):
+            return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(upload, range(args.photos)))
+    return sum(results) * args.photo_size
+
+
+def scenario_e2e(args: argparse.Namespace, workdir: str, latencies: List[float]) -> int:
+    import pipeline
+
+    downloader = DownloaderVK('token', '1', os.path.join(workdir, 'photos'),
+                              json_file=os.path.join(workdir, 'photos.json'))
+    started: Dict[str, float] = {}
+    lock = threading.Lock()
+    download_photo = downloader.download_photo
+
+    def download_started(photo: Dict[str, Any], file_path: str, *rest: Any) -> Any:
+        with lock:
+            started[file_path] = time.perf_counter()
+        return download_photo(photo, file_path, *rest)
+
+    class TimedYandexSink(pipeline.YandexSink):
+        def send(self, file_name: str, file_path: str, photo: Dict[str, Any]) -> bool:
+            try:
+                return super().send(file_name, file_path, photo)
+            finally:
+                with lock:
+                    latencies.append(time.perf_counter() - started[file_path])
+
+    downloader.download_photo = download_started
+    uploader = uploader_yd.UploaderYD('token', 'bench')
+    uploader.folder_creation()
+    sinks = [TimedYandexSink(uploader, from_file=True, workers=args.workers), pipeline.LocalSink()]
+    results = pipeline.TransferPipeline(downloader, sinks, download_workers=args.workers).run(args.photos)
+    return sum(results['yandex'].values()) * args.photo_size
+
+
+def run_scenario(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Выполняет один сценарий в текущем процессе.
+
+    Args:
+        args (argparse.Namespace): Параметры запуска.
+
+    Returns:
+        Dict[str, Any]: Результаты сценария.
+    """
+    request_scheduler.VK_API_URL = f'{args.base_url}/method'
+    uploader_yd.YD_API_URL = f'{args.base_url}/v1/disk'
+    scenario = globals()[f'scenario_{args.scenario}']
+    latencies: List[float] = []
+    workdir = tempfile.mkdtemp(prefix='bench_')
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            transferred = scenario(args, workdir, latencies)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'scenario': args.scenario,
+        'files': len(latencies),
+        'seconds': round(elapsed, 3),
+        'files_per_sec': round(len(latencies) / elapsed, 1),
+        'mb_per_sec': round(transferred / elapsed / 2 ** 20, 2),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Бенчмарки передачи фотографий')
+    parser.add_argument('--photos', type=int, default=200, help='количество фотографий')
+    parser.add_argument('--photo-size', type=int, default=200 * 1024, help='размер фотографии в байтах')
+    parser.add_argument('--latency', type=float, default=0.01, help='задержка ответа сервера в секундах')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='доля ответов 503')
+    parser.add_argument('--workers', type=int, default=8, help='количество потоков')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--output', help='файл для сохранения результатов в JSON')
+    parser.add_argument('--scenario', choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(args)))
+        return
+
+    server_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_server.py')
+    server = subprocess.Popen(
+        [sys.executable, server_script, '--latency', str(args.latency), '--error-rate', str(args.error_rate),
+         '--photo-size', str(args.photo_size), '--photos', str(args.photos)],
+        stdout=subprocess.PIPE, text=True
+    )
+    try:
+        port = int(server.stdout.readline().split()[1])
+        results = []
+        for scenario in args.scenarios:
+            command = [sys.executable, os.path.abspath(__file__), '--scenario', scenario,
+                       '--base-url', f'http://127.0.0.1:{port}', '--photos', str(args.photos),
+                       '--photo-size', str(args.photo_size), '--workers', str(args.workers)]
+            output = subprocess.run(command, stdout=subprocess.PIPE, text=True, check=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        server.terminate()
+        server.wait()
+
+    columns = ['scenario', 'files', 'seconds', 'files_per_sec', 'mb_per_sec', 'p50_ms', 'p99_ms', 'peak_rss_mb']
+    print(' '.join(f'{column:>13}' for column in columns))
+    for result in results:
+        print(' '.join(f'{result[column]!s:>13}' for column in columns))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
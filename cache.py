@@ -0,0 +1,239 @@
+"""
+Модуль для кэширования результатов запросов к VK API.
+
+Этот модуль предоставляет классы для запоминания результатов запросов, которые
+повторяются внутри одного запуска и между запусками: получение ID пользователя
+по screen_name и получение страниц списка фотографий.
+
+Классы модуля:
+- `MemoryCache`: Кэш в памяти процесса с временем жизни записей и вытеснением
+  давно не использованных записей при превышении количества.
+- `DiskCache`: Кэш на диске с временем жизни записей и вытеснением самых старых
+  файлов при превышении суммарного размера.
+- `LookupCache`: Двухуровневый кэш, который сначала проверяет память, затем диск.
+
+Основные методы:
+- `get`: Возвращает значение по ключу или None, если записи нет или она устарела.
+- `DiskCache.get_record`: Возвращает значение вместе со временем устаревания записи.
+- `set`: Сохраняет JSON-сериализуемое значение по ключу, при необходимости
+  с более коротким временем жизни.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+class MemoryCache:
+    """Класс кэша в памяти процесса."""
+    def __init__(self, ttl: float = 600.0, max_items: int = 1024) -> None:
+        """
+        Инициализирует кэш в памяти.
+
+        Args:
+            ttl (float): Время жизни записи в секундах.
+            max_items (int): Максимальное количество записей.
+        """
+        self.ttl = ttl
+        self.max_items = max_items
+        self.lock = threading.Lock()
+        self.items: 'OrderedDict[str, tuple]' = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Возвращает значение по ключу.
+
+        Args:
+            key (str): Ключ записи.
+
+        Returns:
+            Optional[Any]: Значение или None, если записи нет или она устарела.
+        """
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Сохраняет значение по ключу.
+
+        Args:
+            key (str): Ключ записи.
+            value (Any): Значение.
+            ttl (Optional[float]): Время жизни записи в секундах, не больше времени жизни кэша.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self.lock:
+            self.items[key] = (time.monotonic() + ttl, value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+
+class DiskCache:
+    """Класс кэша на диске."""
+    def __init__(self, directory: str = '.vk_cache', ttl: float = 3600.0, max_bytes: int = 50 * 2 ** 20) -> None:
+        """
+        Инициализирует кэш на диске, создавая папку при необходимости.
+
+        Args:
+            directory (str): Папка для файлов кэша.
+            ttl (float): Время жизни записи в секундах.
+            max_bytes (int): Максимальный суммарный размер файлов кэша в байтах.
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+    def path(self, key: str) -> str:
+        """
+        Возвращает путь к файлу записи.
+
+        Args:
+            key (str): Ключ записи.
+
+        Returns:
+            str: Путь к файлу в папке кэша.
+        """
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Возвращает значение по ключу.
+
+        Args:
+            key (str): Ключ записи.
+
+        Returns:
+            Optional[Any]: Значение или None, если записи нет или она устарела.
+        """
+        record = self.get_record(key)
+        return None if record is None else record[0]
+
+    def get_record(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Возвращает значение по ключу вместе со временем его устаревания.
+
+        Args:
+            key (str): Ключ записи.
+
+        Returns:
+            Optional[Tuple[Any, float]]: Значение и время устаревания по `time.time()`
+                или None, если записи нет или она устарела.
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'r') as file:
+                record = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if record['expires'] < time.time():
+            self.delete(path)
+            return None
+        return record['value'], record['expires']
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Сохраняет значение по ключу, вытесняя самые старые записи при превышении размера.
+
+        Args:
+            key (str): Ключ записи.
+            value (Any): JSON-сериализуемое значение.
+            ttl (Optional[float]): Время жизни записи в секундах, не больше времени жизни кэша.
+        """
+        path = self.path(key)
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        data = json.dumps({'expires': time.time() + ttl, 'value': value})
+        with self.lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(f'{path}.tmp', 'w') as file:
+                file.write(data)
+            os.replace(f'{path}.tmp', path)
+            self.size += os.path.getsize(path) - old_size
+            if self.size > self.max_bytes:
+                self.evict()
+
+    def delete(self, path: str) -> None:
+        """
+        Удаляет файл записи.
+
+        Args:
+            path (str): Путь к файлу записи.
+        """
+        with self.lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except FileNotFoundError:
+                return
+            self.size -= size
+
+    def evict(self) -> None:
+        """Удаляет самые старые файлы, пока размер кэша не станет меньше max_bytes."""
+        entries = sorted((entry for entry in os.scandir(self.directory) if entry.is_file()),
+                         key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            if self.size <= self.max_bytes:
+                break
+            size = entry.stat().st_size
+            os.remove(entry.path)
+            self.size -= size
+
+
+class LookupCache:
+    """Класс двухуровневого кэша: память процесса и, при наличии, диск."""
+    def __init__(self, disk: Optional[DiskCache] = None, memory: Optional[MemoryCache] = None) -> None:
+        """
+        Инициализирует двухуровневый кэш.
+
+        Args:
+            disk (Optional[DiskCache]): Кэш на диске, None - только память.
+            memory (Optional[MemoryCache]): Кэш в памяти, по умолчанию создается новый.
+        """
+        self.disk = disk
+        self.memory = memory or MemoryCache()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Возвращает значение по ключу из памяти или с диска.
+
+        Args:
+            key (str): Ключ записи.
+
+        Returns:
+            Optional[Any]: Значение или None, если записи нет ни на одном уровне.
+        """
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            record = self.disk.get_record(key)
+            if record is not None:
+                # В памяти запись живет не дольше, чем ей осталось на диске
+                value, expires = record
+                self.memory.set(key, value, max(0.0, expires - time.time()))
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Сохраняет значение на всех уровнях кэша.
+
+        Args:
+            key (str): Ключ записи.
+            value (Any): JSON-сериализуемое значение.
+            ttl (Optional[float]): Время жизни записи в секундах, None - время жизни каждого уровня.
+        """
+        self.memory.set(key, value, ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl)
@@ -8,143 +8,613 @@
 
 Класс `DownloaderVK` предлагает следующие функции:
 - Получение ID пользователя ВКонтакте из его имени.
-- Извлечение фотографий пользователя из его профиля.
+- Извлечение фотографий пользователя из его профиля или другого альбома.
+- Выбор варианта размера фотографии по правилу `SizePolicy` (по умолчанию - наибольший).
+- Пакетная обработка множества пользователей и альбомов через метод VK API execute.
 - Скачивание фотографий на локальный компьютер и сохранение их в указанной папке.
 
+Все запросы выполняются через `RequestScheduler`, который повторяет их при временных
+ошибках и соблюдает ограничение частоты VK API. Ошибки VK API передаются вызывающему
+коду в виде исключения `VKAPIError`.
+
 Основные методы:
 - `__init__`: Инициализирует экземпляр класса с токеном доступа и ID пользователя.
-- `get_id`: Получает ID пользователя ВКонтакте по его имени (screen_name).
+- `get_id`: Получает ID пользователя ВКонтакте по его имени (screen_name),
+  запоминая результат в кэше.
+- `get_ids`: Получает ID для набора screen_name пакетами через метод execute.
+- `iter_photos_many`: Перебирает фотографии нескольких пользователей и альбомов,
+  объединяя до 25 вызовов photos.get в один запрос execute и запоминая страницы в кэше.
+- `get_photo_by_id`: Получает запись о фотографии со свежим URL по ее идентификатору.
+- `iter_photos`: Постранично перебирает фотографии альбома, отдавая записи
+  о них по мере получения страниц.
+- `resolve_params`, `page_params`: Формируют параметры вызовов VK API; общие
+  с асинхронным `AsyncDownloaderVK`, как и `parse_photo`, `name_photos` и `json_record`.
+- `name_photos`: Назначает фотографиям имена файлов по количеству лайков и дате.
+- `get_photo_records`: Возвращает имена файлов вместе с полными записями о фотографиях.
 - `get_photos`: Запрашивает фотографии у пользователя, возвращая словарь с именами 
   файлов и соответствующими URL фотографий.
+- `download_file`: Скачивает одну фотографию, записывая ее на диск частями.
+- `download_photo`: Скачивает фотографию через хранилище с адресацией по содержимому,
+  пропуская уже сохраненные фотографии.
 - `download_to_pc`: Скачивает указанное количество фотографий на локальный компьютер 
-  в указанную папку, создавая ее при необходимости.
+  в указанную папку, создавая ее при необходимости. Загрузки могут выполняться
+  параллельно через общую keep-alive сессию, а уже скачанные фотографии
+  пропускаются при наличии манифеста.
 """
+import hashlib
 import requests
 import json
 import os
-import sys
 import json_dumper
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, Any
+from manifest import Manifest, STATUS_DONE, STATUS_FAILED
+from photo_store import PhotoStore
+from photo_policy import SizePolicy
+from cache import LookupCache
+from instrumentation import get_instrumentation
+from request_scheduler import RequestScheduler, get_default_scheduler
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+PAGE_SIZE = 1000  # Максимальное значение count для photos.get
+EXECUTE_LIMIT = 25  # Максимальное количество вызовов API в одном запросе execute
+CHUNK_SIZE = 64 * 1024  # Размер части при потоковой записи фотографии на диск
+PAGE_CACHE_TTL = 600.0  # Время жизни страниц photos.get в кэше: ссылки на фотографии подписаны и со временем истекают
 
 class DownloaderVK:
     """Класс для работы с фотографиями из ВКонтакте"""
-    def __init__(self, vk_token: str, vk_id: str, folder_name=None) -> None:
+    lookup_cache = LookupCache()  # Общий для процесса кэш ID и страниц списка фотографий
+
+    def __init__(self, vk_token: str, vk_id: str, folder_name=None, json_file: str = 'photos.json',
+                 scheduler: Optional[RequestScheduler] = None, cache: Optional[LookupCache] = None,
+                 size_policy: Optional[SizePolicy] = None) -> None:
         """
         Инициализирует экземпляр DownloaderVK.
 
         Args:
             vk_token (str): Токен доступа к VK API.
             vk_id (str): ID пользователя или сообщества VK.
+            folder_name (str): Имя папки для скачивания фотографий.
+            json_file (str): Путь к JSON-файлу со сведениями о фотографиях.
+            scheduler (Optional[RequestScheduler]): Планировщик запросов, по умолчанию общий для процесса.
+            cache (Optional[LookupCache]): Кэш страниц списка фотографий, по умолчанию `lookup_cache`.
+            size_policy (Optional[SizePolicy]): Правило выбора размера, по умолчанию - наибольший вариант.
         """
         self.vk_token = vk_token
         self.vk_id = vk_id
         self.folder_name = folder_name
+        self.json_file = json_file
+        self.scheduler = scheduler or get_default_scheduler()
+        self.cache = cache or self.lookup_cache
+        self.size_policy = size_policy
 
     @classmethod
-    def get_id(cls, screen_name: str, vk_token: str) -> str:
+    def get_id(cls, screen_name: str, vk_token: str, scheduler: Optional[RequestScheduler] = None,
+               cache: Optional[LookupCache] = None) -> str:
         """
         Получает ID из screen_name.
 
+        Результат запоминается в кэше, поэтому повторные вызовы для того же
+        screen_name не обращаются к VK API.
+
         Args:
             screen_name (str): Имя пользователя или идентификатор.
             vk_token (str): Токен доступа к VK API.
+            scheduler (Optional[RequestScheduler]): Планировщик запросов, по умолчанию общий для процесса.
+            cache (Optional[LookupCache]): Кэш, по умолчанию `lookup_cache`.
 
         Returns:
             str: ID пользователя VK.
+
+        Raises:
+            VKAPIError: Если VK API вернул ошибку.
         """
+        cache = cache or cls.lookup_cache
         if screen_name.isdigit():
             vk_id = screen_name
         else:
-            url = 'https://api.vk.com/method/utils.resolveScreenName'
-            params = {
-                'screen_name': screen_name,
-                'access_token': vk_token,
-                'v': '5.131'
-            }
-            response = requests.get(url=url, params=params).json()
-            vk_id = response['response']['object_id']
+            cache_key = cls.id_cache_key(screen_name, vk_token)
+            vk_id = cache.get(cache_key)
+            if vk_id is None:
+                params = cls.resolve_params(screen_name, vk_token)
+                response = (scheduler or get_default_scheduler()).vk_api('utils.resolveScreenName', params)
+                vk_id = response['object_id']
+                cache.set(cache_key, vk_id)
         return vk_id
 
-    def get_photos(self, count: int = 5, offset: int = 0) -> Dict[str, str]:
+    @staticmethod
+    def resolve_params(screen_name: str, vk_token: str) -> Dict[str, Any]:
         """
-        Получает фотографии пользователя из VK.
+        Формирует параметры вызова utils.resolveScreenName.
 
         Args:
-            count (int): Количество фотографий для получения.
-            offset (int): Смещение для постраничного получения.
+            screen_name (str): Имя пользователя.
+            vk_token (str): Токен доступа к VK API.
 
         Returns:
-            Dict[str, str]: Словарь с именами файлов и URL фотографий.
+            Dict[str, Any]: Параметры метода.
         """
-        url = 'https://api.vk.com/method/photos.get'
-        params = {
-            'owner_id': self.vk_id,
-            'album_id': 'profile',
-            'access_token': self.vk_token,
-            'v': '5.131',
+        return {'screen_name': screen_name, 'access_token': vk_token}
+
+    @staticmethod
+    def page_params(vk_id: str, vk_token: str, album_id: str, offset: int, count: int) -> Dict[str, Any]:
+        """
+        Формирует параметры вызова photos.get для одной страницы альбома.
+
+        Args:
+            vk_id (str): ID владельца.
+            vk_token (str): Токен доступа к VK API.
+            album_id (str): Альбом: 'profile', 'wall', 'saved' или ID альбома.
+            offset (int): Смещение страницы.
+            count (int): Размер страницы.
+
+        Returns:
+            Dict[str, Any]: Параметры метода.
+        """
+        return {
+            'owner_id': vk_id,
+            'album_id': album_id,
+            'access_token': vk_token,
             'extended': '1',
             'photo_sizes': '1',
             'count': count,
             'offset': offset
         }
-        response = requests.get(url=url, params=params)
-        if 'error' in response.json():
-            print('Во время загрузки произошла ошибка.\nВозможно, пользователь заблокирован, удалён или ещё не создан.\nУбедитесь в правильности введённых данных и удостоверьтесь, что альбом не защищён настройками приватности.')
-            sys.exit()
 
-        json_dump = json_dumper.DumpJSON()
-        json_dump.create_json()
+    @staticmethod
+    def execute_code(calls: List[Tuple[str, Dict[str, Any]]]) -> str:
+        """
+        Формирует код VKScript для метода execute.
+
+        Args:
+            calls (List[Tuple[str, Dict[str, Any]]]): Пары (метод API, параметры), не более 25.
+
+        Returns:
+            str: Код, возвращающий массив результатов вызовов в том же порядке.
+        """
+        api_calls = ','.join(f'API.{method}({json.dumps(params, ensure_ascii=False)})' for method, params in calls)
+        return f'return [{api_calls}];'
 
-        photo_dict = {}
-        all_photos_info = response.json()
-        total_photos = len(all_photos_info['response']['items'])
+    @classmethod
+    def get_ids(cls, screen_names: Iterable[str], vk_token: str, scheduler: Optional[RequestScheduler] = None,
+                cache: Optional[LookupCache] = None) -> Dict[str, str]:
+        """
+        Получает ID для набора screen_name, объединяя запросы через метод execute.
+
+        Args:
+            screen_names (Iterable[str]): Имена пользователей или идентификаторы.
+            vk_token (str): Токен доступа к VK API.
+            scheduler (Optional[RequestScheduler]): Планировщик запросов, по умолчанию общий для процесса.
+            cache (Optional[LookupCache]): Кэш, по умолчанию `lookup_cache`.
 
-        for i in range(total_photos):
-            max_height = 0
-            photo_url = ''
-            size = ''
+        Returns:
+            Dict[str, str]: Словарь screen_name -> ID. Имена, которые не удалось найти, пропускаются.
+
+        Raises:
+            VKAPIError: Если VK API вернул ошибку.
+        """
+        scheduler = scheduler or get_default_scheduler()
+        cache = cache or cls.lookup_cache
+        vk_ids = {}
+        names = []
+        for screen_name in screen_names:
+            if screen_name.isdigit():
+                vk_ids[screen_name] = screen_name
+            elif cache.get(cls.id_cache_key(screen_name, vk_token)) is not None:
+                vk_ids[screen_name] = str(cache.get(cls.id_cache_key(screen_name, vk_token)))
+            elif screen_name not in names:
+                names.append(screen_name)
+
+        for start in range(0, len(names), EXECUTE_LIMIT):
+            batch = names[start:start + EXECUTE_LIMIT]
+            code = cls.execute_code([('utils.resolveScreenName', {'screen_name': name}) for name in batch])
+            results = scheduler.vk_api('execute', {'code': code, 'access_token': vk_token}, post=True)
+            for screen_name, result in zip(batch, results):
+                if result and 'object_id' in result:
+                    vk_ids[screen_name] = str(result['object_id'])
+                    cache.set(cls.id_cache_key(screen_name, vk_token), result['object_id'])
+                else:
+                    print(f'Не удалось найти пользователя {screen_name}')
+        return vk_ids
+
+    @staticmethod
+    def token_key(vk_token: str) -> str:
+        """
+        Возвращает хэш токена для ключей кэша.
+
+        Ответы VK API зависят от прав токена (например, закрытые альбомы),
+        поэтому записи разных токенов хранятся под разными ключами, а сам
+        токен в кэш не попадает.
+
+        Args:
+            vk_token (str): Токен доступа к VK API.
+
+        Returns:
+            str: Первые 16 символов SHA-256 токена.
+        """
+        return hashlib.sha256(vk_token.encode()).hexdigest()[:16]
+
+    @classmethod
+    def id_cache_key(cls, screen_name: str, vk_token: str) -> str:
+        """
+        Возвращает ключ ID пользователя в кэше.
+
+        Args:
+            screen_name (str): Имя пользователя.
+            vk_token (str): Токен доступа к VK API.
+
+        Returns:
+            str: Ключ вида `id:<хэш токена>:<имя>`.
+        """
+        return f'id:{cls.token_key(vk_token)}:{screen_name}'
+
+    @classmethod
+    def page_cache_key(cls, vk_id: str, vk_token: str, album_id: str, offset: int, count: int) -> str:
+        """
+        Возвращает ключ страницы списка фотографий в кэше.
+
+        Args:
+            vk_id (str): ID владельца.
+            vk_token (str): Токен доступа к VK API.
+            album_id (str): Альбом.
+            offset (int): Смещение страницы.
+            count (int): Размер страницы.
+
+        Returns:
+            str: Ключ вида `photos.get:<хэш токена>:<владелец>:<альбом>:<смещение>:<размер>`.
+        """
+        return f'photos.get:{cls.token_key(vk_token)}:{vk_id}:{album_id}:{offset}:{count}'
+
+    @classmethod
+    def iter_photos_many(cls, targets: Iterable[Tuple[str, str]], vk_token: str, count: Optional[int] = None,
+                         page_size: int = PAGE_SIZE, scheduler: Optional[RequestScheduler] = None,
+                         size_policy: Optional[SizePolicy] = None,
+                         cache: Optional[LookupCache] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Перебирает фотографии нескольких пользователей и альбомов через метод execute.
+
+        В одном запросе execute объединяется до 25 вызовов photos.get. Сначала
+        запрашиваются первые страницы всех альбомов, затем - оставшиеся страницы.
+        Страницы запоминаются в кэше под теми же ключами, что и в `iter_photos`,
+        поэтому последующий перебор альбома тем же размером страницы не обращается к VK API.
+
+        Args:
+            targets (Iterable[Tuple[str, str]]): Пары (ID владельца, альбом), где альбом -
+                'profile', 'wall', 'saved' или ID альбома.
+            vk_token (str): Токен доступа к VK API.
+            count (Optional[int]): Максимальное количество фотографий из каждого альбома, None - все.
+            page_size (int): Размер страницы (не более 1000 - ограничение VK API).
+            scheduler (Optional[RequestScheduler]): Планировщик запросов, по умолчанию общий для процесса.
+            size_policy (Optional[SizePolicy]): Правило выбора размера, по умолчанию - наибольший вариант.
+            cache (Optional[LookupCache]): Кэш страниц, по умолчанию `lookup_cache`.
+
+        Yields:
+            Dict[str, Any]: Запись о фотографии, как в `iter_photos`.
+
+        Raises:
+            VKAPIError: Если VK API вернул ошибку для всего запроса execute.
+        """
+        scheduler = scheduler or get_default_scheduler()
+        cache = cache or cls.lookup_cache
+        page_size = min(page_size, PAGE_SIZE)
+        limit = page_size if count is None else min(page_size, count)
+        pending = [(str(owner_id), str(album_id), 0, limit) for owner_id, album_id in targets]
+
+        while pending:
+            batch, pending = pending[:EXECUTE_LIMIT], pending[EXECUTE_LIMIT:]
+            calls = [
+                ('photos.get', {
+                    'owner_id': owner_id,
+                    'album_id': album_id,
+                    'extended': 1,
+                    'photo_sizes': 1,
+                    'count': page_count,
+                    'offset': offset
+                })
+                for owner_id, album_id, offset, page_count in batch
+            ]
+            results = scheduler.vk_api(
+                'execute', {'code': cls.execute_code(calls), 'access_token': vk_token}, post=True
+            )
+            for (owner_id, album_id, offset, page_count), result in zip(batch, results):
+                if not result:
+                    print(f'Не удалось получить фотографии альбома {album_id} пользователя {owner_id}')
+                    continue
+                cache.set(cls.page_cache_key(owner_id, vk_token, album_id, offset, page_count), result,
+                          PAGE_CACHE_TTL)
+                for item in result['items']:
+                    yield cls.parse_photo(item, size_policy)
+                if offset == 0:
+                    total = result['count'] if count is None else min(result['count'], count)
+                    for next_offset in range(len(result['items']), total, page_size):
+                        pending.append((owner_id, album_id, next_offset, min(page_size, total - next_offset)))
+
+    @classmethod
+    def get_photo_by_id(cls, owner_id: str, photo_id: str, vk_token: str,
+                        scheduler: Optional[RequestScheduler] = None,
+                        size_policy: Optional[SizePolicy] = None) -> Optional[Dict[str, Any]]:
+        """
+        Получает запись о фотографии по ее идентификатору через photos.getById.
+
+        Ответ не кэшируется: метод нужен, чтобы получить свежий URL вместо
+        подписанной ссылки, срок действия которой мог истечь.
+
+        Args:
+            owner_id (str): ID владельца фотографии.
+            photo_id (str): ID фотографии.
+            vk_token (str): Токен доступа к VK API.
+            scheduler (Optional[RequestScheduler]): Планировщик запросов, по умолчанию общий для процесса.
+            size_policy (Optional[SizePolicy]): Правило выбора размера, по умолчанию - наибольший вариант.
+
+        Returns:
+            Optional[Dict[str, Any]]: Запись о фотографии, как в `iter_photos`, или None,
+            если фотография удалена или недоступна.
 
-            for photo in all_photos_info['response']['items'][i]['sizes']:
+        Raises:
+            VKAPIError: Если VK API вернул ошибку.
+        """
+        params = {
+            'photos': f'{owner_id}_{photo_id}',
+            'extended': '1',
+            'photo_sizes': '1',
+            'access_token': vk_token
+        }
+        items = (scheduler or get_default_scheduler()).vk_api('photos.getById', params)
+        return cls.parse_photo(items[0], size_policy) if items else None
+
+    def iter_photos(self, count: Optional[int] = None, offset: int = 0,
+                    page_size: int = PAGE_SIZE, album_id: str = 'profile') -> Iterator[Dict[str, Any]]:
+        """
+        Постранично перебирает фотографии пользователя из VK.
+
+        Страницы запрашиваются по мере потребления генератора, поэтому
+        обработка первой страницы может начаться до загрузки следующей.
+        Полученные страницы запоминаются в кэше.
+
+        Args:
+            count (Optional[int]): Максимальное количество фотографий, None - все фотографии альбома.
+            offset (int): Смещение первой фотографии.
+            page_size (int): Размер страницы (не более 1000 - ограничение VK API).
+            album_id (str): Альбом: 'profile', 'wall', 'saved' или ID альбома.
+
+        Yields:
+            Dict[str, Any]: Запись о фотографии: id, url, likes, date и size.
+
+        Raises:
+            VKAPIError: Если VK API вернул ошибку, например альбом закрыт настройками приватности.
+        """
+        page_size = min(page_size, PAGE_SIZE)
+        received = 0
+        while count is None or received < count:
+            params = self.page_params(self.vk_id, self.vk_token, album_id, offset + received,
+                                      page_size if count is None else min(page_size, count - received))
+            cache_key = self.page_cache_key(self.vk_id, self.vk_token, album_id, params['offset'], params['count'])
+            response = self.cache.get(cache_key)
+            if response is None:
+                response = self.scheduler.vk_api('photos.get', params)
+                self.cache.set(cache_key, response, PAGE_CACHE_TTL)
+
+            items = response['items']
+            for item in items:
+                yield self.parse_photo(item, self.size_policy)
+            received += len(items)
+
+            if not items or offset + received >= response['count']:
+                break
+
+    @staticmethod
+    def parse_photo(item: Dict[str, Any], size_policy: Optional[SizePolicy] = None) -> Dict[str, Any]:
+        """
+        Формирует запись о фотографии из элемента ответа photos.get.
+
+        Args:
+            item (Dict[str, Any]): Элемент списка items из ответа VK API.
+            size_policy (Optional[SizePolicy]): Правило выбора размера, None - максимальный размер.
+
+        Returns:
+            Dict[str, Any]: Запись с URL фотографии выбранного размера, лайками, датой и типом размера.
+        """
+        max_height = 0
+        photo_url = ''
+        size = ''
+
+        if size_policy is not None:
+            chosen = size_policy.choose(item['sizes'])
+            photo_url = chosen['url']
+            size = chosen['type']
+        else:
+            for photo in item['sizes']:
                 if photo['height'] >= max_height:
                     max_height = photo['height']
                     photo_url = photo['url']
                     size = photo['type']
 
-            likes_count = all_photos_info['response']['items'][i]['likes']['count']
-
-            if f"{likes_count}.jpg" not in photo_dict:
-                photo_dict[f"{likes_count}.jpg"] = photo_url
-                data = {
-                    "file_name": f"{likes_count}.jpg",
-                    "size": size
-                }
-                json_dump.add_to_json(data)
-            else:
-                unix_time = all_photos_info['response']['items'][i]['date']
-                dt = datetime.utcfromtimestamp(unix_time)
-                new_file_name = f"{likes_count}_{dt.day}.{dt.month}.{dt.year}.jpg"
-                photo_dict[new_file_name] = photo_url
-                data = {
-                    "file_name": f"{likes_count}.jpg",
-                    "size": size
-                }
-                json_dump.add_to_json(data)
-
-        return photo_dict
-
-    def download_to_pc(self, count: int) -> None:
+        return {
+            'id': item['id'],
+            'owner_id': item['owner_id'],
+            'url': photo_url,
+            'likes': item['likes']['count'],
+            'date': item['date'],
+            'size': size
+        }
+
+    @staticmethod
+    def json_record(photo: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Формирует запись о фотографии для JSON-файла со сведениями о фотографиях.
+
+        Args:
+            photo (Dict[str, Any]): Запись о фотографии.
+
+        Returns:
+            Dict[str, Any]: Имя файла по количеству лайков и тип размера.
+        """
+        return {"file_name": f"{photo['likes']}.jpg", "size": photo['size']}
+
+    @staticmethod
+    def name_photos(photos: Iterable[Dict[str, Any]]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Назначает фотографиям имена файлов по количеству лайков.
+
+        Если имя уже занято, к нему добавляется дата публикации фотографии.
+
+        Args:
+            photos (Iterable[Dict[str, Any]]): Записи о фотографиях.
+
+        Yields:
+            Tuple[str, Dict[str, Any]]: Имя файла и запись о фотографии.
+        """
+        used_names = set()
+        for photo in photos:
+            likes_count = photo['likes']
+            file_name = f"{likes_count}.jpg"
+            if file_name in used_names:
+                dt = datetime.utcfromtimestamp(photo['date'])
+                file_name = f"{likes_count}_{dt.day}.{dt.month}.{dt.year}.jpg"
+            used_names.add(file_name)
+            yield file_name, photo
+
+    def get_photo_records(self, count: int = 5, offset: int = 0) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Получает фотографии пользователя из VK вместе с полными записями о них.
+
+        Сведения о фотографиях сохраняются в JSON-файл.
+
+        Args:
+            count (int): Количество фотографий для получения.
+            offset (int): Смещение для постраничного получения.
+
+        Returns:
+            List[Tuple[str, Dict[str, Any]]]: Пары из имени файла и записи о фотографии.
+        """
+        records = []
+        with json_dumper.StreamJSON(self.json_file) as json_dump:
+            for file_name, photo in self.name_photos(self.iter_photos(count, offset)):
+                records.append((file_name, photo))
+                json_dump.add(self.json_record(photo))
+
+        return records
+
+    def get_photos(self, count: int = 5, offset: int = 0) -> Dict[str, str]:
+        """
+        Получает фотографии пользователя из VK.
+
+        Args:
+            count (int): Количество фотографий для получения.
+            offset (int): Смещение для постраничного получения.
+
+        Returns:
+            Dict[str, str]: Словарь с именами файлов и URL фотографий.
+        """
+        return {file_name: photo['url'] for file_name, photo in self.get_photo_records(count, offset)}
+
+    def download_file(self, photo_url: str, file_path: str) -> Tuple[int, str]:
+        """
+        Скачивает одну фотографию, записывая ответ на диск частями.
+
+        Данные сначала пишутся во временный файл `.part`, который переименовывается
+        только после успешного завершения загрузки, а при ошибке удаляется.
+
+        Args:
+            photo_url (str): URL фотографии.
+            file_path (str): Путь к файлу для сохранения.
+
+        Returns:
+            Tuple[int, str]: Количество записанных байт и SHA-256 содержимого.
+        """
+        written = 0
+        digest = hashlib.sha256()
+        part_path = f'{file_path}.part'
+        try:
+            with self.scheduler.get(photo_url, kind='vk_cdn', stream=True) as image:
+                image.raise_for_status()
+                with open(part_path, 'wb') as file:
+                    for chunk in image.iter_content(chunk_size=CHUNK_SIZE):
+                        file.write(chunk)
+                        digest.update(chunk)
+                        written += len(chunk)
+                self.scheduler.finish(image, written)
+            os.replace(part_path, file_path)
+        finally:
+            if os.path.exists(part_path):  # Загрузка прервана - недокачанный файл не оставляем
+                os.remove(part_path)
+        return written, digest.hexdigest()
+
+    def download_photo(self, photo: Dict[str, Any], file_path: str,
+                       store: Optional[PhotoStore] = None) -> Tuple[int, str]:
+        """
+        Скачивает фотографию в файл, при наличии хранилища - через него.
+
+        Если фотография уже есть в хранилище, она не скачивается: по пути
+        file_path создается ссылка на хранимый файл.
+
+        Args:
+            photo (Dict[str, Any]): Запись о фотографии.
+            file_path (str): Путь к файлу для сохранения.
+            store (Optional[PhotoStore]): Хранилище с адресацией по содержимому.
+
+        Returns:
+            Tuple[int, str]: Количество скачанных байт (0, если фотография уже была в хранилище)
+            и SHA-256 содержимого.
+        """
+        with get_instrumentation().span('download', file=os.path.basename(file_path), size=photo['size']):
+            if store is None:
+                return self.download_file(photo['url'], file_path)
+
+            sha256 = store.lookup(photo)
+            written = 0
+            if sha256 is None:
+                temp_path = store.temp_path()
+                written, sha256 = self.download_file(photo['url'], temp_path)
+                store.ingest(temp_path, sha256)
+                store.add(photo, sha256)
+            store.link(sha256, file_path)
+            return written, sha256
+
+    def download_to_pc(self, count: int, workers: int = 1, manifest: Optional[Manifest] = None,
+                       store: Optional[PhotoStore] = None) -> None:
         """
         Скачивает фотографии на локальный компьютер.
 
         Args:
             count (int): Количество фотографий для скачивания.
+            workers (int): Количество одновременных загрузок.
+            manifest (Optional[Manifest]): Манифест для пропуска уже скачанных фотографий.
+            store (Optional[PhotoStore]): Хранилище для пропуска уже сохраненных фотографий.
         """
         if not os.path.exists(self.folder_name):
             os.mkdir(self.folder_name)  # Создаем папку для скачивания
 
-        for counter, (file_name, photo_url) in enumerate(self.get_photos(count).items(), start=1):
-            with open(f'{self.folder_name}/{file_name}', 'wb') as file:
-                image = requests.get(photo_url)
-                file.write(image.content)
-                print(f'Скачано {counter} фото из VK, файл: {file_name}')
\ No newline at end of file
+        photos = []
+        with get_instrumentation().span('enumerate', count=count):
+            records = self.get_photo_records(count)
+        for file_name, photo in records:
+            file_path = f'{self.folder_name}/{file_name}'
+            if manifest is not None:
+                key = manifest.photo_key(photo)
+                manifest.add_photo(photo, file_name)
+                local_path, _ = manifest.get_local(key)
+                if local_path == file_path and os.path.exists(file_path):
+                    print(f'Файл {file_name} уже скачан, пропускаем')
+                    continue
+            photos.append((file_name, file_path, photo))
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                executor.submit(self.download_photo, photo, file_path, store): (file_name, file_path, photo)
+                for file_name, file_path, photo in photos
+            }
+            for counter, future in enumerate(as_completed(futures), start=1):
+                file_name, file_path, photo = futures[future]
+                try:
+                    _, sha256 = future.result()
+                except requests.RequestException as error:
+                    print(f'Ошибка при скачивании файла {file_name}: {error}')
+                    if manifest is not None:
+                        manifest.set_status(manifest.photo_key(photo), 'local', STATUS_FAILED)
+                    continue
+                if manifest is not None:
+                    key = manifest.photo_key(photo)
+                    manifest.set_local(key, file_path, sha256)
+                    manifest.set_status(key, 'local', STATUS_DONE)
+                print(f'Скачано {counter} фото из VK, файл: {file_name}')
@@ -0,0 +1,367 @@
+"""
+Модуль для измерения времени работы программы.
+
+Этот модуль предоставляет класс `Instrumentation`, который собирает сведения
+о каждом HTTP-запросе и о стадиях передачи фотографий:
+- Для запроса: вид запроса (`vk_api`, `vk_cdn`, `yandex_api`, `yandex_upload`,
+  `gdrive`), время разрешения имени (DNS), установки соединения, TLS-рукопожатия,
+  ожидания первого байта ответа (TTFB, включает отправку тела запроса), получения
+  тела ответа, количество отправленных и полученных байт, статус и число попыток.
+- Для стадии (span): название, атрибуты, поток, время начала и длительность.
+
+Собранные данные сохраняются в JSON-файл трассировки в формате Trace Event
+(открывается в chrome://tracing или https://ui.perfetto.dev) и/или в текстовый
+файл метрик в формате Prometheus. Дополнительно можно включить профилирование
+cProfile всех потоков.
+
+По умолчанию измерения выключены и почти ничего не стоят. Модули проекта
+получают текущий объект через `get_instrumentation`, а включает измерения
+`set_instrumentation(Instrumentation())`.
+
+Основные методы:
+- `span`: Контекстный менеджер для измерения стадии.
+- `begin_request`, `end_request`: Начало и завершение измерения HTTP-запроса.
+- `instrument_http`: Добавляет измерения к объекту httplib2.Http (Google Drive).
+- `write_trace`: Сохраняет трассировку в JSON-файл.
+- `write_prometheus`: Сохраняет метрики в формате Prometheus.
+- `profile`: Контекстный менеджер для профилирования cProfile.
+"""
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import urllib.parse
+from typing import Any, Dict, Iterator, List, Optional
+
+PHASES = ['dns', 'connect', 'tls', 'ttfb', 'transfer']
+DURATION_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]  # Границы гистограммы в секундах
+METRIC_PREFIX = 'vk_backup'
+
+_local = threading.local()
+
+
+def current_request() -> Optional[Dict[str, Any]]:
+    """
+    Возвращает измеряемый в текущем потоке HTTP-запрос.
+
+    Returns:
+        Optional[Dict[str, Any]]: Запись о запросе или None, если измерения выключены.
+    """
+    return getattr(_local, 'request', None)
+
+
+def body_size(data: Any) -> int:
+    """
+    Определяет размер тела запроса без его чтения.
+
+    Args:
+        data (Any): Тело запроса: байты, memoryview, строка или файловый объект.
+
+    Returns:
+        int: Размер в байтах или 0, если его нельзя определить.
+    """
+    if data is None:
+        return 0
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    if isinstance(data, memoryview):
+        return data.nbytes
+    if isinstance(data, str):
+        return len(data.encode())
+    if hasattr(data, 'fileno') and hasattr(data, 'tell'):
+        try:
+            return os.fstat(data.fileno()).st_size - data.tell()
+        except (OSError, ValueError):
+            return 0
+    return 0
+
+
+class Instrumentation:
+    """Класс для сбора измерений HTTP-запросов и стадий."""
+    def __init__(self, enabled: bool = True) -> None:
+        """
+        Инициализирует сборщик измерений.
+
+        Args:
+            enabled (bool): Собирать ли измерения.
+        """
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.requests: List[Dict[str, Any]] = []
+        self.spans: List[Dict[str, Any]] = []
+        self.origin = time.perf_counter()
+
+    def now(self) -> float:
+        """Возвращает время в секундах от создания сборщика."""
+        return time.perf_counter() - self.origin
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[None]:
+        """
+        Измеряет стадию, например скачивание одного файла.
+
+        HTTP-запросы, выполненные внутри стадии, помечаются ее названием.
+
+        Args:
+            name (str): Название стадии.
+            **attrs: Атрибуты стадии, например имя файла.
+        """
+        if not self.enabled:
+            yield
+            return
+        parent = getattr(_local, 'span', None)
+        _local.span = name
+        start = self.now()
+        try:
+            yield
+        finally:
+            _local.span = parent
+            record = {'name': name, 'start': start, 'duration': self.now() - start,
+                      'thread': threading.get_ident(), 'attrs': attrs}
+            with self.lock:
+                self.spans.append(record)
+
+    def begin_request(self, method: str, url: str, kind: Optional[str] = None,
+                      bytes_sent: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Начинает измерение HTTP-запроса в текущем потоке.
+
+        Args:
+            method (str): HTTP-метод.
+            url (str): URL запроса. Параметры запроса (в том числе токены) не сохраняются.
+            kind (Optional[str]): Вид запроса, по умолчанию - имя хоста.
+            bytes_sent (int): Размер тела запроса.
+
+        Returns:
+            Optional[Dict[str, Any]]: Запись о запросе или None, если измерения выключены.
+        """
+        if not self.enabled:
+            return None
+        parts = urllib.parse.urlsplit(url)
+        record = {
+            'kind': kind or parts.hostname or '',
+            'method': method,
+            'url': f'{parts.scheme}://{parts.netloc}{parts.path}',
+            'span': getattr(_local, 'span', None),
+            'thread': threading.get_ident(),
+            'start': self.now(),
+            'status': None,
+            'attempts': 0,
+            'new_connections': 0,
+            'bytes_sent': bytes_sent,
+            'bytes_received': 0,
+            'wait': 0.0,
+            **{phase: 0.0 for phase in PHASES},
+        }
+        _local.request = record
+        return record
+
+    def end_request(self, record: Optional[Dict[str, Any]], status: Optional[int] = None,
+                    bytes_received: int = 0) -> None:
+        """
+        Завершает измерение HTTP-запроса.
+
+        Args:
+            record (Optional[Dict[str, Any]]): Запись из `begin_request`.
+            status (Optional[int]): HTTP-статус ответа, None - ошибка соединения.
+            bytes_received (int): Размер тела ответа.
+        """
+        if record is None:
+            return
+        if getattr(_local, 'request', None) is record:
+            _local.request = None
+        record['status'] = status if status is not None else record['status']
+        record['bytes_received'] += bytes_received
+        record['duration'] = self.now() - record['start']
+        with self.lock:
+            self.requests.append(record)
+
+    def instrument_http(self, http: Any, kind: str) -> Any:
+        """
+        Добавляет измерения к объекту httplib2.Http, через который работает Google Drive.
+
+        httplib2 не сообщает время соединения, поэтому для этих запросов
+        измеряется только время до получения ответа и размеры тел.
+
+        Args:
+            http (Any): Объект httplib2.Http.
+            kind (str): Вид запросов.
+
+        Returns:
+            Any: Тот же объект.
+        """
+        if not self.enabled:
+            return http
+        request = http.request
+
+        def timed_request(uri: str, method: str = 'GET', body: Any = None, *args: Any, **kwargs: Any) -> Any:
+            record = self.begin_request(method, uri, kind, body_size(body))
+            record['attempts'] = 1
+            start = time.perf_counter()
+            response, content = None, b''
+            try:
+                response, content = request(uri, method, body, *args, **kwargs)
+                return response, content
+            finally:
+                record['ttfb'] = time.perf_counter() - start
+                self.end_request(record, getattr(response, 'status', None), len(content or b''))
+
+        http.request = timed_request
+        return http
+
+    def trace(self) -> Dict[str, Any]:
+        """
+        Формирует трассировку в формате Trace Event.
+
+        Returns:
+            Dict[str, Any]: Объект с полем traceEvents.
+        """
+        pid = os.getpid()
+        events = []
+        with self.lock:
+            spans = list(self.spans)
+            requests = list(self.requests)
+        for span in spans:
+            events.append({'name': span['name'], 'cat': 'span', 'ph': 'X', 'pid': pid, 'tid': span['thread'],
+                           'ts': span['start'] * 1e6, 'dur': span['duration'] * 1e6, 'args': span['attrs']})
+        for request in requests:
+            args = {key: value for key, value in request.items() if key not in ('thread', 'start', 'duration')}
+            events.append({'name': f"{request['kind']} {request['method']}", 'cat': 'http', 'ph': 'X',
+                           'pid': pid, 'tid': request['thread'], 'ts': request['start'] * 1e6,
+                           'dur': request['duration'] * 1e6, 'args': args})
+        return {'traceEvents': sorted(events, key=lambda event: event['ts']), 'displayTimeUnit': 'ms'}
+
+    def write_trace(self, file_name: str) -> None:
+        """
+        Сохраняет трассировку в JSON-файл.
+
+        Args:
+            file_name (str): Путь к файлу.
+        """
+        with open(file_name, 'w') as file:
+            json.dump(self.trace(), file, ensure_ascii=False)
+
+    def prometheus(self) -> str:
+        """
+        Формирует метрики в текстовом формате Prometheus.
+
+        Returns:
+            str: Счетчики запросов и байт, суммы времени по фазам запросов,
+            гистограмма длительности запросов и суммы длительности стадий.
+        """
+        with self.lock:
+            spans = list(self.spans)
+            requests = list(self.requests)
+        counts: Dict[tuple, int] = {}
+        phases: Dict[tuple, float] = {}
+        transferred: Dict[tuple, int] = {}
+        buckets: Dict[str, List[int]] = {}
+        durations: Dict[str, List[float]] = {}
+        for request in requests:
+            kind = request['kind']
+            counts[(kind, str(request['status']))] = counts.get((kind, str(request['status'])), 0) + 1
+            for phase in PHASES + ['wait']:
+                phases[(kind, phase)] = phases.get((kind, phase), 0.0) + request[phase]
+            for direction in ('sent', 'received'):
+                key = (kind, direction)
+                transferred[key] = transferred.get(key, 0) + request[f'bytes_{direction}']
+            kind_buckets = buckets.setdefault(kind, [0] * len(DURATION_BUCKETS))
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if request['duration'] <= bound:
+                    kind_buckets[index] += 1
+            durations.setdefault(kind, []).append(request['duration'])
+
+        lines = [f'# TYPE {METRIC_PREFIX}_http_requests_total counter']
+        for (kind, status), value in sorted(counts.items()):
+            lines.append(f'{METRIC_PREFIX}_http_requests_total{{kind="{kind}",status="{status}"}} {value}')
+        lines.append(f'# TYPE {METRIC_PREFIX}_http_phase_seconds_total counter')
+        for (kind, phase), value in sorted(phases.items()):
+            lines.append(f'{METRIC_PREFIX}_http_phase_seconds_total{{kind="{kind}",phase="{phase}"}} {value:.6f}')
+        lines.append(f'# TYPE {METRIC_PREFIX}_http_bytes_total counter')
+        for (kind, direction), value in sorted(transferred.items()):
+            lines.append(f'{METRIC_PREFIX}_http_bytes_total{{kind="{kind}",direction="{direction}"}} {value}')
+        lines.append(f'# TYPE {METRIC_PREFIX}_http_request_duration_seconds histogram')
+        for kind, values in sorted(durations.items()):
+            for bound, value in zip(DURATION_BUCKETS, buckets[kind]):
+                lines.append(f'{METRIC_PREFIX}_http_request_duration_seconds_bucket{{kind="{kind}",le="{bound}"}} {value}')
+            lines.append(f'{METRIC_PREFIX}_http_request_duration_seconds_bucket{{kind="{kind}",le="+Inf"}} {len(values)}')
+            lines.append(f'{METRIC_PREFIX}_http_request_duration_seconds_sum{{kind="{kind}"}} {sum(values):.6f}')
+            lines.append(f'{METRIC_PREFIX}_http_request_duration_seconds_count{{kind="{kind}"}} {len(values)}')
+        span_totals: Dict[str, List[float]] = {}
+        for span in spans:
+            span_totals.setdefault(span['name'], []).append(span['duration'])
+        lines.append(f'# TYPE {METRIC_PREFIX}_span_duration_seconds summary')
+        for name, values in sorted(span_totals.items()):
+            lines.append(f'{METRIC_PREFIX}_span_duration_seconds_sum{{span="{name}"}} {sum(values):.6f}')
+            lines.append(f'{METRIC_PREFIX}_span_duration_seconds_count{{span="{name}"}} {len(values)}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, file_name: str) -> None:
+        """
+        Сохраняет метрики в текстовый файл формата Prometheus.
+
+        Args:
+            file_name (str): Путь к файлу, например для node_exporter textfile collector.
+        """
+        with open(file_name, 'w') as file:
+            file.write(self.prometheus())
+
+    @staticmethod
+    @contextlib.contextmanager
+    def profile(file_name: str) -> Iterator[None]:
+        """
+        Профилирует код внутри блока с помощью cProfile, включая потоки, запущенные внутри блока.
+
+        Результат сохраняется в файл для `python -m pstats` или snakeviz.
+
+        Args:
+            file_name (str): Путь к файлу статистики.
+        """
+        profiles = [cProfile.Profile()]
+        lock = threading.Lock()
+
+        def start_thread_profile(*args: Any) -> None:
+            # Вызывается при первом событии нового потока и заменяется профилировщиком этого потока
+            profile = cProfile.Profile()
+            with lock:
+                profiles.append(profile)
+            profile.enable()
+
+        threading.setprofile(start_thread_profile)
+        profiles[0].enable()
+        try:
+            yield
+        finally:
+            profiles[0].disable()
+            threading.setprofile(None)
+            with lock:
+                stats = pstats.Stats(*profiles, stream=sys.stderr)
+            stats.dump_stats(file_name)
+
+
+_instrumentation = Instrumentation(enabled=False)
+
+
+def get_instrumentation() -> Instrumentation:
+    """
+    Возвращает текущий сборщик измерений.
+
+    Returns:
+        Instrumentation: Сборщик, по умолчанию выключенный.
+    """
+    return _instrumentation
+
+
+def set_instrumentation(instrumentation: Instrumentation) -> None:
+    """
+    Устанавливает сборщик измерений для всех модулей проекта.
+
+    Args:
+        instrumentation (Instrumentation): Сборщик измерений.
+    """
+    global _instrumentation
+    _instrumentation = instrumentation
@@ -5,6 +5,9 @@
 читать и добавлять данные в JSON-файл. Он обрабатывает случаи, когда файл 
 не существует или содержит некорректные данные.
 
+Для большого количества записей предназначен класс `StreamJSON`, который
+дописывает записи в конец JSON-массива с буферизацией, не перечитывая файл.
+
 Класс `DumpJSON` предлагает следующие функции:
 - Создание нового JSON-файла с пустым списком.
 - Добавление данных в существующий JSON-файл, в том числе обработка 
@@ -15,14 +18,22 @@
 - create_json: Создает новый JSON-файл, перезаписывая существующий.
 - add_to_json: Добавляет новые данные в существующий JSON-файл, 
   обрабатывая возможные ошибки при загрузке eго содержимого.
+- StreamJSON.add: Добавляет запись в буфер, сбрасывая его на диск при заполнении.
+- StreamJSON.close: Дописывает буфер и закрывает JSON-массив.
 """
 import json
-from typing import Any
+from typing import Any, List, Optional, TextIO
 
 class DumpJSON:
     """Класс для работы с JSON-файлом."""
-    def __init__(self) -> None:
-        pass
+    def __init__(self, file_name: str = 'photos.json') -> None:
+        """
+        Инициализирует экземпляр DumpJSON.
+
+        Args:
+            file_name (str): Путь к JSON-файлу.
+        """
+        self.file_name = file_name
 
     def create_json(self) -> None:
         """
@@ -30,7 +41,7 @@ class DumpJSON:
         Если файл уже существует, он будет перезаписан.
         """
         json_data = []
-        with open('photos.json', 'w') as file:
+        with open(self.file_name, 'w') as file:
             json.dump(json_data, file)
 
     def add_to_json(self, json_data: Any) -> None:
@@ -42,13 +53,75 @@ class DumpJSON:
             json_data (Any): Данные, которые нужно добавить в JSON-файл.
         """
         try:
-            with open("photos.json", "r") as file:
+            with open(self.file_name, "r") as file:
                 data = json.load(file)
         except (FileNotFoundError, json.JSONDecodeError):
             data = []
 
         data.append(json_data)
 
-        with open("photos.json", "w") as file:
+        with open(self.file_name, "w") as file:
             json.dump(data, file)
 
+
+class StreamJSON:
+    """Класс для потоковой записи JSON-массива без перечитывания файла."""
+    def __init__(self, file_name: str = 'photos.json', buffer_size: int = 100) -> None:
+        """
+        Инициализирует экземпляр StreamJSON.
+
+        Args:
+            file_name (str): Путь к JSON-файлу.
+            buffer_size (int): Количество записей, накапливаемых перед сбросом на диск.
+        """
+        self.file_name = file_name
+        self.buffer_size = buffer_size
+        self.buffer: List[str] = []
+        self.file: Optional[TextIO] = None
+        self.written = 0
+
+    def open(self) -> None:
+        """
+        Создает JSON-файл и начинает в нем массив.
+        Если файл уже существует, он будет перезаписан.
+        """
+        self.file = open(self.file_name, 'w')
+        self.file.write('[')
+        self.written = 0
+
+    def add(self, json_data: Any) -> None:
+        """
+        Добавляет запись в конец массива.
+
+        Args:
+            json_data (Any): Данные, которые нужно добавить в JSON-файл.
+        """
+        self.buffer.append(json.dumps(json_data))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Записывает накопленные записи в файл."""
+        if not self.buffer:
+            return
+        prefix = ', ' if self.written else ''
+        self.file.write(prefix + ', '.join(self.buffer))
+        self.file.flush()
+        self.written += len(self.buffer)
+        self.buffer = []
+
+    def close(self) -> None:
+        """Записывает оставшиеся записи и закрывает массив и файл."""
+        if self.file is None:
+            return
+        self.flush()
+        self.file.write(']')
+        self.file.close()
+        self.file = None
+
+    def __enter__(self) -> 'StreamJSON':
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -7,40 +7,79 @@
 - Загрузки фотографий из ВКонтакте на локальный компьютер.
 - Загрузки фотографий на Yandex Disk.
 - Загрузки фотографий из локальной папки в Google Drive.
+- Учета уже переданных фотографий в манифесте, чтобы повторные запуски передавали только новые фото.
 
 Основные функции:
-- print_progress_bar: Отображает прогресс загрузки.
 - get_tokens: Читает токены из конфигурационного файла.
 - get_photo_urls: Получает URL фотографий из ВКонтакте по имени пользователя и количеству.
+- get_photo_records: Получает имена файлов и полные записи о фотографиях из ВКонтакте.
 - upload_to_yandex_disk: Загружает фотографии на Yandex Disk.
 - download_to_local: Скачивает фотографии с ВКонтакте на локальный компьютер.
 - upload_to_google_drive: Загружает фотографии из локальной папки на Google Drive.
+- run_pipeline: Передает фотографии во все выбранные хранилища одним конвейером.
+- ask_destinations: Спрашивает у пользователя, в какие хранилища передать фотографии.
+- make_job: Проверяет описание задания и заполняет значения по умолчанию.
+- load_jobs: Читает задания из JSON-файла.
+- resolve_jobs: Заранее получает ID пользователей и списки фотографий всех заданий пакетами.
+- run_jobs: Выполняет несколько заданий одновременно с общим ограничением числа передач.
+- run_job_async: Выполняет одно задание асинхронными клиентами.
+- run_jobs_async: Выполняет все задания одновременно в одном цикле событий asyncio.
+- enqueue_jobs: Добавляет передачу каждой фотографии заданий в общую очередь.
+- file_sha256: Вычисляет SHA-256 содержимого файла.
+- transfer_task: Выполняет одно задание из очереди.
+- parse_args: Разбирает аргументы командной строки.
+
+Запуск без аргументов работает в интерактивном режиме. Для запуска без вопросов
+(например, из cron) используются флаги или файл заданий:
+    python main.py --user durov --folder backup --count 10 --dest yandex local
+    python main.py --jobs jobs.json --max-workers 16
+    python main.py --jobs jobs.json --async --max-workers 500
+    python main.py --jobs jobs.json --queue work_queue.db --enqueue
+    python main.py --queue work_queue.db --worker --max-workers 16
+    python main.py --user durov --size-type x --recompress webp --quality 75
+    python main.py --user durov --trace trace.json --metrics metrics.prom --profile run.prof
 
 Перед использованием модуля необходимо установить соответствующие библиотеки и настроить API для доступа к ВКонтакте, Yandex Disk и Google Drive.
 """
-import time
-import progressbar
+import sys
+import argparse
+import asyncio
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
 import downloader_vk
 import uploader_yd
 import uploader_gd
 import configparser
-from typing import Tuple, Dict, Any
-
-def print_progress_bar(iterations: int) -> None:
-    """
-    Создает и отображает прогресс бар.
+import async_clients
+import pipeline
+from progress import ProgressTracker
+from cache import DiskCache, LookupCache
+from manifest import Manifest, STATUS_DONE, STATUS_FAILED
+from photo_store import PhotoStore
+from photo_policy import Recompressor, SizePolicy
+from instrumentation import Instrumentation, set_instrumentation
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from request_scheduler import VKAPIError
+from work_queue import WorkQueue, TASK_FAILED, run_worker
+from typing import Tuple, Dict, Any, List, Optional
 
-    Args:
-        iterations (int): Количество итераций для отображения в прогресс баре.
-    """
-    bar = progressbar.ProgressBar()
-    for _ in bar(range(iterations)):
-        time.sleep(0.001)
-    bar.finish()
+CACHE_DIR = '.vk_cache'  # Папка кэша запросов к VK API
+STORE_DIR = 'photo_store'  # Папка хранилища фотографий с адресацией по содержимому
+DESTINATIONS = ['yandex', 'local', 'gdrive']
+VK_ERROR_MESSAGE = ('Во время загрузки произошла ошибка.\nВозможно, пользователь заблокирован, удалён или ещё не создан.\n'
+                    'Убедитесь в правильности введённых данных и удостоверьтесь, что альбом не защищён настройками приватности.')
 
+@functools.lru_cache(maxsize=None)
 def get_tokens(file_name: str = "settings.ini") -> Tuple[str, str]:
     """
     Читает токены из конфигурационного файла.
+    Файл читается один раз, повторные вызовы возвращают запомненный результат.
 
     Args:
         file_name (str): Имя файла конфигурации.
@@ -54,11 +93,12 @@ def get_tokens(file_name: str = "settings.ini") -> Tuple[str, str]:
     ya_token = config["TOKENS"]["token_ya"]
     return vk_token, ya_token
 
-def get_photo_urls(count: int = 5) -> Tuple[Dict[str, str], str, str]:
+def get_photo_urls(screen_name: str, count: int = 5) -> Tuple[Dict[str, str], str, str]:
     """
     Получает URL фотографий из VK.
 
     Args:
+        screen_name (str): Никнейм или ID пользователя VK.
         count (int): Количество фотографий для получения.
 
     Returns:
@@ -70,65 +110,710 @@ def get_photo_urls(count: int = 5) -> Tuple[Dict[str, str], str, str]:
     photo_urls = downloader.get_photos(count)
     return photo_urls, vk_token, vk_id
 
-def upload_to_yandex_disk(count: int, folder_name: str) -> None:
+def get_photo_records(screen_name: str, count: int = 5) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Получает имена файлов и полные записи о фотографиях из VK.
+
+    Args:
+        screen_name (str): Никнейм или ID пользователя VK.
+        count (int): Количество фотографий для получения.
+
+    Returns:
+        List[Tuple[str, Dict[str, Any]]]: Пары из имени файла и записи о фотографии.
+    """
+    vk_token = get_tokens()[0]
+    vk_id = downloader_vk.DownloaderVK.get_id(screen_name, vk_token)
+    downloader = downloader_vk.DownloaderVK(vk_token, vk_id)
+    return downloader.get_photo_records(count)
+
+def upload_to_yandex_disk(screen_name: str, count: int, folder_name: str,
+                          manifest: Optional[Manifest] = None) -> None:
     """
     Загружает фотографии на Yandex Disk.
 
     Args:
+        screen_name (str): Никнейм или ID пользователя VK.
         count (int): Количество фотографий для загрузки.
         folder_name (str): Имя папки на Yandex Disk.
+        manifest (Optional[Manifest]): Манифест для пропуска уже загруженных фотографий.
     """
     ya_token = get_tokens()[1]
     uploader = uploader_yd.UploaderYD(ya_token, folder_name)
     uploader.folder_creation()
-    
-    photo_urls = get_photo_urls(count)[0]
-    for counter, (name, link) in enumerate(photo_urls.items(), start=1):
-        uploader.upload(name, link)
+
+    photo_urls = {}
+    photo_keys = {}
+    for name, photo in get_photo_records(screen_name, count):
+        if manifest is not None:
+            photo_keys[name] = manifest.photo_key(photo)
+            manifest.add_photo(photo, name)
+            if manifest.is_done(photo_keys[name], 'yandex'):
+                print(f'Фото {name} уже загружено на YandexDisk, пропускаем')
+                continue
+        photo_urls[name] = photo['url']
+
+    results = uploader.upload_from_urls(photo_urls.items())
+    if manifest is not None:
+        for name, success in results.items():
+            manifest.set_status(photo_keys[name], 'yandex', STATUS_DONE if success else STATUS_FAILED)
+    uploaded = [name for name, success in results.items() if success]
+    for counter, name in enumerate(uploaded, start=1):
         print(f'Загружено {counter} фото на YandexDisk, {name} в папке {folder_name}')
-        print_progress_bar(counter)
 
-def download_to_local(count: int, folder_name: str) -> None:
+def download_to_local(screen_name: str, count: int, folder_name: str, workers: int = 8,
+                      manifest: Optional[Manifest] = None, store: Optional[PhotoStore] = None) -> None:
     """
     Загружает фотографии с VK на локальный компьютер.
 
     Args:
+        screen_name (str): Никнейм или ID пользователя VK.
         count (int): Количество фотографий для загрузки.
         folder_name (str): Имя папки для загрузки.
+        workers (int): Количество одновременных загрузок.
+        manifest (Optional[Manifest]): Манифест для пропуска уже скачанных фотографий.
+        store (Optional[PhotoStore]): Хранилище для пропуска уже сохраненных фотографий.
     """
-    vk_token, vk_id = get_photo_urls()[1], get_photo_urls()[2]
+    vk_token = get_tokens()[0]
+    vk_id = downloader_vk.DownloaderVK.get_id(screen_name, vk_token)
     downloader = downloader_vk.DownloaderVK(vk_token, vk_id, folder_name)
-    downloader.download_to_pc(count)
+    downloader.download_to_pc(count, workers, manifest, store)
 
-def upload_to_google_drive(folder_name: str) -> None:
+def upload_to_google_drive(folder_name: str, manifest: Optional[Manifest] = None) -> None:
     """
     Загружает фотографии из локальной папки в Google Drive.
 
     Args:
         folder_name (str): Имя папки на Google Drive.
+        manifest (Optional[Manifest]): Манифест для пропуска уже загруженных фотографий.
     """
     uploader = uploader_gd.UploaderGD()
     folder_id = uploader.folder_creation(folder_name)
-    uploader.upload(folder_id, folder_name)
+    uploader.upload(folder_id, folder_name, manifest)
+
+def run_pipeline(screen_name: str, count: int, folder_name: str, destinations: List[str],
+                 manifest: Optional[Manifest] = None, store: Optional[PhotoStore] = None,
+                 album_id: str = 'profile', json_file: str = 'photos.json',
+                 budget: Optional[threading.Semaphore] = None, show_bar: bool = True,
+                 size_policy: Optional[SizePolicy] = None,
+                 recompressor: Optional[Recompressor] = None,
+                 vk_id: Optional[str] = None) -> Dict[str, Dict[str, bool]]:
+    """
+    Передает фотографии из VK во все выбранные хранилища одним конвейером.
+
+    Каждая фотография скачивается не более одного раза и сразу передается
+    во все хранилища, не дожидаясь обработки остальных фотографий.
 
-def optional():
+    Args:
+        screen_name (str): Никнейм или ID пользователя VK.
+        count (int): Количество фотографий для загрузки.
+        folder_name (str): Имя папки локально и в хранилищах.
+        destinations (List[str]): Хранилища: 'yandex', 'local', 'gdrive'.
+        manifest (Optional[Manifest]): Манифест для пропуска уже переданных фотографий.
+        store (Optional[PhotoStore]): Хранилище для пропуска уже скачанных и загруженных фотографий.
+        album_id (str): Альбом: 'profile', 'wall', 'saved' или ID альбома.
+        json_file (str): Путь к JSON-файлу со сведениями о фотографиях.
+        budget (Optional[threading.Semaphore]): Общее ограничение числа одновременных передач.
+        show_bar (bool): Показывать прогресс бар; иначе печатать строки лога с именем пользователя.
+        size_policy (Optional[SizePolicy]): Правило выбора размера, по умолчанию - наибольший вариант.
+        recompressor (Optional[Recompressor]): Перекодировщик фотографий перед загрузкой в хранилища.
+            С ним фотографии на Yandex Disk загружаются из скачанных файлов, а не по URL.
+        vk_id (Optional[str]): ID пользователя, уже полученный через `resolve_jobs`.
+
+    Returns:
+        Dict[str, Dict[str, bool]]: Для каждого хранилища - успешность передачи каждого файла.
+    """
+    vk_token, ya_token = get_tokens()
+    vk_id = vk_id or downloader_vk.DownloaderVK.get_id(screen_name, vk_token)
+    downloader = downloader_vk.DownloaderVK(vk_token, vk_id, folder_name, json_file, size_policy=size_policy)
+
+    sinks = []
+    if 'yandex' in destinations:
+        uploader = uploader_yd.UploaderYD(ya_token, folder_name)
+        uploader.folder_creation()
+        sinks.append(pipeline.YandexSink(uploader, from_file=recompressor is not None))
+    if 'local' in destinations:
+        sinks.append(pipeline.LocalSink())
+    if 'gdrive' in destinations:
+        uploader = uploader_gd.UploaderGD()
+        sinks.append(pipeline.GoogleDriveSink(uploader, uploader.folder_creation(folder_name)))
+
+    progress = ProgressTracker(pipeline.TransferPipeline.stages(sinks), count, interval=0.5 if show_bar else 10.0,
+                               show_bar=show_bar, label=screen_name)
+    with progress:
+        transfer = pipeline.TransferPipeline(downloader, sinks, manifest=manifest, progress=progress,
+                                             store=store, dedupe_uploads=store is not None,
+                                             album_id=album_id, budget=budget, recompressor=recompressor)
+        results = transfer.run(count)
+    for destination, files in results.items():
+        uploaded = sum(files.values())
+        print(f'{screen_name}: хранилище {destination}: передано {uploaded} из {len(files)} фото')
+    return results
+
+def ask_destinations() -> List[str]:
+    """
+    Спрашивает у пользователя, в какие хранилища, кроме Yandex Disk, передать фотографии.
+
+    Returns:
+        List[str]: Выбранные хранилища.
+    """
+    destinations = ['yandex']
     print('Загрузить фотографии на жёсткий диск? Yes/y/да')
     answer = input()
     if answer.lower() == 'yes' or answer.lower() == 'да' or answer.lower() == 'y':
-        download_to_local(photos_count, folder_name) # Локальная загрузка (опционально)
-    else:
-        pass
-    print(f'Загрузить фотографии на Google Drive из папки {folder_name}? Yes/y/да')
+        destinations.append('local') # Локальная загрузка (опционально)
+    print('Загрузить фотографии на Google Drive? Yes/y/да')
     answer = input()
     if answer.lower() == 'yes' or answer.lower() == 'да' or answer.lower() == 'y':
-        upload_to_google_drive(folder_name) # Загрузка фото на Google Drive всех файлов из папки folder_name
-    else:
-        pass
-    print('Работа программы завершена!')
+        destinations.append('gdrive') # Загрузка фото на Google Drive (опционально)
+    return destinations
+
+def make_job(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Проверяет описание задания и заполняет значения по умолчанию.
+
+    Описание содержит поля `user` (обязательное), `folder`, `count`, `album`,
+    `destinations`, `size` и `recompress`. Незаданные поля получают значения
+    по умолчанию: папка по имени пользователя, 5 фотографий, альбом 'profile',
+    хранилище 'yandex', наибольший размер и без перекодирования.
+
+    Args:
+        entry (Dict[str, Any]): Описание задания, например
+            {"user": "durov", "size": {"type": "x"}, "recompress": {"format": "webp", "quality": 75}}.
+
+    Returns:
+        Dict[str, Any]: Задание с заполненными полями.
+
+    Raises:
+        ValueError: Если не указан пользователь, указано неизвестное хранилище, тип размера или формат.
+    """
+    if not entry.get('user'):
+        raise ValueError('не указан пользователь (user)')
+    size = entry.get('size') or {}
+    recompress = entry.get('recompress')
+    job = {
+        'user': str(entry['user']),
+        'folder': entry.get('folder') or str(entry['user']),
+        'count': int(entry.get('count', 5)),
+        'album': str(entry.get('album', 'profile')),
+        'destinations': list(entry.get('destinations', ['yandex'])),
+        'size_policy': SizePolicy(size.get('type'), size.get('max_pixels'), size.get('max_bytes')) if size else None,
+        'recompressor': Recompressor(recompress.get('format', 'WEBP'), recompress.get('quality', 80),
+                                     recompress.get('max_side')) if recompress else None,
+    }
+    unknown = set(job['destinations']) - set(DESTINATIONS)
+    if unknown:
+        raise ValueError(f"неизвестные хранилища {', '.join(sorted(unknown))}")
+    return job
+
+def load_jobs(file_name: str) -> List[Dict[str, Any]]:
+    """
+    Читает задания из JSON-файла со списком описаний заданий (см. `make_job`).
+
+    Args:
+        file_name (str): Путь к файлу заданий.
+
+    Returns:
+        List[Dict[str, Any]]: Задания с заполненными полями.
+
+    Raises:
+        ValueError: Если описание задания некорректно.
+    """
+    with open(file_name, 'r', encoding='utf-8') as file:
+        entries = json.load(file)
+    jobs = []
+    for number, entry in enumerate(entries, start=1):
+        try:
+            jobs.append(make_job(entry))
+        except ValueError as error:
+            raise ValueError(f'Задание {number}: {error}')
+    return jobs
+
+def resolve_jobs(jobs: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Заранее получает ID пользователей и списки фотографий всех заданий пакетами.
+
+    ID запрашиваются через `DownloaderVK.get_ids`, а страницы альбомов - через
+    `DownloaderVK.iter_photos_many`, по 25 вызовов VK API в одном запросе execute.
+    Страницы попадают в кэш, поэтому задания затем перебирают фотографии без
+    обращения к VK API. Ошибка пакетного запроса не прерывает работу: задания
+    запросят недостающие сведения сами и сообщат об ошибке по отдельности.
+
+    Args:
+        jobs (List[Dict[str, Any]]): Задания из `make_job` или `load_jobs`.
+
+    Returns:
+        Dict[str, str]: Пользователь задания -> ID; пользователи, которых не удалось найти, пропускаются.
+    """
+    vk_token = get_tokens()[0]
+    try:
+        vk_ids = downloader_vk.DownloaderVK.get_ids([job['user'] for job in jobs], vk_token)
+    except VKAPIError as error:
+        print(f'Не удалось получить ID пользователей пакетом: {error}')
+        return {}
+    targets_by_count = {}  # iter_photos_many ограничивает количество фотографий одинаково для всех альбомов
+    for job in jobs:
+        if job['user'] in vk_ids:
+            targets_by_count.setdefault(job['count'], []).append((vk_ids[job['user']], job['album']))
+    try:
+        for count, targets in targets_by_count.items():
+            for _ in downloader_vk.DownloaderVK.iter_photos_many(targets, vk_token, count):
+                pass
+    except VKAPIError as error:
+        print(f'Не удалось получить списки фотографий пакетом: {error}')
+    return vk_ids
+
+def run_jobs(jobs: List[Dict[str, Any]], manifest: Optional[Manifest] = None, store: Optional[PhotoStore] = None,
+             max_workers: int = 16, parallel_jobs: int = 4) -> Dict[str, bool]:
+    """
+    Выполняет несколько заданий одновременно в одном процессе.
+
+    Все задания используют общий семафор на max_workers одновременных скачиваний
+    и загрузок, общий пул соединений и общее ограничение частоты запросов к VK API.
+    ID пользователей и списки фотографий всех заданий заранее запрашиваются
+    пакетами через `resolve_jobs`.
+
+    Args:
+        jobs (List[Dict[str, Any]]): Задания из `make_job` или `load_jobs`.
+        manifest (Optional[Manifest]): Манифест для пропуска уже переданных фотографий.
+        store (Optional[PhotoStore]): Хранилище для пропуска уже скачанных и загруженных фотографий.
+        max_workers (int): Общее ограничение числа одновременных передач.
+        parallel_jobs (int): Количество одновременно выполняемых заданий.
+
+    Returns:
+        Dict[str, bool]: Для каждого задания (`<user>/<album>`) - завершилось ли оно без ошибок.
+    """
+    vk_ids = resolve_jobs(jobs)
+    budget = threading.BoundedSemaphore(max_workers)
+    statuses = {}
+    with ThreadPoolExecutor(max_workers=parallel_jobs) as executor:
+        futures = {
+            executor.submit(run_pipeline, job['user'], job['count'], job['folder'], job['destinations'], manifest,
+                            store, album_id=job['album'], json_file=f"photos_{job['user']}_{job['album']}.json",
+                            budget=budget, show_bar=False, size_policy=job['size_policy'],
+                            recompressor=job['recompressor'], vk_id=vk_ids.get(job['user'])):
+                f"{job['user']}/{job['album']}"
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results = future.result()
+            except VKAPIError as error:
+                print(f'Задание {name}: {error}\n{VK_ERROR_MESSAGE}')
+                statuses[name] = False
+                continue
+            except Exception as error:  # Ошибка одного задания не должна останавливать остальные
+                print(f'Задание {name} завершилось ошибкой: {error}')
+                statuses[name] = False
+                continue
+            statuses[name] = all(all(files.values()) for files in results.values())
+    return statuses
+
+async def run_job_async(job: Dict[str, Any], scheduler: async_clients.AsyncRequestScheduler,
+                        semaphore: asyncio.Semaphore, manifest: Optional[Manifest] = None,
+                        store: Optional[PhotoStore] = None,
+                        vk_id: Optional[str] = None) -> Dict[str, Dict[str, bool]]:
+    """
+    Выполняет одно задание асинхронными клиентами.
+
+    Фотографии загружаются на Yandex Disk по URL одновременно со скачиванием
+    на локальный компьютер; в Google Drive загружаются скачанные файлы задания.
+    Если локальное хранилище не выбрано, файлы для Google Drive скачиваются
+    во временную папку, которая удаляется после загрузки.
+
+    Args:
+        job (Dict[str, Any]): Задание из `make_job` без перекодирования.
+        scheduler (async_clients.AsyncRequestScheduler): Общий планировщик запросов.
+        semaphore (asyncio.Semaphore): Общее ограничение числа одновременных передач.
+        manifest (Optional[Manifest]): Манифест для пропуска уже переданных фотографий.
+        store (Optional[PhotoStore]): Хранилище для пропуска уже скачанных фотографий.
+        vk_id (Optional[str]): ID пользователя, уже полученный через `resolve_jobs`.
+
+    Returns:
+        Dict[str, Dict[str, bool]]: Для каждого хранилища - успешность передачи каждого файла.
+    """
+    vk_token, ya_token = get_tokens()
+    vk_id = vk_id or await async_clients.AsyncDownloaderVK.get_id(job['user'], vk_token, scheduler)
+    downloader = async_clients.AsyncDownloaderVK(vk_token, vk_id, job['folder'],
+                                                 f"photos_{job['user']}_{job['album']}.json", scheduler,
+                                                 size_policy=job['size_policy'])
+    records = await downloader.get_photo_records(job['count'], album_id=job['album'])  # Страницы попадают в кэш
+    results = {}
+
+    async def to_yandex() -> None:
+        uploader = async_clients.AsyncUploaderYD(ya_token, job['folder'], scheduler)
+        await uploader.folder_creation()
+        photo_urls = {}
+        photo_keys = {}
+
+        def pending() -> None:  # Манифест - база SQLite, поэтому обращения к нему выполняются в потоке
+            for name, photo in records:
+                if manifest is not None:
+                    photo_keys[name] = manifest.photo_key(photo)
+                    manifest.add_photo(photo, name)
+                    if manifest.is_done(photo_keys[name], 'yandex'):
+                        continue
+                photo_urls[name] = photo['url']
+
+        def record() -> None:
+            for name, success in results['yandex'].items():
+                manifest.set_status(photo_keys[name], 'yandex', STATUS_DONE if success else STATUS_FAILED)
+
+        await asyncio.to_thread(pending)
+        results['yandex'] = await uploader.upload_from_urls(photo_urls.items())
+        failed = [name for name, success in results['yandex'].items() if not success]
+        relayed = await asyncio.gather(*(uploader.relay(name, photo_urls[name]) for name in failed))
+        results['yandex'].update(zip(failed, relayed))  # Диск не смог скачать файлы сам - передаем их потоком
+        if manifest is not None:
+            await asyncio.to_thread(record)
+
+    def record_failed() -> None:  # Фото, которые не удалось скачать, не переданы и в Google Drive
+        for name, photo in records:
+            if name in results['gdrive']:
+                manifest.set_status(Manifest.photo_key(photo), 'gdrive', STATUS_FAILED)
+
+    async def to_local() -> None:
+        keep_files = 'local' in job['destinations']
+        # Без локального хранилища файлы для Google Drive скачиваются во временную папку
+        work_dir = None if keep_files else await asyncio.to_thread(tempfile.mkdtemp, prefix='vk_backup_')
+        local = downloader if keep_files else async_clients.AsyncDownloaderVK(
+            vk_token, vk_id, work_dir, downloader.json_file, scheduler, size_policy=job['size_policy'])
+        try:
+            downloaded = await local.download_to_pc(job['count'], manifest=manifest, store=store,
+                                                    album_id=job['album'], semaphore=semaphore,
+                                                    keep_files=keep_files)
+            if keep_files:
+                results['local'] = downloaded
+            if 'gdrive' in job['destinations']:
+                uploader = async_clients.AsyncUploaderGD(scheduler)
+                folder_id = await uploader.folder_creation(job['folder'])
+                file_keys = {name: Manifest.photo_key(photo) for name, photo in records if downloaded.get(name)}
+                results['gdrive'] = {name: False for name, success in downloaded.items() if not success}
+                if manifest is not None:
+                    await asyncio.to_thread(record_failed)
+                results['gdrive'].update(await uploader.upload(folder_id, local.folder_name, manifest,
+                                                               semaphore=semaphore, file_keys=file_keys))
+        finally:
+            if work_dir is not None:
+                await asyncio.to_thread(shutil.rmtree, work_dir, ignore_errors=True)
+
+    transfers = []
+    if 'yandex' in job['destinations']:
+        transfers.append(to_yandex())
+    if 'local' in job['destinations'] or 'gdrive' in job['destinations']:
+        transfers.append(to_local())
+    await asyncio.gather(*transfers)
+    for destination, files in results.items():
+        print(f"{job['user']}: хранилище {destination}: передано {sum(files.values())} из {len(files)} фото")
+    return results
+
+def run_jobs_async(jobs: List[Dict[str, Any]], manifest: Optional[Manifest] = None,
+                   store: Optional[PhotoStore] = None, max_workers: int = 16) -> Dict[str, bool]:
+    """
+    Выполняет все задания одновременно в одном цикле событий asyncio.
+
+    Все задания используют общий пул соединений, общее ограничение частоты
+    запросов к VK API и общий семафор на max_workers одновременных передач.
+    ID пользователей и списки фотографий всех заданий заранее запрашиваются
+    пакетами через `resolve_jobs`, до запуска цикла событий.
+    Перекодирование фотографий в этом режиме не поддерживается.
+
+    Args:
+        jobs (List[Dict[str, Any]]): Задания из `make_job` или `load_jobs`.
+        manifest (Optional[Manifest]): Манифест для пропуска уже переданных фотографий.
+        store (Optional[PhotoStore]): Хранилище для пропуска уже скачанных фотографий.
+        max_workers (int): Общее ограничение числа одновременных передач.
+
+    Returns:
+        Dict[str, bool]: Для каждого задания (`<user>/<album>`) - завершилось ли оно без ошибок.
+    """
+    vk_ids = resolve_jobs(jobs)
+
+    async def run_all() -> Dict[str, bool]:
+        statuses = {}
+        async with async_clients.AsyncRequestScheduler(pool_size=max_workers) as scheduler:
+            semaphore = asyncio.Semaphore(max_workers)
+            names = [f"{job['user']}/{job['album']}" for job in jobs]
+            outcomes = await asyncio.gather(*(run_job_async(job, scheduler, semaphore, manifest, store,
+                                                            vk_ids.get(job['user'])) for job in jobs),
+                                            return_exceptions=True)
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, VKAPIError):
+                print(f'Задание {name}: {outcome}\n{VK_ERROR_MESSAGE}')
+                statuses[name] = False
+            elif isinstance(outcome, Exception):
+                print(f'Задание {name} завершилось ошибкой: {outcome}')
+                statuses[name] = False
+            else:
+                statuses[name] = all(all(files.values()) for files in outcome.values())
+        return statuses
+
+    return asyncio.run(run_all())
+
+def enqueue_jobs(jobs: List[Dict[str, Any]], work_queue: WorkQueue) -> int:
+    """
+    Добавляет передачу каждой фотографии заданий в общую очередь.
+
+    Папки в хранилищах создаются здесь, один раз, а не каждым обработчиком.
+    В задании сохраняются идентификаторы фотографии и правило выбора размера,
+    а не URL: подписанная ссылка может истечь, пока задание ждет в очереди.
+    Идентификатор задания в очереди составляется из пользователя, альбома, ключа
+    фотографии и хранилищ, поэтому повторное заполнение очереди добавляет только новые фотографии.
+
+    Args:
+        jobs (List[Dict[str, Any]]): Задания из `make_job` или `load_jobs` без перекодирования.
+        work_queue (WorkQueue): Очередь заданий.
+
+    Returns:
+        int: Количество добавленных в очередь заданий.
+
+    Raises:
+        VKAPIError: Если VK API вернул ошибку.
+    """
+    vk_token, ya_token = get_tokens()
+    vk_ids = resolve_jobs(jobs)
+    added = 0
+    for job in jobs:
+        vk_id = vk_ids.get(job['user']) or downloader_vk.DownloaderVK.get_id(job['user'], vk_token)
+        downloader = downloader_vk.DownloaderVK(vk_token, vk_id, job['folder'], size_policy=job['size_policy'])
+        destinations = sorted(job['destinations'])
+        gdrive_folder_id = None
+        if 'yandex' in destinations:
+            uploader_yd.UploaderYD(ya_token, job['folder']).folder_creation()
+        if 'gdrive' in destinations:
+            gdrive_folder_id = uploader_gd.UploaderGD().folder_creation(job['folder'])
+        size_policy = job['size_policy']
+        size = None if size_policy is None else {
+            'type': size_policy.size_type, 'max_pixels': size_policy.max_pixels, 'max_bytes': size_policy.max_bytes
+        }
+        tasks = []
+        for file_name, photo in downloader.name_photos(downloader.iter_photos(job['count'], album_id=job['album'])):
+            task_id = f"{job['user']}/{job['album']}/{Manifest.photo_key(photo)}:{','.join(destinations)}"
+            # Подписанный URL фотографии истекает, поэтому сохраняется только ее идентификатор
+            tasks.append((task_id, {'folder': job['folder'], 'file_name': file_name,
+                                    'owner_id': photo['owner_id'], 'photo_id': photo['id'], 'size': size,
+                                    'destinations': destinations, 'gdrive_folder_id': gdrive_folder_id}))
+        job_added = work_queue.put_many(tasks)
+        added += job_added
+        print(f"{job['user']}: в очередь добавлено заданий - {job_added}, всего фото - {len(tasks)}")
+    return added
+
+@functools.lru_cache(maxsize=None)
+def get_task_sinks(folder_name: str, destinations: Tuple[str, ...],
+                   gdrive_folder_id: Optional[str] = None) -> List[pipeline.Sink]:
+    """
+    Возвращает хранилища для заданий очереди с одинаковыми папкой и набором хранилищ.
+
+    Хранилища создаются один раз на процесс обработчика.
+
+    Args:
+        folder_name (str): Имя папки локально и в хранилищах.
+        destinations (Tuple[str, ...]): Хранилища: 'yandex', 'local', 'gdrive'.
+        gdrive_folder_id (Optional[str]): Идентификатор папки в Google Drive.
+
+    Returns:
+        List[pipeline.Sink]: Хранилища конвейера.
+    """
+    sinks = []
+    if 'yandex' in destinations:
+        sinks.append(pipeline.YandexSink(uploader_yd.UploaderYD(get_tokens()[1], folder_name)))
+    if 'local' in destinations:
+        sinks.append(pipeline.LocalSink())
+    if 'gdrive' in destinations:
+        sinks.append(pipeline.GoogleDriveSink(uploader_gd.UploaderGD(), gdrive_folder_id))
+    return sinks
+
+def file_sha256(file_path: str) -> str:
+    """
+    Вычисляет SHA-256 содержимого файла.
+
+    Args:
+        file_path (str): Путь к файлу.
+
+    Returns:
+        str: SHA-256 в шестнадцатеричном виде.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(downloader_vk.CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def transfer_task(payload: Dict[str, Any], manifest: Optional[Manifest] = None,
+                  store: Optional[PhotoStore] = None) -> bool:
+    """
+    Выполняет одно задание из очереди: передает фотографию во все хранилища задания.
+
+    URL фотографии запрашивается заново через photos.getById. Задание можно
+    безопасно выполнить повторно: файл в локальной папке не скачивается снова,
+    если его SHA-256 совпадает с записанным в манифесте после скачивания,
+    а файлы в хранилищах перезаписываются или пропускаются. Если локальное
+    хранилище не выбрано, файл скачивается во временную папку и удаляется
+    после загрузки. Результат каждого хранилища записывается в манифест так же,
+    как в `TransferPipeline`, поэтому обычные запуски его учитывают.
+
+    Args:
+        payload (Dict[str, Any]): Описание задания из `enqueue_jobs`.
+        manifest (Optional[Manifest]): Манифест с путями и хэшами скачанных файлов.
+        store (Optional[PhotoStore]): Хранилище для пропуска уже скачанных фотографий.
+
+    Returns:
+        bool: Успешность передачи во все хранилища.
+
+    Raises:
+        VKAPIError: Если VK API вернул ошибку.
+    """
+    vk_token = get_tokens()[0]
+    size = payload['size']
+    size_policy = SizePolicy(size.get('type'), size.get('max_pixels'), size.get('max_bytes')) if size else None
+    photo = downloader_vk.DownloaderVK.get_photo_by_id(str(payload['owner_id']), str(payload['photo_id']),
+                                                       vk_token, size_policy=size_policy)
+    if photo is None:
+        print(f"Фото {payload['owner_id']}_{payload['photo_id']} удалено или недоступно")
+        return False
+
+    file_name = payload['file_name']
+    sinks = get_task_sinks(payload['folder'], tuple(payload['destinations']), payload['gdrive_folder_id'])
+    keep_file = 'local' in payload['destinations']
+    work_dir = None
+    file_path = None
+    if any(sink.needs_file for sink in sinks):
+        if keep_file:
+            os.makedirs(payload['folder'], exist_ok=True)
+            file_path = os.path.join(payload['folder'], file_name)
+        else:
+            work_dir = tempfile.mkdtemp(prefix='vk_backup_')
+            file_path = os.path.join(work_dir, file_name)
+    key = Manifest.photo_key(photo)
+    if manifest is not None:
+        manifest.add_photo(photo, file_name)
+    try:
+        if file_path is not None:
+            local_path, sha256 = manifest.get_local(key) if manifest is not None else (None, None)
+            if not (keep_file and local_path == file_path and sha256 is not None
+                    and os.path.exists(file_path) and file_sha256(file_path) == sha256):
+                downloader = downloader_vk.DownloaderVK(vk_token, str(photo['owner_id']), payload['folder'])
+                _, sha256 = downloader.download_photo(photo, file_path, store)
+                if manifest is not None:
+                    if keep_file:
+                        manifest.set_local(key, file_path, sha256)
+                    else:
+                        manifest.set_sha256(key, sha256)
+        results = [sink.send(file_name, file_path if sink.needs_file else None, photo) for sink in sinks]
+        if manifest is not None:
+            for sink, success in zip(sinks, results):
+                status = STATUS_DONE if success else STATUS_FAILED
+                if isinstance(sink, pipeline.LocalSink):
+                    manifest.set_status(key, sink.name, status)
+                else:
+                    manifest.set_status(key, sink.name, status, sink.remote_path(file_name))
+    finally:
+        if work_dir is not None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return all(results)
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Разбирает аргументы командной строки.
+
+    Args:
+        argv (Optional[List[str]]): Аргументы, по умолчанию из sys.argv.
+
+    Returns:
+        argparse.Namespace: Разобранные аргументы.
+    """
+    parser = argparse.ArgumentParser(description='Резервное копирование фотографий ВКонтакте')
+    parser.add_argument('--user', help='никнейм или id пользователя ВКонтакте')
+    parser.add_argument('--folder', help='имя папки, по умолчанию совпадает с пользователем')
+    parser.add_argument('--count', type=int, default=5, help='количество фотографий')
+    parser.add_argument('--album', default='profile', help="альбом: 'profile', 'wall', 'saved' или id альбома")
+    parser.add_argument('--dest', nargs='+', choices=DESTINATIONS, default=['yandex'], help='хранилища')
+    parser.add_argument('--size-type', help="желаемый тип размера VK: 'x', 'y', 'z', 'w' и т.д.")
+    parser.add_argument('--max-pixels', type=int, help='максимальное количество пикселей фотографии')
+    parser.add_argument('--max-bytes', type=int, help='ограничение оценки размера фотографии в байтах')
+    parser.add_argument('--recompress', metavar='FORMAT', help='перекодировать фотографии: webp, jpeg или png')
+    parser.add_argument('--quality', type=int, default=80, help='качество перекодирования от 1 до 95')
+    parser.add_argument('--max-side', type=int, help='уменьшить фотографии до этой стороны при перекодировании')
+    parser.add_argument('--jobs', help='JSON-файл со списком заданий')
+    parser.add_argument('--trace', help='сохранить трассировку запросов и стадий в JSON-файл')
+    parser.add_argument('--metrics', help='сохранить метрики в текстовый файл формата Prometheus')
+    parser.add_argument('--profile', help='сохранить профиль cProfile в файл')
+    parser.add_argument('--max-workers', type=int, default=16, help='общее ограничение числа одновременных передач')
+    parser.add_argument('--parallel-jobs', type=int, default=4, help='количество одновременно выполняемых заданий')
+    parser.add_argument('--queue', help='файл общей очереди заданий SQLite для нескольких обработчиков')
+    parser.add_argument('--enqueue', action='store_true', help='добавить фотографии заданий в очередь и завершиться')
+    parser.add_argument('--worker', action='store_true', help='выполнять задания из очереди, пока они есть')
+    parser.add_argument('--visibility-timeout', type=float, default=300.0,
+                        help='время аренды задания очереди в секундах')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='выполнять задания асинхронными клиентами в одном потоке (нужна библиотека httpx)')
+    args = parser.parse_args(argv)
+    if (args.enqueue or args.worker) and not args.queue:
+        parser.error('для --enqueue и --worker нужно указать --queue')
+    if not args.user and not args.jobs and not args.worker:
+        parser.error('нужно указать --user или --jobs')
+    return args
 
 if __name__ == '__main__':
+    downloader_vk.DownloaderVK.lookup_cache = LookupCache(DiskCache(CACHE_DIR))  # Кэш запросов VK между запусками
+    if len(sys.argv) > 1:
+        args = parse_args()
+        if args.worker:
+            work_queue = WorkQueue(args.queue, args.visibility_timeout)
+            task = functools.partial(transfer_task, manifest=Manifest(), store=PhotoStore(STORE_DIR))
+            stats = run_worker(work_queue, task, args.max_workers)
+            counts = work_queue.counts()
+            print(f"Выполнено заданий: {stats['done']}, с ошибками: {stats['failed']}. "
+                  f"Очередь: {', '.join(f'{status} - {count}' for status, count in counts.items())}")
+            sys.exit(1 if counts[TASK_FAILED] else 0)
+        try:
+            if args.jobs:
+                jobs = load_jobs(args.jobs)
+            else:
+                size = {'type': args.size_type, 'max_pixels': args.max_pixels, 'max_bytes': args.max_bytes}
+                recompress = {'format': args.recompress, 'quality': args.quality, 'max_side': args.max_side}
+                jobs = [make_job({'user': args.user, 'folder': args.folder, 'count': args.count, 'album': args.album,
+                                  'destinations': args.dest,
+                                  'size': size if any(value is not None for value in size.values()) else None,
+                                  'recompress': recompress if args.recompress else None})]
+            if args.use_async and async_clients.httpx is None:
+                raise RuntimeError('для режима --async установите библиотеку httpx: pip install httpx')
+            if (args.use_async or args.enqueue) and any(job['recompressor'] is not None for job in jobs):
+                raise ValueError('перекодирование не поддерживается в режимах --async и --enqueue')
+        except (ValueError, RuntimeError) as error:
+            print(f'Ошибка в параметрах запуска: {error}')
+            sys.exit(2)
+        if args.enqueue:
+            try:
+                added = enqueue_jobs(jobs, WorkQueue(args.queue, args.visibility_timeout))
+            except VKAPIError as error:
+                print(f'{error}\n{VK_ERROR_MESSAGE}')
+                sys.exit(1)
+            print(f'Добавлено заданий в очередь: {added}')
+            sys.exit(0)
+        instrumentation = Instrumentation(enabled=bool(args.trace or args.metrics))
+        set_instrumentation(instrumentation)
+        with Instrumentation.profile(args.profile) if args.profile else contextlib.nullcontext():
+            if args.use_async:
+                statuses = run_jobs_async(jobs, Manifest(), PhotoStore(STORE_DIR), args.max_workers)
+            else:
+                statuses = run_jobs(jobs, Manifest(), PhotoStore(STORE_DIR), args.max_workers, args.parallel_jobs)
+        if args.trace:
+            instrumentation.write_trace(args.trace)
+        if args.metrics:
+            instrumentation.write_prometheus(args.metrics)
+        for name, success in sorted(statuses.items()):
+            print(f"Задание {name}: {'выполнено' if success else 'есть ошибки'}")
+        sys.exit(0 if all(statuses.values()) else 1)
+
     screen_name = str(input('Введите никнейм пользователя или id: '))
     folder_name = str(input('Введите имя папки: '))
     photos_count = int(input('Введите количество фотографий для загрузки: '))
-    upload_to_yandex_disk(photos_count, folder_name) # Загрузка фото на ЯД
-    optional()
\ No newline at end of file
+    destinations = ask_destinations()
+    manifest = Manifest()  # Учет уже переданных фотографий между запусками
+    try:
+        run_pipeline(screen_name, photos_count, folder_name, destinations, manifest, PhotoStore(STORE_DIR)) # Загрузка фото во все выбранные хранилища
+    except VKAPIError:
+        print(VK_ERROR_MESSAGE)
+        sys.exit()
+    print('Работа программы завершена!')
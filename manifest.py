@@ -0,0 +1,250 @@
+"""
+Модуль для учета переданных фотографий.
+
+Этот модуль предоставляет класс `Manifest`, который хранит в SQLite-базе сведения
+о каждой фотографии ВКонтакте и о статусе ее передачи в каждое из хранилищ. Манифест
+позволяет при повторном запуске передавать только новые или измененные фотографии
+и продолжать работу после аварийного завершения.
+
+Класс `Manifest` предлагает следующие функции:
+- Регистрация фотографии с выбранным URL, типом размера и именем файла.
+- Сохранение локального пути и хэша содержимого скачанного файла.
+- Хранение статуса загрузки фотографии для каждого хранилища.
+
+Основные методы:
+- `photo_key`: Возвращает ключ фотографии вида `<owner_id>_<id>`.
+- `add_photo`: Регистрирует фотографию и сбрасывает статусы, если она изменилась.
+- `set_local`: Сохраняет локальный путь и хэш скачанного файла.
+- `set_sha256`: Сохраняет хэш файла, скачанного без сохранения в локальную папку.
+- `get_local`: Возвращает локальный путь и хэш скачанного файла.
+- `find_by_path`: Ищет ключ фотографии по локальному пути.
+- `set_status`: Сохраняет статус загрузки фотографии в хранилище.
+- `is_done`: Проверяет, загружена ли фотография в хранилище.
+- `is_hash_done`: Проверяет, загружен ли по пути в хранилище файл с таким же содержимым.
+"""
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class Manifest:
+    """Класс для учета переданных фотографий."""
+    def __init__(self, db_path: str = 'manifest.db') -> None:
+        """
+        Открывает (или создает) базу манифеста.
+
+        Args:
+            db_path (str): Путь к файлу базы SQLite.
+        """
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('''
+                CREATE TABLE IF NOT EXISTS photos (
+                    photo_key TEXT PRIMARY KEY,
+                    file_name TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    size TEXT NOT NULL,
+                    local_path TEXT,
+                    sha256 TEXT,
+                    variant TEXT
+                )
+            ''')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS photos_sha256 ON photos (sha256)')
+            self.connection.execute('''
+                CREATE TABLE IF NOT EXISTS uploads (
+                    photo_key TEXT NOT NULL,
+                    destination TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    remote_path TEXT,
+                    PRIMARY KEY (photo_key, destination)
+                )
+            ''')
+            columns = [row[1] for row in self.connection.execute('PRAGMA table_info(photos)')]
+            if 'variant' not in columns:  # База, созданная до появления перекодирования
+                self.connection.execute('ALTER TABLE photos ADD COLUMN variant TEXT')
+            columns = [row[1] for row in self.connection.execute('PRAGMA table_info(uploads)')]
+            if 'remote_path' not in columns:  # База, созданная до появления пути в хранилище
+                self.connection.execute('ALTER TABLE uploads ADD COLUMN remote_path TEXT')
+
+    @staticmethod
+    def photo_key(photo: Dict[str, Any]) -> str:
+        """
+        Возвращает ключ фотографии.
+
+        Args:
+            photo (Dict[str, Any]): Запись о фотографии из `DownloaderVK.iter_photos`.
+
+        Returns:
+            str: Ключ вида `<owner_id>_<id>`.
+        """
+        return f"{photo['owner_id']}_{photo['id']}"
+
+    def add_photo(self, photo: Dict[str, Any], file_name: str, variant: Optional[str] = None) -> bool:
+        """
+        Регистрирует фотографию в манифесте.
+
+        Если у уже известной фотографии изменился выбранный размер или настройки
+        перекодирования, сохраненные локальный файл и статусы загрузки сбрасываются.
+
+        Args:
+            photo (Dict[str, Any]): Запись о фотографии из `DownloaderVK.iter_photos`.
+            file_name (str): Имя файла фотографии.
+            variant (Optional[str]): Настройки перекодирования из `Recompressor.variant`,
+                None - фотография загружается без перекодирования.
+
+        Returns:
+            bool: True, если фотография новая или изменилась.
+        """
+        key = self.photo_key(photo)
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                'SELECT size, variant FROM photos WHERE photo_key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.connection.execute(
+                    'INSERT INTO photos (photo_key, file_name, url, size, variant) VALUES (?, ?, ?, ?, ?)',
+                    (key, file_name, photo['url'], photo['size'], variant)
+                )
+                return True
+            if row != (photo['size'], variant):
+                self.connection.execute(
+                    'UPDATE photos SET file_name = ?, url = ?, size = ?, variant = ?, local_path = NULL, '
+                    'sha256 = NULL WHERE photo_key = ?',
+                    (file_name, photo['url'], photo['size'], variant, key)
+                )
+                self.connection.execute('DELETE FROM uploads WHERE photo_key = ?', (key,))
+                return True
+            # Подписанные ссылки VK со временем меняются, поэтому URL обновляется всегда
+            self.connection.execute('UPDATE photos SET url = ? WHERE photo_key = ?', (photo['url'], key))
+            return False
+
+    def set_local(self, key: str, local_path: str, sha256: str) -> None:
+        """
+        Сохраняет локальный путь и хэш скачанного файла.
+
+        Args:
+            key (str): Ключ фотографии.
+            local_path (str): Путь к скачанному файлу.
+            sha256 (str): SHA-256 содержимого файла.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                'UPDATE photos SET local_path = ?, sha256 = ? WHERE photo_key = ?',
+                (local_path, sha256, key)
+            )
+
+    def set_sha256(self, key: str, sha256: str) -> None:
+        """
+        Сохраняет хэш скачанного файла, не меняя сохраненный локальный путь.
+
+        Используется для временных файлов, которые удаляются после загрузки в хранилища.
+
+        Args:
+            key (str): Ключ фотографии.
+            sha256 (str): SHA-256 содержимого файла.
+        """
+        with self.lock, self.connection:
+            self.connection.execute('UPDATE photos SET sha256 = ? WHERE photo_key = ?', (sha256, key))
+
+    def get_local(self, key: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Возвращает локальный путь и хэш скачанного файла.
+
+        Args:
+            key (str): Ключ фотографии.
+
+        Returns:
+            Tuple[Optional[str], Optional[str]]: Путь и SHA-256 или (None, None).
+        """
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT local_path, sha256 FROM photos WHERE photo_key = ?', (key,)
+            ).fetchone()
+        return row if row is not None else (None, None)
+
+    def find_by_path(self, local_path: str) -> Optional[str]:
+        """
+        Ищет ключ фотографии по локальному пути.
+
+        Args:
+            local_path (str): Путь к скачанному файлу.
+
+        Returns:
+            Optional[str]: Ключ фотографии или None, если файл не учтен в манифесте.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT photo_key FROM photos WHERE local_path = ?', (local_path,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def set_status(self, key: str, destination: str, status: str, remote_path: Optional[str] = None) -> None:
+        """
+        Сохраняет статус загрузки фотографии в хранилище.
+
+        Args:
+            key (str): Ключ фотографии.
+            destination (str): Название хранилища, например 'yandex' или 'gdrive'.
+            status (str): Статус загрузки: STATUS_DONE или STATUS_FAILED.
+            remote_path (Optional[str]): Путь файла в хранилище, например `<папка>/<имя файла>`.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO uploads (photo_key, destination, status, updated_at, remote_path) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, destination, status, time.time(), remote_path)
+            )
+
+    def is_done(self, key: str, destination: str) -> bool:
+        """
+        Проверяет, загружена ли фотография в хранилище.
+
+        Args:
+            key (str): Ключ фотографии.
+            destination (str): Название хранилища.
+
+        Returns:
+            bool: True, если загрузка уже завершилась успешно.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT status FROM uploads WHERE photo_key = ? AND destination = ?', (key, destination)
+            ).fetchone()
+        return row is not None and row[0] == STATUS_DONE
+
+    def is_hash_done(self, sha256: str, destination: str, remote_path: str) -> bool:
+        """
+        Проверяет, лежит ли уже по пути в хранилище файл с таким же содержимым.
+
+        Учитываются только загрузки с тем же путем: файл с тем же содержимым
+        в другой папке хранилища не означает, что он есть в нужной папке.
+
+        Args:
+            sha256 (str): SHA-256 содержимого.
+            destination (str): Название хранилища.
+            remote_path (str): Путь файла в хранилище.
+
+        Returns:
+            bool: True, если по этому пути успешно загружена фотография с таким SHA-256.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT 1 FROM photos JOIN uploads USING (photo_key) '
+                'WHERE photos.sha256 = ? AND uploads.destination = ? AND uploads.remote_path = ? '
+                'AND uploads.status = ? LIMIT 1',
+                (sha256, destination, remote_path, STATUS_DONE)
+            ).fetchone()
+        return row is not None
+
+    def close(self) -> None:
+        """Закрывает соединение с базой манифеста."""
+        with self.lock:
+            self.connection.close()
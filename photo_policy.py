@@ -0,0 +1,223 @@
+"""
+Модуль выбора размера фотографий и их перекодирования.
+
+Этот модуль предоставляет классы, которые уменьшают объем передаваемых данных:
+- `SizePolicy`: Выбирает вариант фотографии из списка `sizes` ответа VK API
+  по типу размера, ограничению количества пикселей или оценке размера файла.
+  Выбор делается по уже полученному списку, без дополнительных запросов.
+- `Recompressor`: Перекодирует скачанную фотографию в другой формат
+  (например, WebP) с заданным качеством и, при необходимости, уменьшает ее.
+
+Перекодирование использует библиотеку Pillow, которая нужна только при
+создании `Recompressor`: `pip install Pillow`.
+
+Основные методы:
+- `SizePolicy.choose`: Возвращает выбранный вариант фотографии.
+- `Recompressor.variant`: Возвращает строку с настройками перекодирования.
+- `Recompressor.file_name`: Возвращает имя файла с расширением нового формата.
+- `Recompressor.recompress`: Перекодирует файл и возвращает SHA-256 результата.
+"""
+import hashlib
+import os
+from typing import Any, Dict, List, Optional
+
+# Типы размеров VK в порядке возрастания (https://dev.vk.com/reference/objects/photo-sizes)
+SIZE_TYPES = ['s', 'm', 'o', 'p', 'q', 'r', 'x', 'y', 'z', 'w']
+# Наибольшая сторона варианта каждого типа - для старых фотографий без width и height
+NOMINAL_SIDES = {'s': 75, 'm': 130, 'o': 130, 'p': 200, 'q': 320, 'r': 510, 'x': 604, 'y': 807, 'z': 1080, 'w': 2560}
+BYTES_PER_PIXEL = 0.25  # Оценка размера JPEG-файла VK в байтах на пиксель
+FORMAT_EXTENSIONS = {'WEBP': '.webp', 'JPEG': '.jpg', 'PNG': '.png'}
+CHUNK_SIZE = 64 * 1024
+MAX_QUALITY = 95  # Выше 95 Pillow отключает часть сжатия JPEG, а размер растет без заметной пользы
+MAX_DECODE_PIXELS = 50_000_000  # Ограничение распаковываемого изображения (около 200 МБ в RGBA)
+
+
+class SizePolicy:
+    """Класс правила выбора варианта фотографии из списка размеров VK."""
+    def __init__(self, size_type: Optional[str] = None, max_pixels: Optional[int] = None,
+                 max_bytes: Optional[int] = None) -> None:
+        """
+        Инициализирует правило выбора размера.
+
+        Без ограничений выбирается наибольший вариант, как и раньше.
+
+        Args:
+            size_type (Optional[str]): Желаемый тип размера ('x', 'y', 'z', 'w' и т.д.).
+                Если его нет, выбирается наибольший вариант не больше этого типа.
+            max_pixels (Optional[int]): Максимальное количество пикселей (ширина * высота).
+            max_bytes (Optional[int]): Ограничение размера файла в байтах, оцениваемого
+                по количеству пикселей.
+
+        Raises:
+            ValueError: Если указан неизвестный тип размера.
+        """
+        if size_type is not None and size_type not in SIZE_TYPES:
+            raise ValueError(f"Неизвестный тип размера '{size_type}', допустимые: {', '.join(SIZE_TYPES)}")
+        self.size_type = size_type
+        self.max_pixels = max_pixels
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def pixels(size: Dict[str, Any]) -> int:
+        """
+        Возвращает количество пикселей варианта фотографии.
+
+        Args:
+            size (Dict[str, Any]): Элемент списка sizes.
+
+        Returns:
+            int: Ширина * высота; для вариантов без размеров - оценка по типу.
+        """
+        if size.get('width') and size.get('height'):
+            return size['width'] * size['height']
+        side = NOMINAL_SIDES.get(size['type'], 0)
+        return side * side * 3 // 4
+
+    def pixel_limit(self) -> Optional[int]:
+        """
+        Возвращает итоговое ограничение количества пикселей.
+
+        Returns:
+            Optional[int]: Наименьшее из max_pixels и оценки по max_bytes или None.
+        """
+        limits = []
+        if self.max_pixels is not None:
+            limits.append(self.max_pixels)
+        if self.max_bytes is not None:
+            limits.append(int(self.max_bytes / BYTES_PER_PIXEL))
+        return min(limits) if limits else None
+
+    def choose(self, sizes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Выбирает вариант фотографии.
+
+        Среди вариантов, проходящих ограничения, предпочитается вариант желаемого типа,
+        иначе выбирается наибольший. Если ни один вариант не проходит ограничения,
+        выбирается наименьший.
+
+        Args:
+            sizes (List[Dict[str, Any]]): Список sizes из ответа photos.get.
+
+        Returns:
+            Dict[str, Any]: Выбранный элемент списка sizes.
+        """
+        candidates = sizes
+        if self.size_type is not None:
+            rank = SIZE_TYPES.index(self.size_type)
+            candidates = [size for size in sizes
+                          if size['type'] in SIZE_TYPES and SIZE_TYPES.index(size['type']) <= rank]
+        limit = self.pixel_limit()
+        if limit is not None:
+            candidates = [size for size in candidates if self.pixels(size) <= limit]
+        if not candidates:
+            return min(sizes, key=self.pixels)
+        exact = [size for size in candidates if size['type'] == self.size_type]
+        if exact:
+            return exact[-1]
+
+        chosen = candidates[0]
+        for size in candidates:
+            if self.pixels(size) >= self.pixels(chosen):
+                chosen = size
+        return chosen
+
+
+class Recompressor:
+    """Класс перекодирования фотографий с помощью Pillow."""
+    def __init__(self, image_format: str = 'WEBP', quality: int = 80, max_side: Optional[int] = None,
+                 max_pixels: int = MAX_DECODE_PIXELS) -> None:
+        """
+        Инициализирует перекодировщик.
+
+        Args:
+            image_format (str): Формат результата: 'WEBP', 'JPEG' или 'PNG'.
+            quality (int): Качество сжатия от 1 до 95.
+            max_side (Optional[int]): Максимальная сторона изображения, None - без уменьшения.
+            max_pixels (int): Максимальное количество пикселей распаковываемого изображения.
+
+        Raises:
+            ValueError: Если формат не поддерживается или качество вне диапазона 1-95.
+            RuntimeError: Если не установлена библиотека Pillow.
+        """
+        image_format = image_format.upper()
+        if image_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Неподдерживаемый формат '{image_format}', допустимые: {', '.join(FORMAT_EXTENSIONS)}")
+        if not 1 <= quality <= MAX_QUALITY:
+            raise ValueError(f'Качество перекодирования должно быть от 1 до {MAX_QUALITY}, указано {quality}')
+        try:
+            from PIL import Image
+        except ImportError:
+            raise RuntimeError('Для перекодирования фотографий установите библиотеку Pillow: pip install Pillow')
+        self.image = Image
+        self.image_format = image_format
+        self.quality = quality
+        self.max_side = max_side
+        self.max_pixels = max_pixels
+
+    def variant(self) -> str:
+        """
+        Возвращает строку с настройками перекодирования для манифеста.
+
+        Returns:
+            str: Настройки вида 'WEBP:80:1600', при смене которых фотографию нужно обработать заново.
+        """
+        return f'{self.image_format}:{self.quality}:{self.max_side or ""}'
+
+    def file_name(self, file_name: str) -> str:
+        """
+        Возвращает имя файла с расширением нового формата.
+
+        Args:
+            file_name (str): Исходное имя файла.
+
+        Returns:
+            str: Имя файла, например '15.webp' для '15.jpg'.
+        """
+        return os.path.splitext(file_name)[0] + FORMAT_EXTENSIONS[self.image_format]
+
+    def recompress(self, source_path: str, file_path: str) -> str:
+        """
+        Перекодирует фотографию и удаляет исходный файл.
+
+        Результат пишется во временный файл `.part`, который переименовывается
+        после успешного сохранения, а при ошибке удаляется. Изображение
+        распаковывается в память целиком; только JPEG при уменьшении декодируется
+        сразу в уменьшенном масштабе. Поэтому изображения, которые после этого
+        больше max_pixels пикселей, не распаковываются и не перекодируются.
+
+        Args:
+            source_path (str): Путь к скачанной фотографии.
+            file_path (str): Путь для перекодированной фотографии.
+
+        Returns:
+            str: SHA-256 перекодированного файла.
+
+        Raises:
+            OSError: Если файл не удалось прочитать как изображение, он слишком большой
+                или результат не удалось сохранить.
+        """
+        part_path = f'{file_path}.part'
+        try:
+            with self.image.open(source_path) as image:
+                if self.max_side is not None:
+                    image.draft('RGB', (self.max_side, self.max_side))
+                width, height = image.size
+                if width * height > self.max_pixels:
+                    raise OSError(f'Изображение {width}x{height} больше {self.max_pixels} пикселей')
+                if self.max_side is not None:
+                    image.thumbnail((self.max_side, self.max_side))
+                if self.image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                    image = image.convert('RGB')
+                image.save(part_path, self.image_format, quality=self.quality)
+            digest = hashlib.sha256()
+            with open(part_path, 'rb') as file:
+                for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            os.replace(part_path, file_path)
+        except self.image.DecompressionBombError as error:  # Pillow отказался открывать изображение сам
+            raise OSError(str(error)) from error
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        os.remove(source_path)
+        return digest.hexdigest()
@@ -0,0 +1,164 @@
+"""
+Модуль локального хранилища фотографий с адресацией по содержимому.
+
+Этот модуль предоставляет класс `PhotoStore`, который хранит каждую фотографию
+один раз в виде файла, названного по SHA-256 содержимого. Файлы с понятными
+именами (`<лайки>.jpg`) в папках пользователя создаются как жесткие ссылки
+на хранимый файл (или символические ссылки и копии, если жесткие ссылки
+недоступны). Одинаковые фотографии из разных альбомов и аккаунтов занимают
+место на диске один раз, а уже сохраненные фотографии не скачиваются повторно.
+
+Класс `PhotoStore` предлагает следующие функции:
+- Поиск сохраненной фотографии по ключу VK (владелец, ID фотографии, тип размера).
+- Перемещение скачанного файла в хранилище под именем SHA-256.
+- Создание ссылки на хранимый файл в произвольной папке.
+
+Основные методы:
+- `store_key`: Возвращает ключ фотографии вида `<owner_id>_<id>_<size>`.
+- `lookup`: Возвращает SHA-256 сохраненной фотографии или None.
+- `temp_path`: Возвращает путь для временного файла скачивания.
+- `ingest`: Перемещает скачанный файл в хранилище.
+- `add`: Запоминает соответствие ключа фотографии и SHA-256.
+- `link`: Создает файл с понятным именем, ссылающийся на хранимый файл.
+"""
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+from typing import Any, Dict, Optional
+
+
+class PhotoStore:
+    """Класс локального хранилища фотографий с адресацией по содержимому."""
+    def __init__(self, root: str = 'photo_store') -> None:
+        """
+        Открывает (или создает) хранилище.
+
+        Args:
+            root (str): Папка хранилища.
+        """
+        self.root = root
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(root, 'blobs'), exist_ok=True)
+        os.makedirs(os.path.join(root, 'tmp'), exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(root, 'index.db'), check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS photos (store_key TEXT PRIMARY KEY, sha256 TEXT NOT NULL)'
+            )
+
+    @staticmethod
+    def store_key(photo: Dict[str, Any]) -> str:
+        """
+        Возвращает ключ фотографии в хранилище.
+
+        Args:
+            photo (Dict[str, Any]): Запись о фотографии из `DownloaderVK.iter_photos`.
+
+        Returns:
+            str: Ключ вида `<owner_id>_<id>_<size>`.
+        """
+        return f"{photo['owner_id']}_{photo['id']}_{photo['size']}"
+
+    def blob_path(self, sha256: str) -> str:
+        """
+        Возвращает путь к хранимому файлу.
+
+        Args:
+            sha256 (str): SHA-256 содержимого.
+
+        Returns:
+            str: Путь вида `<root>/blobs/ab/abcdef...`.
+        """
+        return os.path.join(self.root, 'blobs', sha256[:2], sha256)
+
+    def lookup(self, photo: Dict[str, Any]) -> Optional[str]:
+        """
+        Ищет сохраненную фотографию.
+
+        Args:
+            photo (Dict[str, Any]): Запись о фотографии.
+
+        Returns:
+            Optional[str]: SHA-256 фотографии, если она есть в хранилище, иначе None.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT sha256 FROM photos WHERE store_key = ?', (self.store_key(photo),)
+            ).fetchone()
+        if row is None or not os.path.exists(self.blob_path(row[0])):
+            return None
+        return row[0]
+
+    def temp_path(self) -> str:
+        """
+        Возвращает путь для временного файла скачивания внутри хранилища.
+
+        Временный файл находится на той же файловой системе, поэтому `ingest`
+        перемещает его без копирования.
+
+        Returns:
+            str: Путь к временному файлу.
+        """
+        return os.path.join(self.root, 'tmp', uuid.uuid4().hex)
+
+    def ingest(self, temp_path: str, sha256: str) -> str:
+        """
+        Перемещает скачанный файл в хранилище.
+
+        Если файл с таким содержимым уже хранится, временный файл удаляется.
+
+        Args:
+            temp_path (str): Путь к скачанному файлу.
+            sha256 (str): SHA-256 содержимого.
+
+        Returns:
+            str: Путь к хранимому файлу.
+        """
+        blob_path = self.blob_path(sha256)
+        if os.path.exists(blob_path):
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(temp_path, blob_path)
+        return blob_path
+
+    def add(self, photo: Dict[str, Any], sha256: str) -> None:
+        """
+        Запоминает соответствие ключа фотографии и SHA-256.
+
+        Args:
+            photo (Dict[str, Any]): Запись о фотографии.
+            sha256 (str): SHA-256 содержимого.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO photos (store_key, sha256) VALUES (?, ?)', (self.store_key(photo), sha256)
+            )
+
+    def link(self, sha256: str, file_path: str) -> None:
+        """
+        Создает файл с понятным именем, ссылающийся на хранимый файл.
+
+        Пробует жесткую ссылку, затем символическую ссылку, затем копирование.
+
+        Args:
+            sha256 (str): SHA-256 содержимого.
+            file_path (str): Путь к создаваемому файлу.
+        """
+        blob_path = self.blob_path(sha256)
+        if os.path.lexists(file_path):
+            os.remove(file_path)
+        try:
+            os.link(blob_path, file_path)
+        except OSError:
+            try:
+                os.symlink(os.path.abspath(blob_path), file_path)
+            except OSError:
+                shutil.copyfile(blob_path, file_path)
+
+    def close(self) -> None:
+        """Закрывает индекс хранилища."""
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,478 @@
+"""
+Модуль конвейерной передачи фотографий из ВКонтакте в хранилища.
+
+Этот модуль предоставляет класс `TransferPipeline`, который связывает получение
+списка фотографий, их скачивание и загрузку в каждое выбранное хранилище через
+ограниченные очереди. Каждая фотография передается в хранилища сразу, как только
+она получена, скачивается не более одного раза и раздается всем хранилищам,
+которым нужен локальный файл. Ограниченный размер очередей удерживает потребление
+памяти постоянным: если хранилище не успевает, приостанавливаются предыдущие стадии.
+При наличии `PhotoStore` уже сохраненные фотографии не скачиваются повторно,
+а с флагом `dedupe_uploads` не загружаются повторно файлы с тем же содержимым
+по тому же пути в хранилище.
+При наличии `Recompressor` скачанные фотографии перекодируются (например, в WebP)
+перед передачей в хранилища.
+
+Хранилища описываются классами-наследниками `Sink`:
+- `LocalSink`: Оставляет скачанные файлы в локальной папке.
+- `YandexSink`: Загружает фотографии на Яндекс.Диск по URL (без скачивания) или из файла.
+  Если Диск не смог скачать фотографию сам, она передается потоком через этот процесс.
+- `GoogleDriveSink`: Загружает скачанные файлы в папку Google Drive, пропуская уже имеющиеся в ней.
+
+Основные методы:
+- `TransferPipeline.stages`: Возвращает названия стадий для трекера прогресса.
+- `TransferPipeline.run`: Запускает конвейер и возвращает результаты по каждому хранилищу.
+"""
+import contextlib
+import os
+import queue
+import shutil
+import sqlite3
+import tempfile
+import threading
+import requests
+import json_dumper
+from downloader_vk import DownloaderVK
+from instrumentation import get_instrumentation
+from manifest import Manifest, STATUS_DONE, STATUS_FAILED
+from photo_store import PhotoStore
+from photo_policy import Recompressor
+from progress import ProgressTracker
+from uploader_gd import UploaderGD, file_md5
+from uploader_yd import UploaderYD
+from typing import Any, Dict, List, Optional, Set
+
+_STOP = object()  # Маркер завершения очереди
+
+
+class Sink:
+    """Базовый класс хранилища для конвейера."""
+    name = ''
+    needs_file = True  # Нужен ли хранилищу скачанный локальный файл
+
+    def __init__(self, workers: int = 4) -> None:
+        """
+        Инициализирует хранилище.
+
+        Args:
+            workers (int): Количество потоков, загружающих файлы в хранилище.
+        """
+        self.workers = workers
+
+    def send(self, file_name: str, file_path: Optional[str], photo: Dict[str, Any]) -> bool:
+        """
+        Передает одну фотографию в хранилище.
+
+        Args:
+            file_name (str): Имя файла фотографии.
+            file_path (Optional[str]): Путь к скачанному файлу или None, если файл не нужен хранилищу.
+            photo (Dict[str, Any]): Запись о фотографии из `DownloaderVK.iter_photos`.
+
+        Returns:
+            bool: Успешность передачи.
+        """
+        raise NotImplementedError
+
+    def remote_path(self, file_name: str) -> str:
+        """
+        Возвращает путь файла в хранилище для учета загрузок в манифесте.
+
+        Args:
+            file_name (str): Имя файла фотографии.
+
+        Returns:
+            str: Путь, однозначно определяющий место файла в хранилище.
+        """
+        return file_name
+
+
+class LocalSink(Sink):
+    """Хранилище, оставляющее скачанные файлы в локальной папке."""
+    name = 'local'
+
+    def send(self, file_name: str, file_path: Optional[str], photo: Dict[str, Any]) -> bool:
+        return True
+
+
+class YandexSink(Sink):
+    """Хранилище Яндекс.Диск."""
+    name = 'yandex'
+
+    def __init__(self, uploader: UploaderYD, from_file: bool = False, workers: int = 8) -> None:
+        """
+        Инициализирует хранилище Яндекс.Диск.
+
+        Args:
+            uploader (UploaderYD): Загрузчик на Яндекс.Диск с созданной папкой.
+            from_file (bool): Загружать скачанный файл вместо загрузки по URL на стороне Диска.
+            workers (int): Количество потоков загрузки.
+        """
+        super().__init__(workers)
+        self.uploader = uploader
+        self.from_file = from_file
+        self.needs_file = from_file
+
+    def send(self, file_name: str, file_path: Optional[str], photo: Dict[str, Any]) -> bool:
+        if self.from_file:
+            return self.uploader.upload_file(file_name, file_path)
+        operation_href = self.uploader.upload_from_url(file_name, photo['url'])
+        if operation_href is not None and self.uploader.wait_operation(file_name, operation_href):
+            return True
+        # Диск не смог скачать файл сам - передаем его потоком через этот процесс
+        return self.uploader.relay(file_name, photo['url'])
+
+    def remote_path(self, file_name: str) -> str:
+        return f'{self.uploader.folder_name}/{file_name}'
+
+
+class GoogleDriveSink(Sink):
+    """Хранилище Google Drive."""
+    name = 'gdrive'
+
+    def __init__(self, uploader: UploaderGD, folder_id: str, workers: int = 4) -> None:
+        """
+        Инициализирует хранилище Google Drive.
+
+        Args:
+            uploader (UploaderGD): Загрузчик в Google Drive.
+            folder_id (str): Идентификатор папки в Google Drive.
+            workers (int): Количество потоков загрузки.
+        """
+        super().__init__(workers)
+        self.uploader = uploader
+        self.folder_id = folder_id
+        self.existing_files = uploader.list_files(folder_id)
+
+    def send(self, file_name: str, file_path: Optional[str], photo: Dict[str, Any]) -> bool:
+        if self.existing_files.get(file_name) == file_md5(file_path):
+            return True
+        return bool(self.uploader.upload_file(self.folder_id, file_path, file_name))
+
+    def remote_path(self, file_name: str) -> str:
+        return f'{self.folder_id}/{file_name}'
+
+
+class TransferPipeline:
+    """Класс конвейерной передачи фотографий через ограниченные очереди."""
+    def __init__(self, downloader: DownloaderVK, sinks: List[Sink], download_workers: int = 8,
+                 queue_size: int = 32, manifest: Optional[Manifest] = None,
+                 progress: Optional[ProgressTracker] = None, store: Optional[PhotoStore] = None,
+                 dedupe_uploads: bool = False, album_id: str = 'profile',
+                 budget: Optional[threading.Semaphore] = None,
+                 recompressor: Optional[Recompressor] = None) -> None:
+        """
+        Инициализирует конвейер.
+
+        Args:
+            downloader (DownloaderVK): Загрузчик ВКонтакте с указанной папкой для скачивания.
+            sinks (List[Sink]): Хранилища, в которые передаются фотографии.
+            download_workers (int): Количество потоков скачивания.
+            queue_size (int): Максимальный размер каждой очереди между стадиями.
+            manifest (Optional[Manifest]): Манифест для пропуска уже переданных фотографий.
+            progress (Optional[ProgressTracker]): Трекер прогресса со стадиями из `stages`.
+            store (Optional[PhotoStore]): Хранилище с адресацией по содержимому для пропуска
+                уже скачанных фотографий.
+            dedupe_uploads (bool): Не загружать в хранилище файл, если файл с тем же SHA-256
+                уже загружен по манифесту по тому же пути (например, из другого альбома в ту же папку).
+            album_id (str): Альбом: 'profile', 'wall', 'saved' или ID альбома.
+            budget (Optional[threading.Semaphore]): Общий для нескольких конвейеров семафор,
+                ограничивающий количество одновременных скачиваний и загрузок.
+            recompressor (Optional[Recompressor]): Перекодировщик скачанных фотографий. Хранилищам,
+                которые загружают фотографии по URL без скачивания, перекодирование недоступно.
+        """
+        self.downloader = downloader
+        self.sinks = sinks
+        self.download_workers = download_workers
+        self.queue_size = queue_size
+        self.manifest = manifest
+        self.progress = progress
+        self.store = store
+        self.dedupe_uploads = dedupe_uploads
+        self.album_id = album_id
+        self.budget = budget if budget is not None else contextlib.nullcontext()
+        self.recompressor = recompressor
+        self.keep_files = any(isinstance(sink, LocalSink) for sink in sinks)
+        self.work_dir: Optional[str] = None  # Временная папка для файлов, которые не нужно сохранять
+        self.lock = threading.Lock()
+        self.results: Dict[str, Dict[str, bool]] = {sink.name: {} for sink in sinks}
+        self.file_refs: Dict[str, int] = {}
+        self.owned_files: Set[str] = set()  # Файлы, скачанные этим запуском во временную папку
+
+    @staticmethod
+    def stages(sinks: List[Sink]) -> List[str]:
+        """
+        Возвращает названия стадий конвейера для трекера прогресса.
+
+        Args:
+            sinks (List[Sink]): Хранилища конвейера.
+
+        Returns:
+            List[str]: 'download', если хранилищам нужны файлы, и названия хранилищ.
+        """
+        download = ['download'] if any(sink.needs_file for sink in sinks) else []
+        return download + [sink.name for sink in sinks]
+
+    def run(self, count: Optional[int] = None) -> Dict[str, Dict[str, bool]]:
+        """
+        Запускает конвейер и дожидается его завершения.
+
+        Args:
+            count (Optional[int]): Количество фотографий, None - все фотографии альбома.
+
+        Returns:
+            Dict[str, Dict[str, bool]]: Для каждого хранилища - успешность передачи каждого файла.
+        """
+        file_sinks = [sink for sink in self.sinks if sink.needs_file]
+        if file_sinks and self.keep_files:
+            os.makedirs(self.downloader.folder_name, exist_ok=True)
+        elif file_sinks:
+            # Без локального хранилища файлы скачиваются вне папки пользователя и удаляются после загрузки
+            self.work_dir = tempfile.mkdtemp(prefix='vk_backup_')
+
+        download_queue = queue.Queue(self.queue_size)
+        sink_queues = {sink.name: queue.Queue(self.queue_size) for sink in self.sinks}
+
+        threads = []
+        for sink in self.sinks:
+            for _ in range(sink.workers):
+                threads.append(threading.Thread(target=self.sink_worker, args=(sink, sink_queues[sink.name])))
+        download_threads = [
+            threading.Thread(target=self.download_worker, args=(download_queue, sink_queues))
+            for _ in range(self.download_workers if file_sinks else 0)
+        ]
+        for thread in threads + download_threads:
+            thread.start()
+
+        try:
+            with get_instrumentation().span('enumerate', count=count), \
+                    json_dumper.StreamJSON(self.downloader.json_file) as json_dump:
+                photos = self.downloader.name_photos(self.downloader.iter_photos(count, album_id=self.album_id))
+                enumerated = 0
+                variant = self.recompressor.variant() if self.recompressor is not None else None
+                for file_name, photo in photos:
+                    enumerated += 1
+                    json_dump.add(self.downloader.json_record(photo))
+                    if self.manifest is not None:
+                        self.manifest.add_photo(photo, file_name, variant)
+                    pending_file_sinks = []
+                    for sink in self.sinks:
+                        if self.is_done(photo, sink):
+                            self.report(sink.name)
+                        elif sink.needs_file:
+                            pending_file_sinks.append(sink)
+                        else:
+                            sink_queues[sink.name].put((file_name, None, photo))
+                    if pending_file_sinks:
+                        download_queue.put((file_name, photo, pending_file_sinks))
+                    elif file_sinks:
+                        self.report('download')
+            if self.progress is not None:
+                self.progress.set_total(enumerated)
+        finally:
+            for _ in download_threads:
+                download_queue.put(_STOP)
+            for thread in download_threads:
+                thread.join()
+            for sink in self.sinks:
+                for _ in range(sink.workers):
+                    sink_queues[sink.name].put(_STOP)
+            for thread in threads:
+                thread.join()
+            if self.work_dir is not None:
+                shutil.rmtree(self.work_dir, ignore_errors=True)
+                self.work_dir = None
+        return self.results
+
+    def is_done(self, photo: Dict[str, Any], sink: Sink) -> bool:
+        """
+        Проверяет по манифесту, передана ли фотография в хранилище.
+
+        Args:
+            photo (Dict[str, Any]): Запись о фотографии.
+            sink (Sink): Хранилище.
+
+        Returns:
+            bool: True, если фотографию передавать не нужно.
+        """
+        if self.manifest is None or isinstance(sink, LocalSink):
+            return False
+        return self.manifest.is_done(self.manifest.photo_key(photo), sink.name)
+
+    def is_duplicate(self, file_name: str, file_path: Optional[str], photo: Dict[str, Any], sink: Sink) -> bool:
+        """
+        Проверяет, загружен ли уже по тому же пути в хранилище файл с тем же содержимым.
+
+        Args:
+            file_name (str): Имя файла фотографии.
+            file_path (Optional[str]): Путь к скачанному файлу.
+            photo (Dict[str, Any]): Запись о фотографии.
+            sink (Sink): Хранилище.
+
+        Returns:
+            bool: True, если загрузку можно пропустить.
+        """
+        if not self.dedupe_uploads or self.manifest is None or file_path is None:
+            return False
+        _, sha256 = self.manifest.get_local(self.manifest.photo_key(photo))
+        return sha256 is not None and self.manifest.is_hash_done(sha256, sink.name, sink.remote_path(file_name))
+
+    def download_worker(self, download_queue: queue.Queue, sink_queues: Dict[str, queue.Queue]) -> None:
+        """
+        Скачивает фотографии и раздает их хранилищам, которым нужен локальный файл.
+
+        Args:
+            download_queue (queue.Queue): Очередь фотографий для скачивания.
+            sink_queues (Dict[str, queue.Queue]): Очереди хранилищ.
+        """
+        while True:
+            task = download_queue.get()
+            if task is _STOP:
+                return
+            file_name, photo, pending_sinks = task
+            try:
+                if self.recompressor is not None:
+                    file_name = self.recompressor.file_name(file_name)
+                file_path = self.download(file_name, photo)
+            except Exception as error:  # Остановка потока оставила бы конвейер ждать на заполненной очереди
+                print(f'Ошибка при скачивании файла {file_name}: {error}')
+                self.report('download', failed=True)
+                file_path = None
+            if file_path is None:
+                for sink in pending_sinks:
+                    self.record(sink, file_name, photo, False)
+                continue
+            with self.lock:
+                self.file_refs[file_path] = len(pending_sinks)
+            for sink in pending_sinks:
+                sink_queues[sink.name].put((file_name, file_path, photo))
+
+    def download(self, file_name: str, photo: Dict[str, Any]) -> Optional[str]:
+        """
+        Скачивает фотографию, если она еще не скачана, и перекодирует ее при наличии перекодировщика.
+
+        С локальным хранилищем файл сохраняется в папку пользователя, иначе - во временную
+        папку запуска. Файл, скачанный в одном из прошлых запусков и учтенный в манифесте,
+        используется повторно и после загрузки не удаляется.
+
+        Args:
+            file_name (str): Имя файла фотографии.
+            photo (Dict[str, Any]): Запись о фотографии.
+
+        Returns:
+            Optional[str]: Путь к файлу или None, если скачать не удалось.
+        """
+        if self.keep_files:
+            file_path = f'{self.downloader.folder_name}/{file_name}'
+        else:
+            file_path = os.path.join(self.work_dir, file_name)
+        if self.manifest is not None:
+            local_path, _ = self.manifest.get_local(self.manifest.photo_key(photo))
+            reusable = local_path == file_path or not self.keep_files and local_path is not None \
+                and os.path.basename(local_path) == file_name
+            if reusable and os.path.exists(local_path):
+                self.report('download')
+                return local_path
+        source_path = file_path if self.recompressor is None else f'{file_path}.source'
+        try:
+            with self.budget:
+                written, sha256 = self.downloader.download_photo(photo, source_path, self.store)
+                if self.recompressor is not None:
+                    with get_instrumentation().span('recompress', file=file_name):
+                        sha256 = self.recompressor.recompress(source_path, file_path)
+        except (requests.RequestException, OSError) as error:
+            if source_path != file_path and os.path.exists(source_path):
+                os.remove(source_path)
+            print(f'Ошибка при скачивании файла {file_name}: {error}')
+            self.report('download', failed=True)
+            return None
+        self.report('download', written)
+        if self.manifest is not None:
+            key = self.manifest.photo_key(photo)
+            if self.keep_files:
+                self.manifest.set_local(key, file_path, sha256)
+                self.manifest.set_status(key, 'local', STATUS_DONE)
+            else:
+                self.manifest.set_sha256(key, sha256)
+        if not self.keep_files:
+            with self.lock:
+                self.owned_files.add(file_path)
+        if self.progress is None:
+            print(f'Скачано фото из VK, файл: {file_name}')
+        return file_path
+
+    def sink_worker(self, sink: Sink, sink_queue: queue.Queue) -> None:
+        """
+        Передает фотографии из очереди в хранилище.
+
+        Args:
+            sink (Sink): Хранилище.
+            sink_queue (queue.Queue): Очередь хранилища.
+        """
+        while True:
+            task = sink_queue.get()
+            if task is _STOP:
+                return
+            file_name, file_path, photo = task
+            try:
+                with self.budget, get_instrumentation().span(sink.name, file=file_name):
+                    success = self.is_duplicate(file_name, file_path, photo, sink) or sink.send(file_name, file_path, photo)
+            except Exception as error:  # Ошибка одного файла не должна останавливать хранилище
+                print(f"Ошибка при передаче файла '{file_name}' в хранилище {sink.name}: {error}")
+                success = False
+            nbytes = os.path.getsize(file_path) if file_path is not None and success else 0
+            self.record(sink, file_name, photo, success, nbytes)
+            if file_path is not None:
+                self.release(file_path)
+
+    def record(self, sink: Sink, file_name: str, photo: Dict[str, Any], success: bool, nbytes: int = 0) -> None:
+        """
+        Сохраняет результат передачи фотографии в хранилище.
+
+        Args:
+            sink (Sink): Хранилище.
+            file_name (str): Имя файла фотографии.
+            photo (Dict[str, Any]): Запись о фотографии.
+            success (bool): Успешность передачи.
+            nbytes (int): Количество переданных байт.
+        """
+        with self.lock:
+            self.results[sink.name][file_name] = success
+        self.report(sink.name, nbytes, failed=not success)
+        if self.manifest is not None and not isinstance(sink, LocalSink):
+            try:
+                self.manifest.set_status(self.manifest.photo_key(photo), sink.name,
+                                         STATUS_DONE if success else STATUS_FAILED, sink.remote_path(file_name))
+            except sqlite3.Error as error:  # Результат уже учтен в results, поток хранилища продолжает работу
+                print(f"Ошибка записи в манифест для файла '{file_name}': {error}")
+
+    def report(self, stage: str, nbytes: int = 0, failed: bool = False) -> None:
+        """
+        Передает результат обработки файла на стадии в трекер прогресса, если он задан.
+
+        Args:
+            stage (str): Название стадии.
+            nbytes (int): Количество переданных байт.
+            failed (bool): Завершилась ли обработка ошибкой.
+        """
+        if self.progress is not None:
+            self.progress.update(stage, nbytes, failed)
+
+    def release(self, file_path: str) -> None:
+        """
+        Удаляет скачанный файл, когда его обработали все хранилища.
+
+        Удаляются только файлы, скачанные этим запуском во временную папку;
+        файлы в папке пользователя и файлы прошлых запусков не удаляются.
+
+        Args:
+            file_path (str): Путь к скачанному файлу.
+        """
+        with self.lock:
+            self.file_refs[file_path] -= 1
+            if self.file_refs[file_path]:
+                return
+            del self.file_refs[file_path]
+            if file_path not in self.owned_files:
+                return
+            self.owned_files.discard(file_path)
+        os.remove(file_path)
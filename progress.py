@@ -0,0 +1,175 @@
+"""
+Модуль для отображения прогресса передачи фотографий.
+
+Этот модуль предоставляет класс `ProgressTracker`, который собирает статистику
+передачи по стадиям (скачивание, загрузка в каждое хранилище) и отображает один
+общий прогресс бар для всего запуска. Потоки-исполнители только увеличивают
+счетчики под блокировкой за O(1), а отрисовка выполняется отдельным фоновым
+потоком с заданным интервалом, поэтому не задерживает передачу файлов.
+
+Класс `ProgressTracker` предлагает следующие функции:
+- Учет количества файлов, байт и ошибок для каждой стадии.
+- Расчет скорости в файлах и байтах в секунду и оставшегося времени.
+- Отображение общего прогресс бара или периодической строки лога.
+
+Основные методы:
+- `set_total`: Задает ожидаемое количество фотографий.
+- `update`: Учитывает обработанный файл на стадии.
+- `snapshot`: Возвращает текущую статистику по стадиям.
+- `summary`: Формирует строку со статистикой.
+- `start`, `finish`: Запускают и останавливают фоновую отрисовку.
+"""
+import sys
+import threading
+import time
+import progressbar
+from typing import Any, Dict, List
+
+
+class StatsWidget(progressbar.Widget):
+    """Виджет прогресс бара со статистикой по стадиям."""
+    TIME_SENSITIVE = True
+
+    def __init__(self, tracker: 'ProgressTracker') -> None:
+        self.tracker = tracker
+
+    def update(self, pbar: progressbar.ProgressBar) -> str:
+        return self.tracker.summary()
+
+
+class ProgressTracker:
+    """Класс для сбора статистики и отображения прогресса передачи."""
+    def __init__(self, stages: List[str], total: int = 0, interval: float = 0.5, show_bar: bool = True,
+                 label: str = '') -> None:
+        """
+        Инициализирует трекер прогресса.
+
+        Args:
+            stages (List[str]): Названия стадий, например ['download', 'yandex'].
+            total (int): Ожидаемое количество фотографий.
+            interval (float): Интервал обновления отображения в секундах.
+            show_bar (bool): Показывать прогресс бар; иначе печатать строку лога.
+            label (str): Подпись строк лога, например имя задания.
+        """
+        self.stages = stages
+        self.total = total
+        self.interval = interval
+        self.show_bar = show_bar
+        self.label = label
+        self.lock = threading.Lock()
+        self.stats = {stage: {'files': 0, 'bytes': 0, 'failed': 0} for stage in stages}
+        self.start_time = time.monotonic()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.bar = None
+
+    def set_total(self, total: int) -> None:
+        """
+        Задает ожидаемое количество фотографий.
+
+        Args:
+            total (int): Количество фотографий.
+        """
+        with self.lock:
+            self.total = total
+
+    def update(self, stage: str, nbytes: int = 0, failed: bool = False) -> None:
+        """
+        Учитывает обработанный файл на стадии.
+
+        Args:
+            stage (str): Название стадии.
+            nbytes (int): Количество переданных байт.
+            failed (bool): Завершилась ли обработка файла ошибкой.
+        """
+        with self.lock:
+            stats = self.stats[stage]
+            if failed:
+                stats['failed'] += 1
+            else:
+                stats['files'] += 1
+                stats['bytes'] += nbytes
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Возвращает текущую статистику.
+
+        Returns:
+            Dict[str, Any]: Общее количество, доля выполнения, прошедшее время
+            и статистика по стадиям со скоростями.
+        """
+        with self.lock:
+            stats = {stage: dict(values) for stage, values in self.stats.items()}
+            total = self.total
+        elapsed = max(time.monotonic() - self.start_time, 1e-6)
+        processed = sum(values['files'] + values['failed'] for values in stats.values())
+        expected = total * len(self.stages)
+        fraction = min(processed / expected, 1.0) if expected else 0.0
+        for values in stats.values():
+            values['files_per_sec'] = values['files'] / elapsed
+            values['bytes_per_sec'] = values['bytes'] / elapsed
+        eta = elapsed * (1 - fraction) / fraction if fraction else None
+        return {'total': total, 'fraction': fraction, 'elapsed': elapsed, 'eta': eta, 'stages': stats}
+
+    def summary(self) -> str:
+        """
+        Формирует строку со статистикой по стадиям.
+
+        Returns:
+            str: Строка вида 'download 10/50 1.2ф/с 0.3МБ/с ош:0 | ...'.
+        """
+        snapshot = self.snapshot()
+        parts = []
+        for stage, values in snapshot['stages'].items():
+            parts.append(
+                f"{stage} {values['files']}/{snapshot['total']} "
+                f"{values['files_per_sec']:.1f}ф/с {values['bytes_per_sec'] / 2 ** 20:.1f}МБ/с "
+                f"ош:{values['failed']}"
+            )
+        return ' | '.join(parts)
+
+    def render(self) -> None:
+        """Отображает текущий прогресс."""
+        snapshot = self.snapshot()
+        if self.show_bar:
+            self.bar.update(int(snapshot['fraction'] * 1000))
+        else:
+            eta = f"{snapshot['eta']:.0f} с" if snapshot['eta'] is not None else '?'
+            label = f'{self.label} ' if self.label else ''
+            print(f"{label}[{snapshot['fraction']:.0%} осталось {eta}] {self.summary()}", file=sys.stderr)
+
+    def run(self) -> None:
+        """Периодически отображает прогресс до вызова `finish`."""
+        while not self.stopped.wait(self.interval):
+            self.render()
+
+    def start(self) -> 'ProgressTracker':
+        """
+        Запускает фоновую отрисовку прогресса.
+
+        Returns:
+            ProgressTracker: Этот же трекер.
+        """
+        self.start_time = time.monotonic()
+        if self.show_bar:
+            widgets = [progressbar.Percentage(), ' ', progressbar.Bar(), ' ', progressbar.ETA(), ' ',
+                       StatsWidget(self)]
+            self.bar = progressbar.ProgressBar(maxval=1000, widgets=widgets).start()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def finish(self) -> None:
+        """Останавливает фоновую отрисовку и выводит итоговую статистику."""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.render()
+        if self.show_bar:
+            self.bar.finish()
+
+    def __enter__(self) -> 'ProgressTracker':
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.finish()
@@ -0,0 +1,465 @@
+"""
+Модуль общего слоя HTTP-запросов.
+
+Этот модуль предоставляет класс `RequestScheduler`, через который выполняются все
+сетевые запросы к VK API, CDN ВКонтакте и Яндекс.Диску. Планировщик держит одну
+пуловую keep-alive сессию, повторяет запросы при временных ошибках и соблюдает
+ограничение VK API на количество запросов в секунду.
+
+Класс `RequestScheduler` предлагает следующие функции:
+- Повтор запросов при ошибках соединения, обрыве тела ответа и ответах 429/5xx
+  с экспоненциальной задержкой со случайным разбросом (jitter).
+- Тайм-ауты соединения и чтения по умолчанию, чтобы зависшее соединение
+  не блокировало поток навсегда.
+- Учет заголовка `Retry-After`.
+- Ограничение частоты вызовов VK API (ошибка 6 «Too many requests per second»).
+- Преобразование ошибок VK API в исключение `VKAPIError`.
+- Измерение времени DNS, соединения, TLS, ожидания ответа и передачи тела
+  каждого запроса через `instrumentation`, если измерения включены.
+
+Основные методы:
+- `request`: Выполняет HTTP-запрос с повторами.
+- `get`, `put`, `post`: Сокращения для `request`.
+- `finish`: Завершает измерение запроса с потоковым (stream=True) ответом.
+- `vk_api`: Вызывает метод VK API с учетом ограничения частоты и возвращает поле `response`.
+- `get_default_scheduler`: Возвращает общий для процесса планировщик.
+
+Чистые функции без ввода-вывода, общие для `RequestScheduler` и его асинхронного
+аналога `async_clients.AsyncRequestScheduler`:
+- `retry_delay`: Вычисляет задержку перед повтором по номеру попытки и `Retry-After`.
+- `body_position`, `is_one_shot`: Определяют, можно ли перемотать тело запроса для повтора.
+- `vk_api_params`: Дополняет параметры метода VK API версией API.
+- `response_json`: Разбирает тело ответа как JSON, возвращая None для тела не в формате JSON.
+- `vk_error`: Извлекает ошибку из ответа VK API.
+"""
+import random
+import socket
+import threading
+import time
+import requests
+from email.utils import parsedate_to_datetime
+from instrumentation import body_size, current_request, get_instrumentation
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+POOL_SIZE = 32  # Максимальное количество keep-alive соединений в сессии
+VK_API_URL = 'https://api.vk.com/method'
+VK_API_VERSION = '5.131'
+VK_REQUESTS_PER_SECOND = 3  # Ограничение VK API для пользовательского токена
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+TIMEOUT = (10.0, 60.0)  # Тайм-ауты (соединение, чтение) по умолчанию в секундах
+VK_RETRY_ERRORS = {1, 6, 9, 10}  # Неизвестная, слишком частые запросы, flood control, внутренняя ошибка
+
+
+class VKAPIError(Exception):
+    """Ошибка, возвращенная VK API."""
+    def __init__(self, code: int, message: str) -> None:
+        """
+        Инициализирует исключение VKAPIError.
+
+        Args:
+            code (int): Код ошибки VK API.
+            message (str): Текст ошибки VK API.
+        """
+        super().__init__(f'VK API error {code}: {message}')
+        self.code = code
+        self.message = message
+
+    @property
+    def retryable(self) -> bool:
+        """Можно ли повторить вызов: ошибка частоты запросов или временная ошибка сервера."""
+        return self.code in VK_RETRY_ERRORS
+
+
+def retry_delay(attempt: int, backoff: float, max_backoff: float, headers: Optional[Mapping[str, str]] = None) -> float:
+    """
+    Вычисляет задержку перед повтором запроса.
+
+    Если сервер прислал заголовок `Retry-After` (в секундах или в виде даты),
+    используется он, иначе - экспоненциальная задержка со случайным разбросом.
+
+    Args:
+        attempt (int): Номер попытки, начиная с нуля.
+        backoff (float): Базовая задержка в секундах.
+        max_backoff (float): Максимальная задержка в секундах.
+        headers (Optional[Mapping[str, str]]): Заголовки ответа сервера, если он был получен.
+
+    Returns:
+        float: Задержка в секундах.
+    """
+    if headers is not None and 'Retry-After' in headers:
+        retry_after = headers['Retry-After']
+        try:
+            return min(max_backoff, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                return min(max_backoff, max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()))
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+
+
+def body_position(data: Any) -> Optional[int]:
+    """
+    Возвращает позицию файлового тела запроса, к которой его нужно перемотать перед повтором.
+
+    Args:
+        data (Any): Тело запроса.
+
+    Returns:
+        Optional[int]: Текущая позиция или None, если тело - не файловый объект.
+    """
+    return data.tell() if hasattr(data, 'seek') and hasattr(data, 'tell') else None
+
+
+def is_one_shot(data: Any) -> bool:
+    """
+    Проверяет, что тело запроса - итератор, который можно передать только один раз.
+
+    Args:
+        data (Any): Тело запроса.
+
+    Returns:
+        bool: True для синхронного или асинхронного итератора без возможности перемотки.
+    """
+    return body_position(data) is None and (hasattr(data, '__next__') or hasattr(data, '__anext__'))
+
+
+def vk_api_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Дополняет параметры метода VK API версией API.
+
+    Args:
+        params (Dict[str, Any]): Параметры метода, включая access_token.
+
+    Returns:
+        Dict[str, Any]: Параметры запроса.
+    """
+    return {'v': VK_API_VERSION, **params}
+
+
+def response_json(response: Any) -> Optional[Any]:
+    """
+    Разбирает тело ответа как JSON.
+
+    Args:
+        response (Any): Ответ requests или httpx.
+
+    Returns:
+        Optional[Any]: Разобранное тело или None, если тело пустое или не в формате JSON,
+        например HTML-страница ошибки прокси.
+    """
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def vk_error(result: Dict[str, Any]) -> Optional[VKAPIError]:
+    """
+    Извлекает ошибку из разобранного JSON-ответа VK API.
+
+    Args:
+        result (Dict[str, Any]): Ответ VK API.
+
+    Returns:
+        Optional[VKAPIError]: Ошибка или None, если ответ содержит поле `response`.
+    """
+    if 'error' not in result:
+        return None
+    error = result['error']
+    return VKAPIError(error.get('error_code'), error.get('error_msg', ''))
+
+
+class RateLimiter:
+    """Класс для ограничения частоты запросов между потоками."""
+    def __init__(self, rate: float) -> None:
+        """
+        Инициализирует ограничитель частоты.
+
+        Args:
+            rate (float): Максимальное количество запросов в секунду.
+        """
+        self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def reserve(self) -> float:
+        """
+        Резервирует время для следующего запроса.
+
+        Returns:
+            float: Сколько секунд нужно подождать до выполнения запроса.
+        """
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_time)
+            self.next_time = slot + self.interval
+        return slot - now
+
+    def wait(self) -> None:
+        """Блокирует поток до момента, когда можно выполнить следующий запрос."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class TimedHTTPConnection(HTTPConnection):
+    """HTTP-соединение, измеряющее время DNS и установки соединения."""
+    def _new_conn(self) -> socket.socket:
+        record = current_request()
+        if record is None:
+            return super()._new_conn()
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror:
+            return super()._new_conn()  # Ошибку разрешения имени сформирует urllib3
+        resolved = time.perf_counter()
+        dns_host = self._dns_host
+        error: Exception = NewConnectionError(self, f'Не найдено адресов для {dns_host}')
+        try:
+            for *_, address in addresses:
+                self._dns_host = address[0]
+                try:
+                    sock = super()._new_conn()
+                    break
+                except (NewConnectionError, ConnectTimeoutError, OSError) as connection_error:
+                    error = connection_error  # Пробуем следующий адрес
+            else:
+                raise error
+        finally:
+            self._dns_host = dns_host
+        self.dns_time = resolved - start
+        self.connect_time = time.perf_counter() - resolved
+        record['dns'] += self.dns_time
+        record['connect'] += self.connect_time
+        record['new_connections'] += 1
+        return sock
+
+
+class TimedHTTPSConnection(TimedHTTPConnection, HTTPSConnection):
+    """HTTPS-соединение, дополнительно измеряющее время TLS-рукопожатия."""
+    def connect(self) -> None:
+        record = current_request()
+        start = time.perf_counter()
+        self.dns_time = self.connect_time = 0.0
+        super().connect()
+        if record is not None:
+            record['tls'] += time.perf_counter() - start - self.dns_time - self.connect_time
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(requests.adapters.HTTPAdapter):
+    """Адаптер requests, создающий соединения с измерением времени."""
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool,
+                                                   'https': TimedHTTPSConnectionPool}
+
+
+class RequestScheduler:
+    """Класс для выполнения HTTP-запросов с повторами и ограничением частоты."""
+    def __init__(self, max_retries: int = 5, backoff: float = 0.5, max_backoff: float = 30.0,
+                 vk_rate: float = VK_REQUESTS_PER_SECOND, pool_size: int = POOL_SIZE,
+                 timeout: Tuple[float, float] = TIMEOUT) -> None:
+        """
+        Инициализирует планировщик запросов.
+
+        Args:
+            max_retries (int): Максимальное количество повторов одного запроса.
+            backoff (float): Базовая задержка перед повтором в секундах.
+            max_backoff (float): Максимальная задержка перед повтором в секундах.
+            vk_rate (float): Максимальное количество вызовов VK API в секунду.
+            pool_size (int): Размер пула keep-alive соединений.
+            timeout (Tuple[float, float]): Тайм-ауты соединения и чтения по умолчанию в секундах.
+        """
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.vk_limiter = RateLimiter(vk_rate)
+        self.session = requests.Session()
+        adapter = TimedHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def retry_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """
+        Вычисляет задержку перед повтором запроса (см. функцию `retry_delay`).
+
+        Args:
+            attempt (int): Номер попытки, начиная с нуля.
+            response (Optional[requests.Response]): Ответ сервера, если он был получен.
+
+        Returns:
+            float: Задержка в секундах.
+        """
+        return retry_delay(attempt, self.backoff, self.max_backoff, response.headers if response is not None else None)
+
+    def request(self, method: str, url: str, kind: Optional[str] = None, **kwargs: Any) -> requests.Response:
+        """
+        Выполняет HTTP-запрос, повторяя его при временных ошибках.
+
+        Если тело запроса - файловый объект, перед повтором он перематывается на начало.
+        Тело-генератор можно передать только один раз, поэтому такой запрос не повторяется.
+        Тело ответа без stream=True читается здесь же, поэтому его обрыв тоже
+        повторяется; при включенных измерениях это отделяет время ожидания ответа
+        от времени передачи, а для ответа с stream=True измерение завершает вызов `finish`.
+        Если тайм-аут не передан, используется тайм-аут планировщика.
+
+        Args:
+            method (str): HTTP-метод.
+            url (str): URL запроса.
+            kind (Optional[str]): Вид запроса для измерений, например 'vk_cdn'.
+            **kwargs: Параметры `requests.Session.request`, например timeout.
+
+        Returns:
+            requests.Response: Ответ сервера. После исчерпания повторов возвращается
+            последний полученный ответ.
+
+        Raises:
+            requests.RequestException: Если после всех повторов не удалось установить соединение
+                или получить ответ целиком.
+        """
+        data = kwargs.get('data')
+        position = body_position(data)
+        max_retries = 0 if is_one_shot(data) else self.max_retries
+        instrumentation = get_instrumentation()
+        record = instrumentation.begin_request(method, url, kind, body_size(data))
+        stream = kwargs.pop('stream', False)
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(max_retries + 1):
+            if attempt and position is not None:
+                data.seek(position)
+            attempt_start = time.perf_counter()
+            if record is not None:
+                record['attempts'] += 1
+                connection_time = record['dns'] + record['connect'] + record['tls']
+            try:
+                response = self.session.request(method, url, stream=True, **kwargs)
+                headers_received = time.perf_counter()
+                if not stream:
+                    response.content  # Чтение тела, как при stream=False в requests
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+                if attempt == max_retries:
+                    instrumentation.end_request(record)
+                    raise
+                delay = self.retry_delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                    break
+                delay = self.retry_delay(attempt, response)
+                response.close()
+            if record is not None:
+                record['wait'] += delay
+            time.sleep(delay)
+
+        if record is None:
+            return response
+        new_connection_time = record['dns'] + record['connect'] + record['tls'] - connection_time
+        record['ttfb'] = headers_received - attempt_start - new_connection_time
+        if stream:
+            response.timing = (record, headers_received)
+            return response
+        record['transfer'] = time.perf_counter() - headers_received
+        instrumentation.end_request(record, response.status_code, len(response.content))
+        return response
+
+    def finish(self, response: requests.Response, nbytes: int) -> None:
+        """
+        Завершает измерение запроса с потоковым ответом после чтения его тела.
+
+        Время передачи считается от получения заголовков до вызова этого метода.
+
+        Args:
+            response (requests.Response): Ответ, полученный с stream=True.
+            nbytes (int): Количество прочитанных байт тела ответа.
+        """
+        timing = getattr(response, 'timing', None)
+        if timing is None:
+            return
+        record, headers_received = timing
+        record['transfer'] = time.perf_counter() - headers_received
+        get_instrumentation().end_request(record, response.status_code, nbytes)
+        response.timing = None
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Выполняет GET-запрос с повторами."""
+        return self.request('GET', url, **kwargs)
+
+    def put(self, url: str, **kwargs: Any) -> requests.Response:
+        """Выполняет PUT-запрос с повторами."""
+        return self.request('PUT', url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        """Выполняет POST-запрос с повторами."""
+        return self.request('POST', url, **kwargs)
+
+    def vk_api(self, method: str, params: Dict[str, Any], post: bool = False) -> Any:
+        """
+        Вызывает метод VK API.
+
+        Вызовы ограничиваются по частоте, а ошибки VK о превышении частоты
+        и внутренние ошибки сервера повторяются с задержкой.
+
+        Args:
+            method (str): Имя метода VK API, например 'photos.get'.
+            params (Dict[str, Any]): Параметры метода, включая access_token.
+            post (bool): Передать параметры в теле POST-запроса, например для длинного кода `execute`.
+
+        Returns:
+            Any: Содержимое поля `response` ответа VK API.
+
+        Raises:
+            VKAPIError: Если VK API вернул ошибку, которую нельзя повторить.
+            requests.RequestException: Если запрос не удался после всех повторов
+                или ответ не в формате JSON.
+        """
+        params = vk_api_params(params)
+        for attempt in range(self.max_retries + 1):
+            self.vk_limiter.wait()
+            if post:
+                response = self.post(f'{VK_API_URL}/{method}', kind='vk_api', data=params)
+            else:
+                response = self.get(f'{VK_API_URL}/{method}', kind='vk_api', params=params)
+            response.raise_for_status()  # Повторы 429/5xx исчерпаны, тело такого ответа - не ответ VK API
+            result = response_json(response)
+            if result is None:
+                raise requests.RequestException(f'Ответ VK API на {method} не в формате JSON', response=response)
+            error = vk_error(result)
+            if error is None:
+                return result['response']
+            if not error.retryable or attempt == self.max_retries:
+                raise error
+            time.sleep(self.retry_delay(attempt))
+
+
+_default_scheduler: Optional[RequestScheduler] = None
+_default_lock = threading.Lock()
+
+
+def get_default_scheduler() -> RequestScheduler:
+    """
+    Возвращает общий для процесса планировщик запросов.
+
+    Общий планировщик гарантирует, что ограничение частоты VK API соблюдается
+    для всех экземпляров загрузчиков.
+
+    Returns:
+        RequestScheduler: Планировщик запросов.
+    """
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+        return _default_scheduler
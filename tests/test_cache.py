@@ -0,0 +1,87 @@
+"""Тесты кэшей `MemoryCache`, `DiskCache` и `LookupCache` с подменными часами."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from cache import DiskCache, LookupCache, MemoryCache
+
+
+class FakeClock:
+    """Часы, время которых меняется только вручную."""
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        patcher = mock.patch.multiple('cache.time', monotonic=self.clock, time=self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_memory_entry_expires(self) -> None:
+        cache = MemoryCache(ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=10)
+        cache.set('c', 3, ttl=600)  # Больше времени жизни кэша
+        self.clock.advance(10.5)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.clock.advance(50)
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNone(cache.get('c'))
+
+    def test_memory_evicts_least_recently_used(self) -> None:
+        cache = MemoryCache(max_items=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+
+    def test_disk_entry_expires_and_is_removed(self) -> None:
+        cache = DiskCache(self.directory.name, ttl=60)
+        cache.set('a', {'items': [1, 2]})
+        self.assertEqual(cache.get('a'), {'items': [1, 2]})
+        self.assertEqual(DiskCache(self.directory.name).get('a'), {'items': [1, 2]})
+        self.clock.advance(61)
+        self.assertIsNone(cache.get('a'))
+        self.assertFalse(os.path.exists(cache.path('a')))
+        self.assertEqual(cache.size, 0)
+
+    def test_disk_evicts_oldest_files(self) -> None:
+        cache = DiskCache(self.directory.name, max_bytes=150)
+        cache.set('a', 'x' * 50)
+        os.utime(cache.path('a'), (1, 1))
+        cache.set('b', 'y' * 50)
+        cache.set('c', 'z' * 50)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('c'), 'z' * 50)
+        self.assertLessEqual(cache.size, 150)
+
+    def test_disk_hit_promoted_with_remaining_ttl(self) -> None:
+        disk = DiskCache(self.directory.name, ttl=3600)
+        disk.set('page', [1], ttl=100)
+        self.clock.advance(90)
+        cache = LookupCache(disk, MemoryCache(ttl=600))
+        self.assertEqual(cache.get('page'), [1])
+        self.assertEqual(cache.memory.get('page'), [1])
+        self.clock.advance(11)
+        self.assertIsNone(cache.memory.get('page'))
+        self.assertIsNone(cache.get('page'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""Тесты манифеста `Manifest`: сброс состояния измененных фотографий и миграция старой базы."""
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from manifest import Manifest, STATUS_DONE, STATUS_FAILED
+
+
+def make_photo(size: str = 'x', url: str = 'https://vk.example/1.jpg') -> dict:
+    return {'owner_id': 1, 'id': 2, 'url': url, 'size': size}
+
+
+class ManifestTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'manifest.db')
+        self.manifest = Manifest(self.db_path)
+
+    def tearDown(self) -> None:
+        self.manifest.close()
+        self.directory.cleanup()
+
+    def add_done_photo(self, photo: dict, variant: str = None) -> str:
+        key = self.manifest.photo_key(photo)
+        self.assertTrue(self.manifest.add_photo(photo, '10.jpg', variant))
+        self.manifest.set_local(key, 'photos/10.jpg', 'abc')
+        self.manifest.set_status(key, 'yandex', STATUS_DONE, 'photos/10.jpg')
+        return key
+
+    def test_new_url_keeps_state(self) -> None:
+        key = self.add_done_photo(make_photo())
+        self.assertFalse(self.manifest.add_photo(make_photo(url='https://vk.example/new.jpg'), '10.jpg'))
+        self.assertTrue(self.manifest.is_done(key, 'yandex'))
+        self.assertEqual(self.manifest.get_local(key), ('photos/10.jpg', 'abc'))
+        row = self.manifest.connection.execute('SELECT url FROM photos WHERE photo_key = ?', (key,)).fetchone()
+        self.assertEqual(row, ('https://vk.example/new.jpg',))
+
+    def test_size_change_resets_state(self) -> None:
+        key = self.add_done_photo(make_photo('x'))
+        self.assertTrue(self.manifest.add_photo(make_photo('z'), '10.jpg'))
+        self.assertFalse(self.manifest.is_done(key, 'yandex'))
+        self.assertEqual(self.manifest.get_local(key), (None, None))
+
+    def test_recompression_change_resets_state(self) -> None:
+        key = self.add_done_photo(make_photo(), 'WEBP:80:')
+        self.assertFalse(self.manifest.add_photo(make_photo(), '10.jpg', 'WEBP:80:'))
+        self.assertTrue(self.manifest.is_done(key, 'yandex'))
+        self.assertTrue(self.manifest.add_photo(make_photo(), '10.jpg', 'WEBP:60:'))
+        self.assertFalse(self.manifest.is_done(key, 'yandex'))
+        self.add_done_photo(make_photo('z'), 'WEBP:60:')
+        self.assertTrue(self.manifest.add_photo(make_photo('z'), '10.jpg'))
+        self.assertEqual(self.manifest.get_local(key), (None, None))
+
+    def test_is_hash_done_matches_remote_path(self) -> None:
+        key = self.add_done_photo(make_photo())
+        self.assertTrue(self.manifest.is_hash_done('abc', 'yandex', 'photos/10.jpg'))
+        self.assertFalse(self.manifest.is_hash_done('abc', 'yandex', 'other/10.jpg'))
+        self.manifest.set_status(key, 'yandex', STATUS_FAILED, 'photos/10.jpg')
+        self.assertFalse(self.manifest.is_hash_done('abc', 'yandex', 'photos/10.jpg'))
+
+    def test_migrates_old_database(self) -> None:
+        self.manifest.close()
+        os.remove(self.db_path)
+        connection = sqlite3.connect(self.db_path)
+        with connection:
+            connection.execute('CREATE TABLE photos (photo_key TEXT PRIMARY KEY, file_name TEXT NOT NULL, '
+                               'url TEXT NOT NULL, size TEXT NOT NULL, local_path TEXT, sha256 TEXT)')
+            connection.execute('CREATE TABLE uploads (photo_key TEXT NOT NULL, destination TEXT NOT NULL, '
+                               'status TEXT NOT NULL, updated_at REAL NOT NULL, '
+                               'PRIMARY KEY (photo_key, destination))')
+            connection.execute("INSERT INTO photos VALUES ('1_2', '10.jpg', 'u', 'x', 'photos/10.jpg', 'abc')")
+            connection.execute("INSERT INTO uploads VALUES ('1_2', 'yandex', 'done', 0)")
+        connection.close()
+
+        self.manifest = Manifest(self.db_path)
+        columns = [row[1] for row in self.manifest.connection.execute('PRAGMA table_info(uploads)')]
+        self.assertIn('remote_path', columns)
+        columns = [row[1] for row in self.manifest.connection.execute('PRAGMA table_info(photos)')]
+        self.assertIn('variant', columns)
+        self.assertTrue(self.manifest.is_done('1_2', 'yandex'))
+        self.assertFalse(self.manifest.add_photo(make_photo(), '10.jpg'))
+        self.assertEqual(self.manifest.get_local('1_2'), ('photos/10.jpg', 'abc'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+"""Тесты выбора варианта фотографии `SizePolicy.choose`."""
+import unittest
+
+from photo_policy import SizePolicy
+
+SIZES = [
+    {'type': 's', 'width': 75, 'height': 56},
+    {'type': 'x', 'width': 604, 'height': 453},
+    {'type': 'y', 'width': 807, 'height': 605},
+    {'type': 'z', 'width': 1280, 'height': 960},
+    {'type': 'w', 'width': 2560, 'height': 1920},
+]
+
+
+class SizePolicyTest(unittest.TestCase):
+    def test_largest_by_default(self) -> None:
+        self.assertEqual(SizePolicy().choose(SIZES)['type'], 'w')
+
+    def test_requested_type(self) -> None:
+        self.assertEqual(SizePolicy('y').choose(SIZES)['type'], 'y')
+
+    def test_missing_type_falls_back_to_smaller(self) -> None:
+        sizes = [size for size in SIZES if size['type'] != 'y']
+        self.assertEqual(SizePolicy('y').choose(sizes)['type'], 'x')
+
+    def test_pixel_and_byte_limits(self) -> None:
+        self.assertEqual(SizePolicy(max_pixels=1280 * 960).choose(SIZES)['type'], 'z')
+        self.assertEqual(SizePolicy(max_bytes=150_000).choose(SIZES)['type'], 'y')
+        self.assertEqual(SizePolicy('w', max_pixels=500_000).choose(SIZES)['type'], 'y')
+
+    def test_smallest_when_nothing_fits(self) -> None:
+        self.assertEqual(SizePolicy(max_pixels=100).choose(SIZES)['type'], 's')
+
+    def test_sizes_without_dimensions(self) -> None:
+        sizes = [{'type': 'x', 'width': 0, 'height': 0}, {'type': 'z', 'width': 0, 'height': 0}]
+        self.assertEqual(SizePolicy().choose(sizes)['type'], 'z')
+        self.assertEqual(SizePolicy(max_pixels=600 * 600).choose(sizes)['type'], 'x')
+
+    def test_unknown_type_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            SizePolicy('q2')
+
+
+if __name__ == '__main__':
+    unittest.main()
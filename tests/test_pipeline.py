@@ -0,0 +1,138 @@
+"""Тесты конвейера `TransferPipeline` с подменным загрузчиком ВКонтакте и хранилищами."""
+import hashlib
+import os
+import tempfile
+import threading
+import unittest
+
+from downloader_vk import DownloaderVK
+from manifest import Manifest, STATUS_DONE, STATUS_FAILED
+from pipeline import LocalSink, Sink, TransferPipeline
+
+
+def make_photo(photo_id: int, likes: int) -> dict:
+    return {'owner_id': 1, 'id': photo_id, 'likes': likes, 'date': photo_id,
+            'url': f'https://vk.example/{photo_id}.jpg', 'size': 'x'}
+
+
+class FakeDownloader(DownloaderVK):
+    """Загрузчик, который отдает заданные фотографии и пишет их содержимое без обращения к сети."""
+    def __init__(self, folder_name: str, photos: list, fail_ids: tuple = (), error: type = OSError) -> None:
+        super().__init__('token', '1', folder_name, os.path.join(folder_name, 'photos.json'))
+        self.photos = photos
+        self.fail_ids = fail_ids
+        self.error = error
+        self.downloaded = []
+
+    def iter_photos(self, count=None, offset=0, album_id='profile'):
+        return iter(self.photos[:count])
+
+    def download_photo(self, photo, file_path, store=None):
+        if photo['id'] in self.fail_ids:
+            raise self.error(f"не удалось скачать {photo['id']}")
+        data = str(photo['id']).encode()
+        with open(file_path, 'wb') as file:
+            file.write(data)
+        self.downloaded.append(photo['id'])
+        return len(data), hashlib.sha256(data).hexdigest()
+
+
+class FakeSink(Sink):
+    """Хранилище, которое запоминает переданные файлы и отклоняет заданные имена."""
+    def __init__(self, name: str, fail_names: tuple = (), workers: int = 2) -> None:
+        super().__init__(workers)
+        self.name = name
+        self.fail_names = fail_names
+        self.lock = threading.Lock()
+        self.sent = []
+
+    def send(self, file_name, file_path, photo):
+        assert os.path.exists(file_path)
+        with self.lock:
+            self.sent.append(file_name)
+        return file_name not in self.fail_names
+
+
+class TransferPipelineTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.directory.name, 'photos')
+        os.makedirs(self.folder)
+        self.manifest = Manifest(os.path.join(self.directory.name, 'manifest.db'))
+        self.photos = [make_photo(photo_id, likes=photo_id * 10) for photo_id in range(1, 6)]
+        self.work_dirs = []
+
+    def tearDown(self) -> None:
+        self.manifest.close()
+        self.directory.cleanup()
+
+    def run_pipeline(self, downloader: DownloaderVK, sinks: list, **kwargs) -> dict:
+        pipeline = TransferPipeline(downloader, sinks, download_workers=2, queue_size=1,
+                                    manifest=self.manifest, **kwargs)
+        original_download = pipeline.download
+
+        def download(file_name, photo):  # Запоминаем временную папку, которую конвейер удалит в конце
+            if pipeline.work_dir not in self.work_dirs:
+                self.work_dirs.append(pipeline.work_dir)
+            return original_download(file_name, photo)
+
+        pipeline.download = download
+        return pipeline.run()
+
+    def test_temporary_files_removed_after_failures(self) -> None:
+        downloader = FakeDownloader(self.folder, self.photos, fail_ids=(2,))
+        first, second = FakeSink('first', fail_names=('30.jpg',)), FakeSink('second')
+        results = self.run_pipeline(downloader, [first, second])
+        self.assertEqual(results['first'], {'10.jpg': True, '20.jpg': False, '30.jpg': False,
+                                            '40.jpg': True, '50.jpg': True})
+        self.assertFalse(results['second']['20.jpg'])
+        self.assertEqual(len(self.work_dirs), 1)
+        self.assertFalse(os.path.exists(self.work_dirs[0]))
+        self.assertEqual(os.listdir(self.folder), ['photos.json'])
+        self.assertFalse(self.manifest.is_done('1_2', 'first'))
+        self.assertFalse(self.manifest.is_done('1_3', 'first'))
+        self.assertTrue(self.manifest.is_done('1_3', 'second'))
+
+    def test_unexpected_download_error_does_not_hang(self) -> None:
+        downloader = FakeDownloader(self.folder, self.photos, fail_ids=(1, 2, 3, 4, 5), error=RuntimeError)
+        sink = FakeSink('remote')
+        results = self.run_pipeline(downloader, [sink])
+        self.assertEqual(results['remote'], {f'{likes}.jpg': False for likes in (10, 20, 30, 40, 50)})
+        self.assertEqual(sink.sent, [])
+        row = self.manifest.connection.execute(
+            "SELECT status FROM uploads WHERE photo_key = '1_1' AND destination = 'remote'").fetchone()
+        self.assertEqual(row, (STATUS_FAILED,))
+
+    def test_local_files_kept_and_reused(self) -> None:
+        downloader = FakeDownloader(self.folder, self.photos)
+        results = self.run_pipeline(downloader, [LocalSink(), FakeSink('remote')])
+        self.assertTrue(all(results['remote'].values()))
+        self.assertEqual(sorted(os.listdir(self.folder)), ['10.jpg', '20.jpg', '30.jpg', '40.jpg', '50.jpg',
+                                                           'photos.json'])
+        self.assertEqual(self.manifest.get_local('1_1')[0], f'{self.folder}/10.jpg')
+
+        # Повторный запуск: файлы берутся из папки, а загруженные фотографии пропускаются
+        downloader = FakeDownloader(self.folder, self.photos)
+        remote = FakeSink('remote')
+        results = self.run_pipeline(downloader, [LocalSink(), remote])
+        self.assertEqual(downloader.downloaded, [])
+        self.assertEqual(remote.sent, [])
+        self.assertEqual(results['remote'], {})
+        self.assertEqual(len(results['local']), 5)
+
+    def test_failed_upload_retried_on_next_run(self) -> None:
+        downloader = FakeDownloader(self.folder, self.photos)
+        self.run_pipeline(downloader, [FakeSink('remote', fail_names=('40.jpg',))])
+        self.assertEqual(self.manifest.connection.execute(
+            "SELECT status FROM uploads WHERE photo_key = '1_4'").fetchone(), (STATUS_FAILED,))
+
+        remote = FakeSink('remote')
+        results = self.run_pipeline(FakeDownloader(self.folder, self.photos), [remote])
+        self.assertEqual(remote.sent, ['40.jpg'])
+        self.assertEqual(results['remote'], {'40.jpg': True})
+        self.assertEqual(self.manifest.connection.execute(
+            "SELECT status FROM uploads WHERE photo_key = '1_4'").fetchone(), (STATUS_DONE,))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""Тесты очереди заданий `WorkQueue` с временной базой и подменными часами."""
+import os
+import tempfile
+import unittest
+
+from work_queue import WorkQueue, TASK_DONE, TASK_FAILED, TASK_LEASED, TASK_PENDING
+
+
+class FakeClock:
+    """Часы, время которых меняется только вручную."""
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class WorkQueueTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        self.queue = WorkQueue(os.path.join(self.directory.name, 'queue.db'), visibility_timeout=60,
+                               max_attempts=3, retry_delay=10, clock=self.clock)
+
+    def tearDown(self) -> None:
+        self.queue.close()
+        self.directory.cleanup()
+
+    def test_put_many_is_idempotent(self) -> None:
+        self.assertEqual(self.queue.put_many([('a', {'n': 1}), ('b', {'n': 2})]), 2)
+        self.assertEqual(self.queue.put_many([('a', {'n': 1}), ('c', {'n': 3})]), 1)
+        self.assertFalse(self.queue.put('b', {'n': 2}))
+        self.assertEqual(self.queue.counts()[TASK_PENDING], 3)
+
+    def test_put_many_skips_finished_tasks(self) -> None:
+        self.queue.put('a', {})
+        task = self.queue.lease()[0]
+        self.queue.complete(task['task_id'], task['lease_id'])
+        self.assertEqual(self.queue.put_many([('a', {})]), 0)
+        self.assertEqual(self.queue.lease(), [])
+
+    def test_lease_hides_task_until_expiry(self) -> None:
+        self.queue.put('a', {'n': 1})
+        task = self.queue.lease()[0]
+        self.assertEqual((task['task_id'], task['payload'], task['attempts']), ('a', {'n': 1}, 1))
+        self.assertEqual(self.queue.counts()[TASK_LEASED], 1)
+        self.clock.advance(59)
+        self.assertEqual(self.queue.lease(), [])
+
+    def test_expired_lease_is_released_again(self) -> None:
+        self.queue.put('a', {})
+        first = self.queue.lease()[0]
+        self.clock.advance(60)
+        second = self.queue.lease()[0]
+        self.assertNotEqual(first['lease_id'], second['lease_id'])
+        self.assertEqual(second['attempts'], 2)
+
+    def test_extend_keeps_lease(self) -> None:
+        self.queue.put('a', {})
+        task = self.queue.lease()[0]
+        self.clock.advance(50)
+        self.assertTrue(self.queue.extend('a', task['lease_id']))
+        self.clock.advance(50)
+        self.assertEqual(self.queue.lease(), [])
+        self.clock.advance(10)
+        self.assertEqual(len(self.queue.lease()), 1)
+        self.assertFalse(self.queue.extend('a', task['lease_id']))
+
+    def test_complete_is_idempotent(self) -> None:
+        self.queue.put('a', {})
+        task = self.queue.lease()[0]
+        self.assertTrue(self.queue.complete('a', task['lease_id']))
+        self.assertTrue(self.queue.complete('a', task['lease_id']))
+        self.assertEqual(self.queue.counts()[TASK_DONE], 1)
+        self.assertEqual(self.queue.unfinished(), 0)
+
+    def test_complete_rejects_superseded_lease(self) -> None:
+        self.queue.put('a', {})
+        stale = self.queue.lease()[0]
+        self.clock.advance(60)
+        current = self.queue.lease()[0]
+        self.assertFalse(self.queue.complete('a', stale['lease_id']))
+        self.assertEqual(self.queue.counts()[TASK_LEASED], 1)
+        self.assertTrue(self.queue.complete('a', current['lease_id']))
+        self.assertFalse(self.queue.complete('a', stale['lease_id']))
+
+    def test_fail_retries_after_delay(self) -> None:
+        self.queue.put('a', {})
+        task = self.queue.lease()[0]
+        self.assertTrue(self.queue.fail('a', task['lease_id'], 'ошибка'))
+        self.assertEqual(self.queue.counts()[TASK_PENDING], 1)
+        self.assertEqual(self.queue.lease(), [])
+        self.clock.advance(10)
+        self.assertEqual(self.queue.lease()[0]['attempts'], 2)
+
+    def test_fail_rejects_superseded_lease(self) -> None:
+        self.queue.put('a', {})
+        stale = self.queue.lease()[0]
+        self.clock.advance(60)
+        self.queue.lease()
+        self.assertFalse(self.queue.fail('a', stale['lease_id'], 'ошибка'))
+        self.assertEqual(self.queue.counts()[TASK_LEASED], 1)
+
+    def test_fail_marks_task_failed_after_max_attempts(self) -> None:
+        self.queue.put('a', {})
+        for _ in range(3):
+            task = self.queue.lease()[0]
+            self.queue.fail('a', task['lease_id'], 'ошибка')
+            self.clock.advance(10)
+        self.assertEqual(self.queue.counts()[TASK_FAILED], 1)
+        self.assertEqual(self.queue.lease(), [])
+        self.assertEqual(self.queue.unfinished(), 0)
+
+    def test_expired_lease_fails_after_max_attempts(self) -> None:
+        self.queue.put('a', {})
+        for _ in range(3):
+            self.assertEqual(len(self.queue.lease()), 1)
+            self.clock.advance(60)
+        self.assertEqual(self.queue.lease(), [])
+        self.assertEqual(self.queue.counts()[TASK_FAILED], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
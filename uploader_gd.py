@@ -7,69 +7,199 @@
 
 Класс `UploaderGD` предлагает следующие функции:
 - Аутентификация пользователя с использованием GoogleAuth для доступа к Google Drive.
-- Создание новой папки в Google Drive с заданным именем.
-- Загрузка локальных файлов в указанную папку Google Drive.
+- Создание новой папки в Google Drive с заданным именем или использование существующей.
+- Загрузка локальных файлов в указанную папку Google Drive, параллельная и
+  возобновляемая (частями) для больших файлов.
+- Пропуск файлов, которые уже есть в папке Google Drive (по имени и MD5).
 
 Основные методы:
-- `__init__`: Инициализирует экземпляр класса и аутентифицирует пользователя с помощью GoogleAuth.
-- `folder_creation`: Создает новую папку в Google Drive и возвращает ее идентификатор.
+- `__init__`: Инициализирует экземпляр класса и аутентифицирует пользователя с помощью GoogleAuth
+  или принимает готовый объект GoogleDrive.
+- `folder_creation`: Возвращает идентификатор папки в Google Drive, создавая ее при отсутствии.
+- `list_files`: Возвращает имена и MD5 файлов папки Google Drive одним запросом.
+- `upload_file`: Загружает один локальный файл в папку Google Drive.
 - `upload`: Загружает файлы из указанной локальной папки в папку Google Drive,
   проверяя наличие локальной папки перед загрузкой и обрабатывая ситуации, когда папка отсутствует.
+  Загрузка выполняется параллельно, а уже загруженные файлы пропускаются
+  по манифесту или по совпадению имени и MD5.
 """
+import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload
+from instrumentation import get_instrumentation
+from manifest import Manifest, STATUS_DONE, STATUS_FAILED
 from pydrive.auth import GoogleAuth
 from pydrive.drive import GoogleDrive
+from pydrive.files import ApiRequestError
+from typing import Dict, Optional
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+RESUMABLE_THRESHOLD = 5 * 1024 * 1024  # Файлы больше этого размера загружаются частями
+CHUNK_SIZE = 5 * 1024 * 1024  # Размер части при возобновляемой загрузке (кратен 256 КБ)
+NUM_RETRIES = 5  # Количество повторов загрузки одной части
+
+
+def file_md5(file_path: str) -> str:
+    """
+    Вычисляет MD5 локального файла для сравнения с md5Checksum Google Drive.
+
+    Args:
+        file_path (str): Путь к файлу.
+
+    Returns:
+        str: MD5 в шестнадцатеричном виде.
+    """
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 
 class UploaderGD:
     """Класс для загрузки файлов в Google Drive."""
-    def __init__(self) -> None:
+    def __init__(self, drive: Optional[GoogleDrive] = None) -> None:
         """
         Инициализирует класс Uploader_GD, аутентифицируя пользователя
         и создавая объект GoogleDrive.
+
+        Args:
+            drive (Optional[GoogleDrive]): Готовый объект GoogleDrive, например с другой
+                авторизацией или HTTP-объектом. По умолчанию создается с GoogleAuth.
         """
-        gauth = GoogleAuth()
-        self.drive = GoogleDrive(gauth)
+        self.drive = drive or GoogleDrive(GoogleAuth())
 
     def folder_creation(self, folder_name: str) -> str:
         """
-        Создает папку в Google Drive.
+        Возвращает папку в корне Google Drive с заданным именем, создавая ее, если такой нет.
 
         Args:
             folder_name (str): Имя папки, которую необходимо создать.
 
         Returns:
-            str: Идентификатор созданной папки.
+            str: Идентификатор существующей или созданной папки.
         """
-        folder_metadata = {'title': folder_name, 'mimeType': 'application/vnd.google-apps.folder'}
+        title = folder_name.replace('\\', '\\\\').replace("'", "\\'")
+        # Только папки в корне Диска: папки с тем же именем внутри других папок или открытые
+        # другими пользователями не подходят
+        query = f"title = '{title}' and mimeType = '{FOLDER_MIME_TYPE}' and trashed = false and 'root' in parents"
+        folders = self.drive.ListFile({'q': query}).GetList()
+        if folders:
+            print(f"Папка '{folder_name}' уже существует.")
+            return folders[0]['id']
+
+        folder_metadata = {'title': folder_name, 'mimeType': FOLDER_MIME_TYPE}
         folder = self.drive.CreateFile(folder_metadata)
         folder.Upload()
         folderid = folder['id']
         return folderid
 
-    def upload(self, folderid: str, folder_name:str) -> None:
+    def list_files(self, folderid: str) -> Dict[str, str]:
+        """
+        Получает файлы папки Google Drive одним списочным запросом.
+
+        Args:
+            folderid (str): Идентификатор папки в Google Drive.
+
+        Returns:
+            Dict[str, str]: Словарь имя файла -> md5Checksum.
+        """
+        query = f"'{folderid}' in parents and trashed = false and mimeType != '{FOLDER_MIME_TYPE}'"
+        return {file['title']: file.get('md5Checksum', '') for file in self.drive.ListFile({'q': query}).GetList()}
+
+    def upload_file(self, folderid: str, file_path: str, file_name: Optional[str] = None) -> str:
+        """
+        Загружает один локальный файл в папку Google Drive.
+
+        Для каждого вызова используется отдельный HTTP-объект, поэтому метод
+        можно вызывать из нескольких потоков одновременно. Файлы больше
+        RESUMABLE_THRESHOLD загружаются возобновляемой загрузкой частями по CHUNK_SIZE
+        с повтором неудавшихся частей.
+
+        Args:
+            folderid (str): Идентификатор папки в Google Drive.
+            file_path (str): Путь к локальному файлу.
+            file_name (Optional[str]): Имя файла в Google Drive, по умолчанию имя локального файла.
+
+        Returns:
+            str: Идентификатор загруженного файла.
+        """
+        file_metadata = {
+            'title': file_name or os.path.basename(file_path),
+            "parents": [{"id": folderid, "kind": "drive#childList"}]
+        }
+        instrumentation = get_instrumentation()
+        http = instrumentation.instrument_http(self.drive.auth.Get_Http_Object(), 'gdrive')
+        with instrumentation.span('gdrive.upload', file=file_metadata['title']):
+            if os.path.getsize(file_path) < RESUMABLE_THRESHOLD:
+                file = self.drive.CreateFile(file_metadata)
+                file.SetContentFile(file_path)
+                file.Upload(param={'http': http})
+                return file['id']
+
+            # Сервис авторизован предыдущими вызовами PyDrive (folder_creation или list_files)
+            media = MediaFileUpload(file_path, chunksize=CHUNK_SIZE, resumable=True)
+            request = self.drive.auth.service.files().insert(body=file_metadata, media_body=media)
+            response = None
+            while response is None:
+                _, response = request.next_chunk(http=http, num_retries=NUM_RETRIES)
+            return response['id']
+
+    def upload(self, folderid: str, folder_name:str, manifest: Optional[Manifest] = None, workers: int = 4) -> None:
         """
         Загружает файлы из локальной папки в указанную папку Google Drive.
 
+        Файлы, которые уже есть в папке Google Drive с тем же именем и MD5,
+        пропускаются, как и недокачанные файлы `.part`. Остальные загружаются параллельно;
+        ошибка загрузки одного файла отмечается в манифесте и не прерывает загрузку остальных.
+
         Args:
             folderid (str): Идентификатор папки в Google Drive, куда будут загружены файлы.
             folder_name:str : Имя папки, откуда загружать фото.
+            manifest (Optional[Manifest]): Манифест для пропуска уже загруженных фотографий.
+            workers (int): Количество одновременных загрузок.
         Raises:
             FileNotFoundError: Если локальная папка не найдена.
         """
         if not os.path.exists(folder_name):
             raise FileNotFoundError(f"Папка '{folder_name}' не найдена. Убедитесь, что она существует.")
 
+        existing_files = self.list_files(folderid)
+        files = {}
         for file_name in os.listdir(folder_name):
-            file_metadata = {
-                'title': file_name,
-                "parents": [{"id": folderid, "kind": "drive#childList"}]
-            }
+            if file_name.endswith('.part'):  # Файл еще скачивается или скачивание было прервано
+                continue
             file_path = os.path.join(folder_name, file_name)
-            file = self.drive.CreateFile(file_metadata)
-            file.SetContentFile(file_path)
-            file.Upload()
-            print(f'Файл {file_name} загружен')
-
-        print(f"Файлы успешно загружены в папку {folder_name} с ID: {folderid}.")
+            key = manifest.find_by_path(file_path) if manifest is not None else None
+            if key is not None and manifest.is_done(key, 'gdrive'):
+                print(f'Файл {file_name} уже загружен, пропускаем')
+                continue
+            if existing_files.get(file_name) == file_md5(file_path):
+                print(f'Файл {file_name} уже есть в Google Drive, пропускаем')
+                if key is not None:
+                    manifest.set_status(key, 'gdrive', STATUS_DONE)
+                continue
+            files[file_name] = (file_path, key)
 
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                executor.submit(self.upload_file, folderid, file_path, file_name): file_name
+                for file_name, (file_path, _) in files.items()
+            }
+            for future in as_completed(futures):
+                file_name = futures[future]
+                key = files[file_name][1]
+                try:
+                    future.result()
+                except (ApiRequestError, HttpError, OSError) as error:  # Остальные файлы загружаются дальше
+                    print(f'Ошибка при загрузке файла {file_name} в Google Drive: {error}')
+                    if key is not None:
+                        manifest.set_status(key, 'gdrive', STATUS_FAILED)
+                    continue
+                if key is not None:
+                    manifest.set_status(key, 'gdrive', STATUS_DONE)
+                print(f'Файл {file_name} загружен')
 
+        print(f"Файлы успешно загружены в папку {folder_name} с ID: {folderid}.")
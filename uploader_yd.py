@@ -9,80 +9,248 @@
 - Инициализация с токеном доступа и именем папки для загрузки файлов.
 - Создание новой папки на Яндекс.Диске, если она не существует.
 - Загрузка файлов в указанную папку на Яндекс.Диске.
+- Параллельная загрузка набора файлов через общую keep-alive сессию.
+- Загрузка файлов по URL без передачи содержимого через локальный компьютер.
+- Потоковая загрузка из локального файла (через mmap) или из ответа другого сервера
+  без чтения всего файла в память.
 
 Основные методы:
 - `__init__`: Инициализирует экземпляр класса с токеном и именем папки.
 - `folder_creation`: Создает новую папку на Яндекс.Диске, если она не существует.
+- `upload_link`: Получает ссылку для загрузки файла.
 - `upload`: Загружает файл на Яндекс.Диск, предоставляя возможность указать 
-  имя файла и его содержимое.
+  имя файла и его содержимое: байты, файловый объект или итератор частей.
+- `upload_file`: Загружает локальный файл по пути, отображая его в память (mmap).
+- `relay`: Передает файл с URL на Яндекс.Диск потоком через этот процесс,
+  с постоянным потреблением памяти.
+- `upload_many`: Загружает набор файлов параллельно, возвращая результат для каждого файла.
+- `upload_from_url`: Запускает загрузку файла по URL на стороне Яндекс.Диска;
+  файл с тем же именем сравнивается с источником и перезаписывается, если отличается.
+- `resource`: Возвращает размер и MD5 файла на Яндекс.Диске.
+- `matches_url`: Сравнивает файл на Яндекс.Диске с файлом по URL.
+- `replace_existing`: Оставляет совпадающий файл на Диске или перезаписывает отличающийся.
+- `operation_status`: Возвращает статус асинхронной операции Яндекс.Диска.
+- `wait_operation`: Дожидается завершения операции загрузки одного файла.
+- `upload_from_urls`: Загружает файлы по URL пакетами, дожидаясь завершения операций.
+
+Все запросы выполняются через `RequestScheduler`, который повторяет их при ответах
+429/5xx и ошибках соединения с учетом заголовка `Retry-After`.
+
+Функции `folder_message`, `upload_params`, `url_upload_params`, `url_upload_href`,
+`resource_params`, `same_resource` и `operation_state`
+формируют запросы и разбирают ответы без ввода-вывода; они общие с асинхронным
+`async_clients.AsyncUploaderYD`.
 """
+import hashlib
+import mmap
+import os
+import time
 import requests
-from typing import Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from instrumentation import get_instrumentation
+from request_scheduler import RequestScheduler, get_default_scheduler, response_json
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+YD_API_URL = 'https://cloud-api.yandex.net/v1/disk'
+CHUNK_SIZE = 64 * 1024  # Размер части при потоковой передаче файла с другого сервера
+ALREADY_EXISTS = ''  # Результат upload_from_url, если файл уже есть на Диске и операция не нужна
+
+
+def folder_message(folder_name: str, status_code: int, text: str) -> str:
+    """
+    Формирует сообщение о результате создания папки.
+
+    Args:
+        folder_name (str): Имя папки.
+        status_code (int): Код ответа Яндекс.Диска.
+        text (str): Тело ответа.
+
+    Returns:
+        str: Сообщение для пользователя.
+    """
+    if status_code == 201:
+        return f"Папка '{folder_name}' успешно создана."
+    if status_code == 409:
+        return f"Папка '{folder_name}' уже существует."
+    return f"Ошибка при создании папки: {text}"
+
+
+def upload_params(folder_name: str, filename: str) -> Dict[str, str]:
+    """
+    Формирует параметры запроса ссылки для загрузки файла с перезаписью.
+
+    Args:
+        folder_name (str): Имя папки на Яндекс.Диске.
+        filename (str): Имя файла в папке.
+
+    Returns:
+        Dict[str, str]: Параметры запроса.
+    """
+    return {'path': f'{folder_name}/{filename}', 'overwrite': 'true'}
+
+
+def url_upload_params(folder_name: str, filename: str, file_url: str) -> Dict[str, str]:
+    """
+    Формирует параметры запроса загрузки файла по URL.
+
+    Args:
+        folder_name (str): Имя папки на Яндекс.Диске.
+        filename (str): Имя файла в папке.
+        file_url (str): URL, с которого Яндекс.Диск скачает файл.
+
+    Returns:
+        Dict[str, str]: Параметры запроса.
+    """
+    return {'path': f'{folder_name}/{filename}', 'url': file_url}
+
+
+def url_upload_href(filename: str, status_code: int, text: str, data: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Разбирает ответ на запуск загрузки файла по URL.
+
+    Загрузка по URL не поддерживает перезапись, поэтому ответ 409 с ошибкой
+    `DiskResourceAlreadyExistsError` означает, что файл с таким именем уже есть.
+    Имена фотографий не уникальны, поэтому вызывающий код должен сравнить
+    содержимое этого файла с источником.
+
+    Args:
+        filename (str): Имя файла на Яндекс.Диске.
+        status_code (int): Код ответа.
+        text (str): Тело ответа.
+        data (Optional[Dict[str, Any]]): Разобранное тело ответа с кодом 202 или 409.
+
+    Returns:
+        Optional[str]: Ссылка на операцию, `ALREADY_EXISTS`, если файл с таким именем
+        уже есть на Диске, или None при ошибке.
+    """
+    if status_code == 202 and data:
+        return data.get('href')
+    if status_code == 409 and data and data.get('error') == 'DiskResourceAlreadyExistsError':
+        print(f"Файл '{filename}' уже есть на Яндекс.Диске, сравниваем с источником.")
+        return ALREADY_EXISTS
+    print(f"Ошибка при запуске загрузки файла '{filename}' по ссылке: {text}")
+    return None
+
+
+def resource_params(folder_name: str, filename: str) -> Dict[str, str]:
+    """
+    Формирует параметры запроса размера и MD5 файла на Яндекс.Диске.
+
+    Args:
+        folder_name (str): Имя папки на Яндекс.Диске.
+        filename (str): Имя файла в папке.
+
+    Returns:
+        Dict[str, str]: Параметры запроса.
+    """
+    return {'path': f'{folder_name}/{filename}', 'fields': 'md5,size'}
+
+
+def same_resource(resource: Dict[str, Any], size: int, md5: str) -> bool:
+    """
+    Сравнивает файл на Яндекс.Диске с данными источника.
+
+    Args:
+        resource (Dict[str, Any]): Поля size и md5 файла на Яндекс.Диске.
+        size (int): Размер данных источника.
+        md5 (str): MD5 данных источника.
+
+    Returns:
+        bool: True, если совпадают и размер, и MD5.
+    """
+    return resource.get('size') == size and resource.get('md5') == md5
+
+
+def operation_state(status_code: int, data: Optional[Dict[str, Any]]) -> str:
+    """
+    Определяет статус асинхронной операции по ответу Яндекс.Диска.
+
+    Args:
+        status_code (int): Код ответа на запрос статуса.
+        data (Optional[Dict[str, Any]]): Разобранное тело ответа.
+
+    Returns:
+        str: 'success', 'failed' или 'in-progress' (в том числе если статус не удалось получить).
+    """
+    if status_code != 200 or not data:
+        return 'in-progress'
+    return data.get('status', 'in-progress')
 
 
 class UploaderYD:
     """Класс для загрузки файлов на Яндекс.Диск."""    
-    def __init__(self, token_ya: str, folder_name: str) -> None:
+    def __init__(self, token_ya: str, folder_name: str, scheduler: Optional[RequestScheduler] = None) -> None:
         """
         Инициализирует класс Uploader_YD с токеном и именем папки.
 
         Args:
             token_ya (str): Токен доступа к Яндекс.Диску.
             folder_name (str): Имя папки для загрузки файлов.
+            scheduler (Optional[RequestScheduler]): Планировщик запросов, по умолчанию общий для процесса.
         """
         self.token_ya = token_ya
         self.folder_name = folder_name
-
-    def folder_creation(self) -> None:
-        """Создает новую папку на Яндекс.Диске, если она не существует."""
-        url = 'https://cloud-api.yandex.net/v1/disk/resources/'
-        headers = {
+        self.headers = {
             'Content-Type': 'application/json',
             'Authorization': f'OAuth {self.token_ya}'
         }
+        self.scheduler = scheduler or get_default_scheduler()
+
+    def folder_creation(self) -> None:
+        """Создает новую папку на Яндекс.Диске, если она не существует."""
+        url = f'{YD_API_URL}/resources/'
         params = {
             'path': self.folder_name,
             'overwrite': 'false'
         }
-        response = requests.put(url=url, headers=headers, params=params)
-        
-        if response.status_code == 201:
-            print(f"Папка '{self.folder_name}' успешно создана.")
-        elif response.status_code == 409:
-            print(f"Папка '{self.folder_name}' уже существует.")
-        else:
-            print(f"Ошибка при создании папки: {response.text}")
+        response = self.scheduler.put(url=url, kind='yandex_api', headers=self.headers, params=params)
+        print(folder_message(self.folder_name, response.status_code, response.text))
+
+
+    def upload_link(self, filename: str) -> Optional[str]:
+        """
+        Получает ссылку для загрузки файла на Яндекс.Диск.
+
+        Args:
+            filename (str): Имя файла в папке.
+
+        Returns:
+            Optional[str]: Ссылка для PUT-запроса или None при ошибке.
 
+        Raises:
+            requests.RequestException: Если не удалось выполнить запрос.
+        """
+        response = self.scheduler.get(url=f'{YD_API_URL}/resources/upload', kind='yandex_api',
+                                      headers=self.headers, params=upload_params(self.folder_name, filename))
+        if response.status_code != 200:
+            print(f"Ошибка получения ссылки для загрузки: {response.text}")
+            return None
+        return (response_json(response) or {}).get('href')
 
-    def upload(self, filename: str, curl: Union[bytes, str]) -> bool:
+    def upload(self, filename: str, curl: Union[bytes, str, memoryview, BinaryIO, Iterable[bytes]]) -> bool:
         """
         Загружает файл на Яндекс.Диск.
 
+        Файловый объект и итератор частей передаются потоком, не читаясь в память целиком.
+        Итератор можно передать только один раз, поэтому при ошибке такая загрузка не повторяется.
+
         Args:
             filename (str): Имя файла, который нужно загрузить.
-            curl (str): Данные файла, которые будут загружены.
+            curl (Union[bytes, str, memoryview, BinaryIO, Iterable[bytes]]): Данные файла,
+                файл, открытый на чтение, или итератор частей файла.
 
         Returns:
             bool: Успешность загрузки файла.
         """
-        url = f'https://cloud-api.yandex.net/v1/disk/resources/upload'
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f'OAuth {self.token_ya}'
-        }
-        params = {
-            'path': f'{self.folder_name}/{filename}',
-            'overwrite': 'true'
-        }
-        
-        
-        response = requests.get(url=url, headers=headers, params=params)
-        if response.status_code != 200:
-            print(f"Ошибка получения ссылки для загрузки: {response.text}")
+        try:
+            with get_instrumentation().span('yandex.upload', file=filename):
+                href = self.upload_link(filename)
+                if href is None:
+                    return False
+                uploader = self.scheduler.put(href, kind='yandex_upload', data=curl)
+        except requests.RequestException as error:
+            print(f"Ошибка соединения при загрузке файла '{filename}': {error}")
             return False
-        
-        href = response.json().get('href')
-        uploader = requests.put(href, curl)
 
         if uploader.status_code == 201:
             print(f"Файл '{filename}' успешно загружен.")
@@ -90,3 +258,277 @@ class UploaderYD:
         else:
             print(f"Ошибка при загрузке файла: {uploader.text}")
             return False
+
+    def upload_file(self, filename: str, file_path: str) -> bool:
+        """
+        Загружает локальный файл на Яндекс.Диск.
+
+        Файл отображается в память (mmap) и отправляется в сокет без копирования
+        в буферы процесса, а при повторе запроса не перечитывается с диска.
+
+        Args:
+            filename (str): Имя файла на Яндекс.Диске.
+            file_path (str): Путь к локальному файлу.
+
+        Returns:
+            bool: Успешность загрузки файла.
+        """
+        with open(file_path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:  # Пустой файл нельзя отобразить в память
+                return self.upload(filename, b'')
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    return self.upload(filename, view)
+
+    def relay(self, filename: str, source_url: str, attempts: int = 3) -> bool:
+        """
+        Передает файл с source_url на Яндекс.Диск потоком через этот процесс.
+
+        Ответ источника читается частями по CHUNK_SIZE и сразу отправляется
+        на Яндекс.Диск, поэтому потребление памяти не зависит от размера файла.
+        Поток нельзя перемотать, поэтому при ошибке передача повторяется целиком.
+
+        Args:
+            filename (str): Имя файла на Яндекс.Диске.
+            source_url (str): URL файла, например фотографии на CDN ВКонтакте.
+            attempts (int): Количество попыток передачи.
+
+        Returns:
+            bool: Успешность передачи файла.
+        """
+        for _ in range(attempts):
+            sent = 0
+            try:
+                with self.scheduler.get(source_url, kind='vk_cdn', stream=True) as source:
+                    source.raise_for_status()
+
+                    def chunks() -> Iterator[bytes]:
+                        nonlocal sent
+                        for chunk in source.iter_content(chunk_size=CHUNK_SIZE):
+                            sent += len(chunk)
+                            yield chunk
+
+                    success = self.upload(filename, chunks())
+                    self.scheduler.finish(source, sent)
+            except requests.RequestException as error:
+                print(f"Ошибка при получении файла '{filename}' с {source_url}: {error}")
+                success = False
+            if success:
+                return True
+        return False
+
+    def upload_from_url(self, filename: str, file_url: str) -> Optional[str]:
+        """
+        Запускает загрузку файла на Яндекс.Диск по URL силами самого Диска.
+
+        Args:
+            filename (str): Имя файла на Яндекс.Диске.
+            file_url (str): URL, с которого Яндекс.Диск скачает файл.
+
+        Если файл с таким именем уже есть на Диске, его содержимое сравнивается
+        с источником, а отличающийся файл перезаписывается через `relay`.
+
+        Args:
+            filename (str): Имя файла на Яндекс.Диске.
+            file_url (str): URL, с которого Яндекс.Диск скачает файл.
+
+        Returns:
+            Optional[str]: Ссылка на асинхронную операцию, `ALREADY_EXISTS`, если на Диске
+            уже лежит тот же файл (или он перезаписан), или None при ошибке.
+        """
+        url = f'{YD_API_URL}/resources/upload'
+        params = url_upload_params(self.folder_name, filename, file_url)
+        try:
+            response = self.scheduler.post(url=url, kind='yandex_api', headers=self.headers, params=params)
+        except requests.RequestException as error:
+            print(f"Ошибка соединения при загрузке файла '{filename}' по ссылке: {error}")
+            return None
+        data = response_json(response) if response.status_code in (202, 409) else None
+        operation_href = url_upload_href(filename, response.status_code, response.text, data)
+        if operation_href == ALREADY_EXISTS and not self.replace_existing(filename, file_url):
+            return None
+        return operation_href
+
+    def resource(self, filename: str) -> Optional[Dict[str, Any]]:
+        """
+        Получает размер и MD5 файла на Яндекс.Диске.
+
+        Args:
+            filename (str): Имя файла в папке.
+
+        Returns:
+            Optional[Dict[str, Any]]: Поля size и md5 или None, если файла нет или запрос не удался.
+        """
+        try:
+            response = self.scheduler.get(url=f'{YD_API_URL}/resources', kind='yandex_api', headers=self.headers,
+                                          params=resource_params(self.folder_name, filename))
+        except requests.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        return response_json(response)
+
+    def matches_url(self, filename: str, file_url: str) -> bool:
+        """
+        Проверяет, совпадает ли файл на Яндекс.Диске с файлом по URL.
+
+        Источник скачивается без сохранения на диск для подсчета MD5, но только
+        если его Content-Length совпадает с размером файла на Диске.
+
+        Args:
+            filename (str): Имя файла на Яндекс.Диске.
+            file_url (str): URL источника.
+
+        Returns:
+            bool: True, если совпадают размер и MD5.
+        """
+        resource = self.resource(filename)
+        if resource is None:
+            return False
+        digest = hashlib.md5()
+        size = 0
+        try:
+            with self.scheduler.get(file_url, kind='vk_cdn', stream=True) as source:
+                source.raise_for_status()
+                length = source.headers.get('Content-Length')
+                if length is not None and int(length) != resource.get('size'):
+                    return False
+                for chunk in source.iter_content(chunk_size=CHUNK_SIZE):
+                    digest.update(chunk)
+                    size += len(chunk)
+                self.scheduler.finish(source, size)
+        except requests.RequestException as error:
+            print(f"Ошибка при получении файла '{filename}' с {file_url}: {error}")
+            return False
+        return same_resource(resource, size, digest.hexdigest())
+
+    def replace_existing(self, filename: str, file_url: str) -> bool:
+        """
+        Оставляет файл на Яндекс.Диске, если он совпадает с источником, иначе перезаписывает его.
+
+        Args:
+            filename (str): Имя файла на Яндекс.Диске.
+            file_url (str): URL источника.
+
+        Returns:
+            bool: True, если на Диске в итоге лежит файл из источника.
+        """
+        if self.matches_url(filename, file_url):
+            print(f"Файл '{filename}' с тем же содержимым уже есть на Яндекс.Диске.")
+            return True
+        print(f"Файл '{filename}' на Яндекс.Диске отличается от источника, перезаписываем.")
+        return self.relay(filename, file_url)
+
+    def operation_status(self, operation_href: str) -> str:
+        """
+        Получает статус асинхронной операции Яндекс.Диска.
+
+        Args:
+            operation_href (str): Ссылка на операцию.
+
+        Returns:
+            str: Статус операции: 'success', 'failed' или 'in-progress'.
+        """
+        try:
+            response = self.scheduler.get(url=operation_href, kind='yandex_api', headers=self.headers)
+        except requests.RequestException:
+            return 'in-progress'
+        return operation_state(response.status_code, response_json(response) if response.status_code == 200 else None)
+
+    def wait_operation(self, filename: str, operation_href: str, poll_interval: float = 1.0,
+                       timeout: float = 300.0) -> bool:
+        """
+        Дожидается завершения асинхронной операции загрузки файла.
+
+        Args:
+            filename (str): Имя загружаемого файла.
+            operation_href (str): Ссылка на операцию.
+            poll_interval (float): Интервал опроса статуса в секундах.
+            timeout (float): Максимальное время ожидания в секундах.
+
+        Returns:
+            bool: Успешность загрузки файла.
+        """
+        if operation_href == ALREADY_EXISTS:
+            return True
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            status = self.operation_status(operation_href)
+            if status == 'success':
+                return True
+            if status == 'failed':
+                print(f"Ошибка при загрузке файла '{filename}' по ссылке.")
+                return False
+        print(f"Истекло время ожидания загрузки файла '{filename}'.")
+        return False
+
+    def upload_from_urls(self, files: Iterable[Tuple[str, str]], batch_size: int = 20,
+                         poll_interval: float = 1.0, timeout: float = 300.0) -> Dict[str, bool]:
+        """
+        Загружает файлы на Яндекс.Диск по URL пакетами, опрашивая статусы операций.
+
+        Файлы не проходят через локальный компьютер: Яндекс.Диск скачивает их сам.
+
+        Args:
+            files (Iterable[Tuple[str, str]]): Пары (имя файла, URL).
+            batch_size (int): Количество одновременно запущенных операций.
+            poll_interval (float): Интервал опроса статусов в секундах.
+            timeout (float): Максимальное время ожидания одного пакета в секундах.
+
+        Returns:
+            Dict[str, bool]: Успешность загрузки для каждого файла.
+        """
+        results = {}
+        files = list(files)
+        for start in range(0, len(files), batch_size):
+            pending = {}
+            for filename, file_url in files[start:start + batch_size]:
+                operation_href = self.upload_from_url(filename, file_url)
+                if operation_href is None:
+                    results[filename] = False
+                elif operation_href == ALREADY_EXISTS:
+                    results[filename] = True
+                else:
+                    pending[filename] = operation_href
+
+            deadline = time.monotonic() + timeout
+            while pending and time.monotonic() < deadline:
+                time.sleep(poll_interval)
+                for filename, operation_href in list(pending.items()):
+                    status = self.operation_status(operation_href)
+                    if status == 'success':
+                        results[filename] = True
+                        del pending[filename]
+                    elif status == 'failed':
+                        print(f"Ошибка при загрузке файла '{filename}' по ссылке.")
+                        results[filename] = False
+                        del pending[filename]
+
+            for filename in pending:
+                print(f"Истекло время ожидания загрузки файла '{filename}'.")
+                results[filename] = False
+        return results
+
+    def upload_many(self, files: Iterable[Tuple[str, Union[bytes, str]]], workers: int = 8) -> Dict[str, bool]:
+        """
+        Загружает набор файлов на Яндекс.Диск параллельно через общую сессию.
+
+        Args:
+            files (Iterable[Tuple[str, Union[bytes, str]]]): Пары (имя файла, данные файла).
+            workers (int): Количество одновременных загрузок.
+
+        Returns:
+            Dict[str, bool]: Успешность загрузки для каждого файла.
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {executor.submit(self.upload, filename, curl): filename for filename, curl in files}
+            for future in as_completed(futures):
+                filename = futures[future]
+                try:
+                    results[filename] = future.result()
+                except requests.RequestException as error:
+                    print(f"Ошибка при загрузке файла '{filename}': {error}")
+                    results[filename] = False
+        return results
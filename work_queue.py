@@ -0,0 +1,376 @@
+"""
+Модуль общей очереди заданий на передачу фотографий.
+
+Этот модуль предоставляет класс `WorkQueue` - очередь заданий в SQLite-базе, которую
+могут одновременно разбирать несколько процессов на одном компьютере или на нескольких
+компьютерах с общей папкой. Задание выдается обработчику в аренду (lease) на время
+видимости (visibility timeout): если обработчик аварийно завершился и не подтвердил
+выполнение, по истечении аренды задание снова выдается другому обработчику.
+
+База открывается в режиме журнала DELETE, а не WAL: WAL требует общей памяти
+и не работает на сетевых файловых системах. Атомарность выдачи заданий между
+компьютерами при этом держится только на блокировках файлов общей папки:
+на NFS они должны поддерживаться сервером (NFSv4 или lockd для NFSv3),
+а на SMB-ресурсах и NFS, смонтированных с `nolock`, одно задание может быть
+выдано двум обработчикам одновременно. Если надежные блокировки недоступны,
+запускайте все обработчики на одном компьютере.
+
+Класс `WorkQueue` предлагает следующие функции:
+- Идемпотентное добавление заданий: задание с уже известным идентификатором
+  не добавляется повторно, поэтому повторное заполнение очереди не дублирует работу.
+- Выдача заданий в аренду и продление аренды.
+- Идемпотентное подтверждение выполнения: повторное подтверждение ничего не меняет,
+  а подтверждение с арендой, переданной другому обработчику, отклоняется.
+- Возврат неудавшихся заданий с задержкой и перевод в статус ошибки после
+  исчерпания попыток.
+
+Основные методы:
+- `put`, `put_many`: Добавляют задания в очередь.
+- `lease`: Выдает доступные задания в аренду.
+- `extend`: Продлевает аренду задания.
+- `complete`: Подтверждает выполнение задания.
+- `fail`: Возвращает задание в очередь или переводит его в статус ошибки.
+- `counts`: Возвращает количество заданий в каждом статусе.
+- `unfinished`: Возвращает количество еще не завершенных заданий.
+
+Функция `run_worker` разбирает очередь несколькими потоками, пока в ней есть
+незавершенные задания, и продлевает аренды выполняющихся заданий.
+"""
+import contextlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+TASK_PENDING = 'pending'
+TASK_LEASED = 'leased'
+TASK_DONE = 'done'
+TASK_FAILED = 'failed'
+
+
+class WorkQueue:
+    """Класс очереди заданий с арендой и временем видимости."""
+    def __init__(self, db_path: str = 'work_queue.db', visibility_timeout: float = 300.0,
+                 max_attempts: int = 5, retry_delay: float = 30.0,
+                 clock: Callable[[], float] = time.time) -> None:
+        """
+        Открывает (или создает) базу очереди.
+
+        Args:
+            db_path (str): Путь к файлу базы SQLite. Для нескольких компьютеров -
+                путь в общей папке с поддержкой блокировок файлов (см. описание модуля).
+            visibility_timeout (float): Время аренды задания в секундах.
+            max_attempts (int): Количество попыток выполнения задания.
+            retry_delay (float): Задержка перед повтором неудавшегося задания в секундах.
+            clock (Callable[[], float]): Источник текущего времени в секундах; часы
+                всех обработчиков одной очереди должны быть синхронизированы.
+        """
+        self.db_path = db_path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.clock = clock
+        self.lock = threading.Lock()
+        # Транзакции открываются явно (BEGIN IMMEDIATE), чтобы выдача заданий была атомарной между процессами
+        self.connection = sqlite3.connect(db_path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        # WAL не работает на сетевых файловых системах, поэтому используется журнал с откатом
+        self.connection.execute('PRAGMA journal_mode=DELETE')
+        with self.transaction():
+            self.connection.execute('''
+                CREATE TABLE IF NOT EXISTS tasks (
+                    task_id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_id TEXT,
+                    available_at REAL NOT NULL,
+                    error TEXT,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS tasks_available ON tasks (status, available_at)')
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Выполняет блок в транзакции с блокировкой записи.
+
+        Yields:
+            sqlite3.Connection: Соединение с базой.
+        """
+        with self.lock:
+            self.connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.connection
+            except BaseException:
+                self.connection.execute('ROLLBACK')
+                raise
+            self.connection.execute('COMMIT')
+
+    def put(self, task_id: str, payload: Dict[str, Any]) -> bool:
+        """
+        Добавляет задание в очередь.
+
+        Args:
+            task_id (str): Идентификатор задания, например `<пользователь>/<альбом>/<ключ фотографии>`.
+            payload (Dict[str, Any]): Описание задания, сериализуемое в JSON.
+
+        Returns:
+            bool: True, если задание добавлено, False - если оно уже было в очереди.
+        """
+        return self.put_many([(task_id, payload)]) == 1
+
+    def put_many(self, tasks: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Добавляет задания в очередь одной транзакцией.
+
+        Задания с уже известными идентификаторами (в любом статусе) пропускаются.
+
+        Args:
+            tasks (Iterable[Tuple[str, Dict[str, Any]]]): Пары (идентификатор, описание задания).
+
+        Returns:
+            int: Количество добавленных заданий.
+        """
+        now = self.clock()
+        rows = [(task_id, json.dumps(payload, ensure_ascii=False), TASK_PENDING, now, now)
+                for task_id, payload in tasks]
+        with self.transaction() as connection:
+            before = connection.total_changes
+            connection.executemany(
+                'INSERT OR IGNORE INTO tasks (task_id, payload, status, available_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)', rows
+            )
+            return connection.total_changes - before
+
+    def lease(self, count: int = 1, visibility_timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Выдает доступные задания в аренду.
+
+        Доступны ожидающие задания и задания с истекшей арендой. Задание
+        с истекшей арендой, у которого исчерпаны попытки, переводится в статус ошибки.
+
+        Args:
+            count (int): Максимальное количество заданий.
+            visibility_timeout (Optional[float]): Время аренды в секундах, по умолчанию из конструктора.
+
+        Returns:
+            List[Dict[str, Any]]: Задания с полями task_id, payload, lease_id и attempts.
+        """
+        now = self.clock()
+        expires = now + (visibility_timeout or self.visibility_timeout)
+        leased = []
+        with self.transaction() as connection:
+            connection.execute(
+                "UPDATE tasks SET status = ?, lease_id = NULL, error = 'истекла аренда', updated_at = ? "
+                'WHERE status = ? AND available_at <= ? AND attempts >= ?',
+                (TASK_FAILED, now, TASK_LEASED, now, self.max_attempts)
+            )
+            rows = connection.execute(
+                'SELECT task_id, payload, attempts FROM tasks '
+                'WHERE status IN (?, ?) AND available_at <= ? ORDER BY available_at LIMIT ?',
+                (TASK_PENDING, TASK_LEASED, now, count)
+            ).fetchall()
+            for task_id, payload, attempts in rows:
+                lease_id = uuid.uuid4().hex
+                connection.execute(
+                    'UPDATE tasks SET status = ?, lease_id = ?, attempts = ?, available_at = ?, updated_at = ? '
+                    'WHERE task_id = ?',
+                    (TASK_LEASED, lease_id, attempts + 1, expires, now, task_id)
+                )
+                leased.append({'task_id': task_id, 'payload': json.loads(payload),
+                               'lease_id': lease_id, 'attempts': attempts + 1})
+        return leased
+
+    def extend(self, task_id: str, lease_id: str, visibility_timeout: Optional[float] = None) -> bool:
+        """
+        Продлевает аренду задания для долгого выполнения.
+
+        Args:
+            task_id (str): Идентификатор задания.
+            lease_id (str): Идентификатор аренды из `lease`.
+            visibility_timeout (Optional[float]): Новое время аренды от текущего момента.
+
+        Returns:
+            bool: True, если аренда продлена; False, если она уже истекла и передана другому обработчику.
+        """
+        now = self.clock()
+        with self.transaction() as connection:
+            cursor = connection.execute(
+                'UPDATE tasks SET available_at = ?, updated_at = ? WHERE task_id = ? AND lease_id = ? AND status = ?',
+                (now + (visibility_timeout or self.visibility_timeout), now, task_id, lease_id, TASK_LEASED)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, task_id: str, lease_id: str) -> bool:
+        """
+        Подтверждает выполнение задания.
+
+        Подтверждение принимается только от обработчика, который держит аренду:
+        если аренда истекла и задание выдано другому обработчику (или вернулось
+        в очередь после `fail`), подтверждение отклоняется. Подтверждение
+        идемпотентно: повторный вызов с той же арендой для выполненного задания
+        ничего не меняет.
+
+        Args:
+            task_id (str): Идентификатор задания.
+            lease_id (str): Идентификатор аренды из `lease`.
+
+        Returns:
+            bool: True, если задание выполнено по этой аренде; False, если аренда передана другому обработчику.
+        """
+        with self.transaction() as connection:
+            cursor = connection.execute(
+                'UPDATE tasks SET status = ?, error = NULL, updated_at = ? '
+                'WHERE task_id = ? AND lease_id = ? AND status = ?',
+                (TASK_DONE, self.clock(), task_id, lease_id, TASK_LEASED)
+            )
+            if cursor.rowcount == 1:
+                return True
+            row = connection.execute(
+                'SELECT 1 FROM tasks WHERE task_id = ? AND lease_id = ? AND status = ?',
+                (task_id, lease_id, TASK_DONE)
+            ).fetchone()
+            return row is not None
+
+    def fail(self, task_id: str, lease_id: str, error: str = '') -> bool:
+        """
+        Сообщает о неудачном выполнении задания.
+
+        Задание возвращается в очередь через retry_delay секунд, а после
+        исчерпания попыток переводится в статус ошибки.
+
+        Args:
+            task_id (str): Идентификатор задания.
+            lease_id (str): Идентификатор аренды из `lease`.
+            error (str): Описание ошибки.
+
+        Returns:
+            bool: True, если статус изменен; False, если аренда уже передана другому обработчику.
+        """
+        now = self.clock()
+        with self.transaction() as connection:
+            cursor = connection.execute(
+                'UPDATE tasks SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, lease_id = NULL, '
+                'available_at = ?, error = ?, updated_at = ? WHERE task_id = ? AND lease_id = ? AND status = ?',
+                (self.max_attempts, TASK_FAILED, TASK_PENDING, now + self.retry_delay, error, now,
+                 task_id, lease_id, TASK_LEASED)
+            )
+            return cursor.rowcount == 1
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Возвращает количество заданий в каждом статусе.
+
+        Returns:
+            Dict[str, int]: Статус -> количество заданий.
+        """
+        with self.lock:
+            rows = self.connection.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status').fetchall()
+        return {TASK_PENDING: 0, TASK_LEASED: 0, TASK_DONE: 0, TASK_FAILED: 0, **dict(rows)}
+
+    def unfinished(self) -> int:
+        """
+        Возвращает количество еще не завершенных заданий (ожидающих и выданных в аренду).
+
+        Returns:
+            int: Количество заданий.
+        """
+        counts = self.counts()
+        return counts[TASK_PENDING] + counts[TASK_LEASED]
+
+    def close(self) -> None:
+        """Закрывает соединение с базой очереди."""
+        with self.lock:
+            self.connection.close()
+
+
+def run_worker(work_queue: WorkQueue, handler: Callable[[Dict[str, Any]], bool], workers: int = 8,
+               poll_interval: float = 5.0, heartbeat_interval: Optional[float] = None) -> Dict[str, int]:
+    """
+    Разбирает очередь, пока в ней есть незавершенные задания.
+
+    Если доступных заданий нет, но другие обработчики еще держат аренды,
+    очередь опрашивается каждые poll_interval секунд: задания аварийно
+    завершившихся обработчиков будут выданы снова после истечения аренды.
+    Пока задание выполняется, отдельный поток каждые heartbeat_interval секунд
+    продлевает его аренду, поэтому задание дольше времени видимости не выдается
+    повторно. Результат задания, аренда которого все же была потеряна, не
+    подтверждается: задание выполнит обработчик, получивший его снова.
+
+    Args:
+        work_queue (WorkQueue): Очередь заданий.
+        handler (Callable[[Dict[str, Any]], bool]): Обработчик описания задания; возвращает
+            успешность выполнения. Исключение считается неудачей.
+        workers (int): Количество потоков, одновременно выполняющих задания.
+        poll_interval (float): Интервал опроса очереди в секундах.
+        heartbeat_interval (Optional[float]): Интервал продления аренд в секундах,
+            по умолчанию треть времени видимости очереди.
+
+    Returns:
+        Dict[str, int]: Количество выполненных (`done`) и неудавшихся (`failed`) заданий этого обработчика.
+    """
+    stats = {TASK_DONE: 0, TASK_FAILED: 0}
+    stats_lock = threading.Lock()
+    slots = threading.BoundedSemaphore(max(1, workers))
+    running: Dict[str, str] = {}  # task_id -> lease_id выполняющихся заданий
+    stopped = threading.Event()
+    interval = heartbeat_interval or work_queue.visibility_timeout / 3
+
+    def heartbeat() -> None:
+        while not stopped.wait(interval):
+            with stats_lock:
+                leases = list(running.items())
+            for task_id, lease_id in leases:
+                try:
+                    if not work_queue.extend(task_id, lease_id):
+                        print(f'Аренда задания {task_id} потеряна, результат не будет подтвержден')
+                except sqlite3.Error as exception:
+                    print(f'Не удалось продлить аренду задания {task_id}: {exception}')
+
+    def execute(task: Dict[str, Any]) -> None:
+        task_id, lease_id = task['task_id'], task['lease_id']
+        try:
+            try:
+                success, error = handler(task['payload']), ''
+            except Exception as exception:  # Ошибка одного задания не должна останавливать обработчик
+                success, error = False, f'{type(exception).__name__}: {exception}'
+            with stats_lock:
+                running.pop(task_id, None)
+            if success:
+                accepted = work_queue.complete(task_id, lease_id)
+            else:
+                accepted = work_queue.fail(task_id, lease_id, error or 'задание не выполнено')
+                print(f"Задание {task_id} не выполнено (попытка {task['attempts']}) {error}")
+            if not accepted:
+                print(f'Аренда задания {task_id} передана другому обработчику, результат отклонен')
+            with stats_lock:
+                stats[TASK_DONE if success else TASK_FAILED] += 1
+        finally:
+            with stats_lock:
+                running.pop(task_id, None)
+            slots.release()
+
+    heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+    heartbeat_thread.start()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            while True:
+                slots.acquire()
+                tasks = work_queue.lease(1)
+                if not tasks:
+                    slots.release()
+                    if not work_queue.unfinished():
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                with stats_lock:
+                    running[tasks[0]['task_id']] = tasks[0]['lease_id']
+                executor.submit(execute, tasks[0])
+    finally:
+        stopped.set()
+        heartbeat_thread.join()
+    return stats